@@ -33,7 +33,14 @@ class UserAdmin(DjangoUserAdmin):
             None,
             {
                 "classes": ("wide",),
-                "fields": ("email", "password1", "password2", "role", "is_staff", "is_superuser"),
+                "fields": (
+                    "email",
+                    "password1",
+                    "password2",
+                    "role",
+                    "is_staff",
+                    "is_superuser",
+                ),
             },
         ),
     )
@@ -51,3 +58,6 @@ class AuthAuditLogAdmin(admin.ModelAdmin):
     list_display = ("created_at", "action", "email", "successful", "ip_address")
     list_filter = ("action", "successful", "created_at")
     search_fields = ("email", "user__email", "ip_address", "user_agent")
+    # Drilling down by date lets PostgreSQL prune to the matching partitions.
+    date_hierarchy = "created_at"
+    show_full_result_count = False
@@ -1,26 +1,35 @@
 import hashlib
 from datetime import datetime, timedelta
+from typing import Any
 
 from django.conf import settings
-from django.contrib.auth import authenticate
 from django.contrib.auth.password_validation import validate_password
 from django.core.exceptions import ValidationError
 from django.db import IntegrityError
+from django.http import HttpRequest, HttpResponse, HttpResponseNotModified
 from django.utils import timezone
-from ninja import Router
+from ninja import Query, Router
 from ninja.errors import HttpError
 from ninja.responses import Response
 
+from assets_backend.pagination import keyset_page
+from assets_backend.renderers import ORJSONResponse
+
 from .dependencies import JWTAuth, require_role
+from .hashing import authenticate_credentials, hash_password
+from .keys import asymmetric_signing_enabled, get_key_ring
 from .models import AuthAuditLog, RefreshToken, User
 from .schemas import (
+    AuditLogFilters,
+    AuditLogPage,
     LoginRequest,
     LoginResponse,
     RefreshResponse,
     RegisterRequest,
     UserResponse,
 )
-from .tokens import create_access_token
+from .throttling import check_login_attempt
+from .tokens import create_access_token, rotate_refresh_token
 from .utils import get_client_ip, get_user_agent, log_event, split_full_name
 
 jwt_auth = JWTAuth()
@@ -32,12 +41,31 @@ def auth_status(request) -> dict[str, str]:
     return {"service": "auth", "status": "ok"}
 
 
+_EMPTY_JWKS = b'{"keys":[]}'
+
+
+@router.get("jwks", summary="Public keys that verify access tokens (JWK Set)")
+def jwks(request: HttpRequest) -> HttpResponse:
+    if asymmetric_signing_enabled():
+        ring = get_key_ring()
+        body, etag = ring.jwks_body, ring.jwks_etag
+    else:
+        body, etag = _EMPTY_JWKS, '"empty"'
+    if etag in request.headers.get("If-None-Match", ""):
+        response = HttpResponseNotModified()
+    else:
+        response = HttpResponse(body, content_type="application/jwk-set+json")
+    response["ETag"] = etag
+    response["Cache-Control"] = f"public, max-age={settings.JWT_JWKS_MAX_AGE}"
+    return response
+
+
 def _access_expiration() -> datetime:
     return timezone.now() + timedelta(minutes=settings.ACCESS_TOKEN_LIFETIME_MINUTES)
 
 
 def _set_auth_cookies(
-    response: Response,
+    response: HttpResponse,
     *,
     access_token: str,
     access_expires: datetime,
@@ -62,22 +90,38 @@ def _set_auth_cookies(
     )
 
 
-def _clear_auth_cookies(response: Response) -> None:
+def _clear_auth_cookies(response: HttpResponse) -> None:
     response.delete_cookie("access_token")
     response.delete_cookie("refresh_token")
 
 
-def _user_payload(user: User) -> dict[str, str]:
-    return UserResponse(
-        id=str(user.pk),
-        email=user.email,
-        full_name=user.full_name,
-        role=user.role,
-    ).dict(by_alias=True)
+def _user_payload(user: User, *, by_alias: bool = True) -> dict[str, str]:
+    """``UserResponse(...).dict(by_alias=by_alias)`` without building the model."""
+
+    return {
+        "id": str(user.pk),
+        "email": user.email,
+        "fullName" if by_alias else "full_name": user.full_name,
+        "role": user.role,
+    }
+
+
+def _token_payload(
+    *, access_token: str, refresh_token: str, expires_at: datetime, role: str
+) -> dict[str, Any]:
+    """``LoginResponse``/``RefreshResponse`` fields, in schema order, without the model."""
+
+    return {
+        "access_token": access_token,
+        "refresh_token": refresh_token,
+        "token_type": "Bearer",
+        "expires_at": expires_at,
+        "role": role,
+    }
 
 
 @router.post("register", response=UserResponse, summary="Register a new user account")
-def register(request, payload: RegisterRequest) -> Response:
+def register(request, payload: RegisterRequest) -> HttpResponse:
     first_name, last_name = split_full_name(payload.full_name)
     first_name = first_name[:150]
     last_name = last_name[:150]
@@ -97,7 +141,7 @@ def register(request, payload: RegisterRequest) -> Response:
     try:
         user = User.objects.create_user(
             email=payload.email,
-            password=payload.password,
+            password_hash=hash_password(payload.password),
             first_name=first_name,
             last_name=last_name,
         )
@@ -110,7 +154,9 @@ def register(request, payload: RegisterRequest) -> Response:
             successful=False,
             metadata={"reason": "email_conflict"},
         )
-        raise HttpError(400, {"email": ["A user with that email already exists."]}) from exc
+        raise HttpError(
+            400, {"email": ["A user with that email already exists."]}
+        ) from exc
 
     log_event(
         request=request,
@@ -120,12 +166,15 @@ def register(request, payload: RegisterRequest) -> Response:
         successful=True,
     )
 
-    return Response(_user_payload(user), status=201)
+    return ORJSONResponse(_user_payload(user), status=201)
 
 
-@router.post("login", response=LoginResponse, summary="Authenticate a user and issue tokens")
-def login(request, payload: LoginRequest) -> Response:
-    user = authenticate(request, email=payload.email, password=payload.password)
+@router.post(
+    "login", response=LoginResponse, summary="Authenticate a user and issue tokens"
+)
+def login(request, payload: LoginRequest) -> HttpResponse:
+    check_login_attempt(get_client_ip(request), payload.email)
+    user = authenticate_credentials(payload.email, payload.password)
     if user is None:
         log_event(
             request=request,
@@ -167,14 +216,13 @@ def login(request, payload: LoginRequest) -> Response:
         metadata={"refresh_id": refresh_record.pk},
     )
 
-    response = Response(
-        LoginResponse(
+    response = ORJSONResponse(
+        _token_payload(
             access_token=access_token,
             refresh_token=refresh_token,
             expires_at=access_expires,
             role=user.role,
-        ).dict(),
-        status=200,
+        )
     )
     _set_auth_cookies(
         response,
@@ -186,14 +234,39 @@ def login(request, payload: LoginRequest) -> Response:
     return response
 
 
-@router.get("me", response=UserResponse, auth=jwt_auth, summary="Return the current authenticated user")
-def me(request) -> dict[str, str]:
+@router.get(
+    "me",
+    response=UserResponse,
+    auth=jwt_auth,
+    summary="Return the current authenticated user",
+)
+def me(request) -> HttpResponse:
     user: User = request.user  # type: ignore[assignment]
-    return _user_payload(user)
-
-
-@router.post("refresh", response=RefreshResponse, summary="Refresh access token using a valid refresh token")
-def refresh(request) -> Response:
+    # Stateless principals carry no name columns; load both in one query
+    # rather than one lazy load each.
+    deferred = user.get_deferred_fields() & {"first_name", "last_name"}
+    if deferred:
+        user.refresh_from_db(fields=sorted(deferred))
+    # Built directly rather than validated against ``UserResponse``; the keys
+    # are the schema's field names, as Ninja's default rendering produced.
+    return ORJSONResponse(_user_payload(user, by_alias=False))
+
+
+# Status code and message for each failed ``rotate_refresh_token`` outcome.
+_REFRESH_FAILURES = {
+    "unknown_token": (401, "Invalid refresh token"),
+    "expired_or_revoked": (401, "Refresh token expired"),
+    "replayed": (401, "Refresh token reuse detected"),
+    "inactive": (403, "User account is inactive"),
+}
+
+
+@router.post(
+    "refresh",
+    response=RefreshResponse,
+    summary="Refresh access token using a valid refresh token",
+)
+def refresh(request) -> HttpResponse:
     raw_token = request.COOKIES.get("refresh_token")
     if not raw_token:
         log_event(
@@ -206,57 +279,29 @@ def refresh(request) -> Response:
         )
         raise HttpError(401, "Refresh token missing")
 
-    token_hash = hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
-    try:
-        token = RefreshToken.objects.select_related("user").get(token_hash=token_hash)
-    except RefreshToken.DoesNotExist as exc:
-        log_event(
-            request=request,
-            action=AuthAuditLog.Action.REFRESH,
-            email="",
-            user=None,
-            successful=False,
-            metadata={"reason": "unknown_token"},
-        )
-        raise HttpError(401, "Invalid refresh token") from exc
-
-    if token.revoked or token.expires_at <= timezone.now():
-        token.revoke()
-        log_event(
-            request=request,
-            action=AuthAuditLog.Action.REFRESH,
-            email=token.user.email,
-            user=token.user,
-            successful=False,
-            metadata={"reason": "expired_or_revoked"},
-        )
-        raise HttpError(401, "Refresh token expired")
-
-    user = token.user
-    if not user.is_active:
-        token.revoke()
+    rotation = rotate_refresh_token(
+        raw_token,
+        user_agent=get_user_agent(request),
+        ip_address=get_client_ip(request),
+    )
+    if rotation.status != "rotated":
         log_event(
             request=request,
             action=AuthAuditLog.Action.REFRESH,
-            email=user.email,
-            user=user,
+            email=rotation.user.email if rotation.user else "",
+            user=rotation.user,
             successful=False,
-            metadata={"reason": "inactive"},
+            metadata={"reason": rotation.status},
         )
-        raise HttpError(403, "User account is inactive")
-
-    token.mark_used()
-    token.revoke()
+        raise HttpError(*_REFRESH_FAILURES[rotation.status])
 
+    user, new_refresh, new_refresh_token = (
+        rotation.user,
+        rotation.token,
+        rotation.raw_token,
+    )
     access_token = create_access_token(user)
     access_expires = _access_expiration()
-    refresh_lifetime = timedelta(days=settings.REFRESH_TOKEN_LIFETIME_DAYS)
-    new_refresh, new_refresh_token = RefreshToken.create_for_user(
-        user,
-        lifetime=refresh_lifetime,
-        user_agent=get_user_agent(request),
-        ip_address=get_client_ip(request),
-    )
 
     log_event(
         request=request,
@@ -267,14 +312,13 @@ def refresh(request) -> Response:
         metadata={"refresh_id": new_refresh.pk},
     )
 
-    response = Response(
-        RefreshResponse(
+    response = ORJSONResponse(
+        _token_payload(
             access_token=access_token,
             refresh_token=new_refresh_token,
             expires_at=access_expires,
             role=user.role,
-        ).dict(),
-        status=200,
+        )
     )
     _set_auth_cookies(
         response,
@@ -328,5 +372,61 @@ def logout(request) -> Response:
     return response
 
 
+@router.post(
+    "sessions/revoke",
+    auth=jwt_auth,
+    summary="Sign out everywhere by revoking every token issued to the current user",
+)
+def revoke_sessions(request) -> Response:
+    user: User = request.user  # type: ignore[assignment]
+    user.revoke_sessions()
+    log_event(
+        request=request,
+        action=AuthAuditLog.Action.TOKEN_REVOKED,
+        email=user.email,
+        user=user,
+        successful=True,
+        metadata={"auth_epoch": user.auth_epoch},
+    )
+    response = Response(None, status=204)
+    _clear_auth_cookies(response)
+    return response
+
+
 admin_required = require_role(User.Role.ADMIN)
 user_required = require_role(User.Role.USER)
+
+
+# Newest first; matches the ``(..., created_at, id)`` indexes on AuthAuditLog.
+AUDIT_LOG_ORDERING = ("-created_at", "-id")
+
+
+@router.get(
+    "audit-logs",
+    response=AuditLogPage,
+    auth=jwt_auth,
+    summary="List authentication audit events, newest first, with cursor pagination",
+)
+def audit_logs(request, filters: Query[AuditLogFilters]) -> dict[str, Any]:
+    admin_required(request)
+    queryset = AuthAuditLog.objects.all()
+    if filters.user_id is not None:
+        queryset = queryset.filter(user_id=filters.user_id)
+    if filters.email:
+        queryset = queryset.filter(email=filters.email)
+    if filters.action:
+        queryset = queryset.filter(action=filters.action)
+    if filters.successful is not None:
+        queryset = queryset.filter(successful=filters.successful)
+    if filters.since:
+        queryset = queryset.filter(created_at__gte=filters.since)
+    if filters.until:
+        queryset = queryset.filter(created_at__lt=filters.until)
+
+    items, next_cursor = keyset_page(
+        queryset,
+        ordering=AUDIT_LOG_ORDERING,
+        cursor=filters.cursor,
+        limit=filters.limit,
+    )
+    return {"items": items, "next_cursor": next_cursor}
@@ -16,6 +16,14 @@ class AuthConfig(AppConfig):
     def ready(self) -> None:  # pragma: no cover - exercised implicitly on startup
         super().ready()
 
+        from . import signals  # noqa: F401 - registers the cache invalidation receivers
+
+        if settings.JWT_KEYS_DIR:
+            from .keys import get_key_ring
+
+            # Parse the keys now so workers start warm and bad keys fail the boot.
+            get_key_ring()
+
         if not settings.DEBUG:
             return
 
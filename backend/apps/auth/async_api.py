@@ -0,0 +1,293 @@
+"""Native async variants of the auth endpoints for ASGI deployments.
+
+``assets_backend.api`` mounts this router instead of ``apps.auth.api.router``
+when ``AUTH_ASYNC_ENDPOINTS`` is enabled. ``login``, ``logout`` and ``me``
+use the async ORM and ``refresh`` runs its rotation transaction in a worker
+thread; the remaining operations are shared with the sync router.
+"""
+
+import hashlib
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse
+from ninja import Router
+from ninja.errors import HttpError
+from ninja.responses import Response
+
+from assets_backend.renderers import ORJSONResponse
+
+from .api import (
+    _REFRESH_FAILURES,
+    _access_expiration,
+    _clear_auth_cookies,
+    _set_auth_cookies,
+    _token_payload,
+    _user_payload,
+    audit_logs,
+    auth_status,
+    jwks,
+    register,
+    revoke_sessions,
+)
+from .dependencies import AsyncJWTAuth, JWTAuth
+from .hashing import ahash_password, averify_password
+from .models import AuthAuditLog, RefreshToken, User
+from .schemas import (
+    AuditLogPage,
+    LoginRequest,
+    LoginResponse,
+    RefreshResponse,
+    UserResponse,
+)
+from .throttling import check_login_attempt
+from .tokens import create_access_token, rotate_refresh_token
+from .utils import alog_event, get_client_ip, get_user_agent
+
+jwt_auth = AsyncJWTAuth()
+router = Router(tags=["Auth"])
+
+router.add_api_operation(
+    "status", ["GET"], auth_status, summary="Authentication service heartbeat"
+)
+router.add_api_operation(
+    "jwks", ["GET"], jwks, summary="Public keys that verify access tokens (JWK Set)"
+)
+router.add_api_operation(
+    "register",
+    ["POST"],
+    register,
+    response=UserResponse,
+    summary="Register a new user account",
+)
+router.add_api_operation(
+    "sessions/revoke",
+    ["POST"],
+    revoke_sessions,
+    auth=JWTAuth(),
+    summary="Sign out everywhere by revoking every token issued to the current user",
+)
+router.add_api_operation(
+    "audit-logs",
+    ["GET"],
+    audit_logs,
+    response=AuditLogPage,
+    auth=JWTAuth(),
+    summary="List authentication audit events, newest first, with cursor pagination",
+)
+
+
+async def _authenticate(email: str, password: str) -> User | None:
+    """Async ``authenticate_credentials``: ORM on the loop, hashing in the pool."""
+
+    user = await User.objects.filter(email=email).afirst()
+    if user is None:
+        # Hash anyway so unknown emails take as long as wrong passwords.
+        await ahash_password(password)
+        return None
+    is_correct, must_update = await averify_password(password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+    if must_update:
+        user.password = await ahash_password(password)
+        await user.asave(update_fields=["password"])
+    return user
+
+
+@router.post(
+    "login", response=LoginResponse, summary="Authenticate a user and issue tokens"
+)
+async def login(request, payload: LoginRequest) -> HttpResponse:
+    await sync_to_async(check_login_attempt, thread_sensitive=False)(
+        get_client_ip(request), payload.email
+    )
+    user = await _authenticate(payload.email, payload.password)
+    if user is None:
+        await alog_event(
+            request=request,
+            action=AuthAuditLog.Action.LOGIN,
+            email=payload.email,
+            user=None,
+            successful=False,
+            metadata={"reason": "invalid_credentials"},
+        )
+        raise HttpError(401, "Invalid credentials")
+
+    if not user.is_active:
+        await alog_event(
+            request=request,
+            action=AuthAuditLog.Action.LOGIN,
+            email=user.email,
+            user=user,
+            successful=False,
+            metadata={"reason": "inactive"},
+        )
+        raise HttpError(403, "User account is inactive")
+
+    access_token = create_access_token(user)
+    access_expires = _access_expiration()
+    refresh_lifetime = timedelta(days=settings.REFRESH_TOKEN_LIFETIME_DAYS)
+    refresh_record, refresh_token = await RefreshToken.acreate_for_user(
+        user,
+        lifetime=refresh_lifetime,
+        user_agent=get_user_agent(request),
+        ip_address=get_client_ip(request),
+    )
+
+    await alog_event(
+        request=request,
+        action=AuthAuditLog.Action.LOGIN,
+        email=user.email,
+        user=user,
+        successful=True,
+        metadata={"refresh_id": refresh_record.pk},
+    )
+
+    response = ORJSONResponse(
+        _token_payload(
+            access_token=access_token,
+            refresh_token=refresh_token,
+            expires_at=access_expires,
+            role=user.role,
+        )
+    )
+    _set_auth_cookies(
+        response,
+        access_token=access_token,
+        access_expires=access_expires,
+        refresh_token=refresh_token,
+        refresh_expires=refresh_record.expires_at,
+    )
+    return response
+
+
+@router.get(
+    "me",
+    response=UserResponse,
+    auth=jwt_auth,
+    summary="Return the current authenticated user",
+)
+async def me(request) -> HttpResponse:
+    user: User = request.user  # type: ignore[assignment]
+    # Stateless principals carry no name columns; lazy loading them would be a
+    # synchronous query on the event loop.
+    deferred = user.get_deferred_fields() & {"first_name", "last_name"}
+    if deferred:
+        await user.arefresh_from_db(fields=sorted(deferred))
+    return ORJSONResponse(_user_payload(user, by_alias=False))
+
+
+@router.post(
+    "refresh",
+    response=RefreshResponse,
+    summary="Refresh access token using a valid refresh token",
+)
+async def refresh(request) -> HttpResponse:
+    raw_token = request.COOKIES.get("refresh_token")
+    if not raw_token:
+        await alog_event(
+            request=request,
+            action=AuthAuditLog.Action.REFRESH,
+            email="",
+            user=None,
+            successful=False,
+            metadata={"reason": "missing_cookie"},
+        )
+        raise HttpError(401, "Refresh token missing")
+
+    rotation = await sync_to_async(rotate_refresh_token)(
+        raw_token,
+        user_agent=get_user_agent(request),
+        ip_address=get_client_ip(request),
+    )
+    if rotation.status != "rotated":
+        await alog_event(
+            request=request,
+            action=AuthAuditLog.Action.REFRESH,
+            email=rotation.user.email if rotation.user else "",
+            user=rotation.user,
+            successful=False,
+            metadata={"reason": rotation.status},
+        )
+        raise HttpError(*_REFRESH_FAILURES[rotation.status])
+
+    user, new_refresh, new_refresh_token = (
+        rotation.user,
+        rotation.token,
+        rotation.raw_token,
+    )
+    access_token = create_access_token(user)
+    access_expires = _access_expiration()
+
+    await alog_event(
+        request=request,
+        action=AuthAuditLog.Action.REFRESH,
+        email=user.email,
+        user=user,
+        successful=True,
+        metadata={"refresh_id": new_refresh.pk},
+    )
+
+    response = ORJSONResponse(
+        _token_payload(
+            access_token=access_token,
+            refresh_token=new_refresh_token,
+            expires_at=access_expires,
+            role=user.role,
+        )
+    )
+    _set_auth_cookies(
+        response,
+        access_token=access_token,
+        access_expires=access_expires,
+        refresh_token=new_refresh_token,
+        refresh_expires=new_refresh.expires_at,
+    )
+    return response
+
+
+@router.post("logout", summary="Revoke the active refresh token and clear cookies")
+async def logout(request) -> Response:
+    raw_token = request.COOKIES.get("refresh_token")
+    response = Response(None, status=204)
+    _clear_auth_cookies(response)
+
+    if not raw_token:
+        await alog_event(
+            request=request,
+            action=AuthAuditLog.Action.LOGOUT,
+            email="",
+            user=None,
+            successful=True,
+            metadata={"reason": "missing_cookie"},
+        )
+        return response
+
+    token_hash = hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+    token = (
+        await RefreshToken.objects.select_related("user")
+        .filter(token_hash=token_hash)
+        .afirst()
+    )
+    if token:
+        await RefreshToken.objects.filter(pk=token.pk).aupdate(revoked=True)
+        await alog_event(
+            request=request,
+            action=AuthAuditLog.Action.LOGOUT,
+            email=token.user.email,
+            user=token.user,
+            successful=True,
+            metadata={"refresh_id": token.pk},
+        )
+    else:
+        await alog_event(
+            request=request,
+            action=AuthAuditLog.Action.LOGOUT,
+            email="",
+            user=None,
+            successful=True,
+            metadata={"reason": "unknown_token"},
+        )
+
+    return response
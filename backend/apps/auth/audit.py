@@ -0,0 +1,228 @@
+"""Background pipeline that batches ``AuthAuditLog`` inserts off the request path."""
+
+from __future__ import annotations
+
+import atexit
+import logging
+import os
+import queue
+import threading
+import time
+from typing import Any
+
+from django.apps import apps
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+
+logger = logging.getLogger(__name__)
+
+
+class AuditWriter:
+    """Drain a bounded queue of unsaved model instances with ``bulk_create``.
+
+    A batch is written once it reaches ``batch_size`` entries or its oldest
+    entry has waited ``flush_interval`` seconds. A batch that fails is retried
+    once and then written row by row, so only entries the database rejects
+    on their own are dropped and counted as ``failed``. When the queue is full,
+    ``submit`` waits at most ``enqueue_timeout`` seconds and then drops the
+    entry, so a flood of audit events can never stall request threads.
+    """
+
+    def __init__(
+        self,
+        model: Any,
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        enqueue_timeout: float = 0.0,
+        autostart: bool = True,
+    ) -> None:
+        self.model = model
+        self.max_queue = max_queue
+        self.batch_size = max(batch_size, 1)
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.autostart = autostart
+        self._queue: queue.Queue[Any] = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._stats = {
+            "enqueued": 0,
+            "written": 0,
+            "dropped": 0,
+            "failed": 0,
+            "flushes": 0,
+        }
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            snapshot = dict(self._stats)
+        snapshot["queue_depth"] = self._queue.qsize()
+        return snapshot
+
+    def _count(self, name: str, amount: int = 1) -> int:
+        with self._lock:
+            self._stats[name] += amount
+            return self._stats[name]
+
+    def submit(self, entry: Any) -> bool:
+        """Queue *entry* for writing; return False when it had to be dropped."""
+
+        if self.autostart:
+            self.start()
+        try:
+            if self.enqueue_timeout > 0:
+                self._queue.put(entry, timeout=self.enqueue_timeout)
+            else:
+                self._queue.put_nowait(entry)
+        except queue.Full:
+            dropped = self._count("dropped")
+            if dropped % 1000 == 1:
+                logger.warning(
+                    "Audit log queue is full; %s entries dropped so far.", dropped
+                )
+            return False
+        self._count("enqueued")
+        return True
+
+    def start(self) -> None:
+        if (
+            self._pid == os.getpid()
+            and self._thread is not None
+            and self._thread.is_alive()
+        ):
+            return
+        with self._lock:
+            if self._pid != os.getpid():
+                # Forked worker: the parent's queue contents are the parent's to write.
+                self._queue = queue.Queue(maxsize=self.max_queue)
+                self._stop = threading.Event()
+                self._pid = os.getpid()
+            elif self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(
+                target=self._worker_main, name="auth-audit-writer", daemon=True
+            )
+            self._thread.start()
+
+    def shutdown(self, timeout: float = 5.0) -> None:
+        """Stop the worker and write everything still queued."""
+
+        self._stop.set()
+        thread = self._thread
+        if thread is not None and thread.is_alive():
+            thread.join(timeout)
+        self.flush()
+
+    def flush(self) -> int:
+        """Write every queued entry from the calling thread; return the count."""
+
+        written = 0
+        batch = self._take(self.batch_size)
+        while batch:
+            written += self._write(batch)
+            batch = self._take(self.batch_size)
+        return written
+
+    def _take(self, limit: int) -> list[Any]:
+        batch: list[Any] = []
+        while len(batch) < limit:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _worker_main(self) -> None:
+        try:
+            self._run()
+        finally:
+            connection.close()
+
+    def _run(self) -> None:
+        batch: list[Any] = []
+        deadline = 0.0
+        while not self._stop.is_set():
+            timeout = (
+                max(deadline - time.monotonic(), 0.0) if batch else self.flush_interval
+            )
+            try:
+                entry = self._queue.get(timeout=min(timeout, 0.5))
+            except queue.Empty:
+                entry = None
+            if entry is not None:
+                if not batch:
+                    deadline = time.monotonic() + self.flush_interval
+                batch.append(entry)
+            if batch and (
+                len(batch) >= self.batch_size or time.monotonic() >= deadline
+            ):
+                # Recycled here rather than in ``_write``: ``flush`` also runs on
+                # callers' threads, possibly inside a transaction.
+                close_old_connections()
+                self._write(batch)
+                batch = []
+        batch.extend(self._take(self.max_queue))
+        for start in range(0, len(batch), self.batch_size):
+            self._write(batch[start : start + self.batch_size])
+
+    def _write(self, batch: list[Any]) -> int:
+        error = self._insert(batch)
+        if error is not None:
+            logger.warning(
+                "Writing %s authentication audit log entries failed; retrying.",
+                len(batch),
+                exc_info=error,
+            )
+            error = self._insert(batch)
+        if error is None:
+            written = len(batch)
+        else:
+            written = sum(self._insert([entry]) is None for entry in batch)
+            failed = len(batch) - written
+            if failed:
+                self._count("failed", failed)
+                logger.warning(
+                    "Dropped %s authentication audit log entries after database errors.",
+                    failed,
+                )
+        self._count("written", written)
+        self._count("flushes")
+        return written
+
+    def _insert(self, entries: list[Any]) -> Exception | None:
+        try:
+            # A savepoint when ``flush`` runs inside a caller's transaction.
+            with transaction.atomic():
+                self.model.objects.bulk_create(entries)
+        except Exception as exc:
+            if not connection.in_atomic_block:
+                # Replaced before the next attempt if the error broke it.
+                connection.close_if_unusable_or_obsolete()
+            return exc
+        return None
+
+
+_writer: AuditWriter | None = None
+_writer_lock = threading.Lock()
+
+
+def get_audit_writer() -> AuditWriter:
+    """Return the process-wide writer, creating it from settings on first use."""
+
+    global _writer  # noqa: PLW0603 - process-wide singleton
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                _writer = AuditWriter(
+                    apps.get_model("assets_auth", "AuthAuditLog"),
+                    max_queue=settings.AUTH_AUDIT_QUEUE_SIZE,
+                    batch_size=settings.AUTH_AUDIT_BATCH_SIZE,
+                    flush_interval=settings.AUTH_AUDIT_FLUSH_INTERVAL_MS / 1000,
+                    enqueue_timeout=settings.AUTH_AUDIT_ENQUEUE_TIMEOUT_MS / 1000,
+                )
+                atexit.register(_writer.shutdown)
+    return _writer
@@ -0,0 +1,460 @@
+"""Two-tier cache for the principal resolved on every authenticated request."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import DEFAULT_DB_ALIAS
+
+from .models import User
+
+logger = logging.getLogger(__name__)
+
+# ``me`` renders the full name, so the name columns ride along with the fields
+# the authentication checks themselves need.
+PRINCIPAL_FIELDS: tuple[str, ...] = (
+    "id",
+    "email",
+    "first_name",
+    "last_name",
+    "role",
+    "is_active",
+    "auth_epoch",
+)
+
+# Stored in place of an epoch for users that are inactive or gone; it never
+# matches the ``epoch`` claim of a token.
+REVOKED_EPOCH = -1
+
+
+class LocalTTLCache:
+    """Thread-safe in-process LRU cache whose entries expire after ``ttl`` seconds.
+
+    ``generation`` goes up on every delete. A reader that notes it before a
+    slow lookup can pass it to :meth:`set`, which then drops the value if an
+    invalidation happened in between.
+    """
+
+    def __init__(self, *, maxsize: int, ttl: float) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.generation = 0
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            expires_at, value = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, *, generation: int | None = None) -> None:
+        if self.maxsize <= 0 or self.ttl <= 0:
+            return
+        with self._lock:
+            if generation is not None and generation != self.generation:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._data.pop(key, None)
+            self.generation += 1
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.generation += 1
+
+
+class VerifiedTokenCache:
+    """Thread-safe LRU of validated access token payloads with a byte ceiling.
+
+    Entries are keyed by the token's SHA-256 digest, so raw bearer tokens are
+    never held, and each one lives until the token's own ``exp``. ``scope``
+    ties an entry to the keys that verified it: a lookup under a different
+    scope (a reloaded key ring) misses and the token is verified again.
+    """
+
+    # Rough per-entry cost of the digest, payload dict, tuple and LRU node on
+    # top of the claim strings, which are about as long as the token itself.
+    ENTRY_OVERHEAD = 512
+
+    def __init__(self, *, max_bytes: int) -> None:
+        self.max_bytes = max_bytes
+        self._data: OrderedDict[bytes, tuple[float, Any, dict[str, Any], int]] = (
+            OrderedDict()
+        )
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def get(self, token: str, scope: Any = None) -> dict[str, Any] | None:
+        key = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            item = self._data.get(key)
+            if item is None or item[0] <= time.time() or item[1] is not scope:
+                if item is not None:
+                    self._discard(key)
+                self._stats["misses"] += 1
+                return None
+            self._data.move_to_end(key)
+            self._stats["hits"] += 1
+            return dict(item[2])
+
+    def set(self, token: str, payload: dict[str, Any], scope: Any = None) -> None:
+        expires_at = payload.get("exp")
+        if self.max_bytes <= 0 or not isinstance(expires_at, (int, float)):
+            return
+        key = hashlib.sha256(token.encode()).digest()
+        size = 2 * len(token) + self.ENTRY_OVERHEAD
+        with self._lock:
+            self._discard(key)
+            self._data[key] = (expires_at, scope, dict(payload), size)
+            self._bytes += size
+            while self._bytes > self.max_bytes and self._data:
+                _key, (_expires_at, _scope, _payload, evicted) = self._data.popitem(
+                    last=False
+                )
+                self._bytes -= evicted
+                self._stats["evictions"] += 1
+
+    def _discard(self, key: bytes) -> None:
+        item = self._data.pop(key, None)
+        if item is not None:
+            self._bytes -= item[3]
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            return {**self._stats, "entries": len(self._data), "bytes": self._bytes}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+            for name in self._stats:
+                self._stats[name] = 0
+
+
+_local_principals = LocalTTLCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_LOCAL_MAXSIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+)
+_local_epochs = LocalTTLCache(
+    maxsize=settings.AUTH_PRINCIPAL_CACHE_LOCAL_MAXSIZE,
+    ttl=settings.AUTH_PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+)
+_stats_lock = threading.Lock()
+_stats: dict[str, int] = {"local_hits": 0, "shared_hits": 0, "misses": 0}
+
+
+def _count(name: str) -> None:
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def principal_cache_stats() -> dict[str, int]:
+    """Return hit/miss counters for this process; every miss is one DB query."""
+
+    with _stats_lock:
+        return dict(_stats)
+
+
+def reset_principal_cache() -> None:
+    """Drop every locally cached principal and zero the counters."""
+
+    _local_principals.clear()
+    _local_epochs.clear()
+    with _stats_lock:
+        for name in _stats:
+            _stats[name] = 0
+
+
+def _principal_key(user_id: Any) -> str:
+    return f"auth:principal:v2:{user_id}"
+
+
+def _epoch_key(user_id: Any) -> str:
+    return f"auth:epoch:v2:{user_id}"
+
+
+def _generation_key(user_id: Any) -> str:
+    return f"auth:generation:{user_id}"
+
+
+# Returned as the generation when the shared tier could not be read; nothing
+# is written back then.
+_UNAVAILABLE = object()
+
+
+def _shared_cache() -> Any:
+    return caches[settings.AUTH_PRINCIPAL_CACHE_ALIAS]
+
+
+def _current(
+    found: dict[str, Any], key: str, generation_key: str
+) -> tuple[Any | None, Any]:
+    generation = found.get(generation_key)
+    entry = found.get(key)
+    if entry is not None and entry[0] == generation:
+        return entry[1], generation
+    return None, generation
+
+
+def _shared_get(key: str, generation_key: str) -> tuple[Any | None, Any]:
+    """Return the entry under *key* if no invalidation superseded it, and the current generation.
+
+    Shared entries are stored with the user's generation as read before the
+    database lookup that filled them. An invalidation replaces the generation,
+    so a fill that raced with it is never served.
+    """
+
+    try:
+        found = _shared_cache().get_many([key, generation_key])
+    except Exception:  # the shared tier is an optimisation, never a hard dependency
+        logger.warning(
+            "Principal cache read failed; falling back to the database.", exc_info=True
+        )
+        return None, _UNAVAILABLE
+    return _current(found, key, generation_key)
+
+
+def _shared_set(key: str, values: Any, generation: Any) -> None:
+    if generation is _UNAVAILABLE:
+        return
+    try:
+        _shared_cache().set(
+            key, (generation, values), timeout=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+        )
+    except Exception:
+        logger.warning("Principal cache write failed.", exc_info=True)
+
+
+async def _ashared_get(key: str, generation_key: str) -> tuple[Any | None, Any]:
+    try:
+        found = await _shared_cache().aget_many([key, generation_key])
+    except Exception:
+        logger.warning(
+            "Principal cache read failed; falling back to the database.", exc_info=True
+        )
+        return None, _UNAVAILABLE
+    return _current(found, key, generation_key)
+
+
+async def _ashared_set(key: str, values: Any, generation: Any) -> None:
+    if generation is _UNAVAILABLE:
+        return
+    try:
+        await _shared_cache().aset(
+            key, (generation, values), timeout=settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS
+        )
+    except Exception:
+        logger.warning("Principal cache write failed.", exc_info=True)
+
+
+def _build_user(data: dict[str, Any]) -> User:
+    """Rehydrate a ``User`` from *data*; every other column stays deferred."""
+
+    field_names = [
+        field.attname for field in User._meta.concrete_fields if field.attname in data
+    ]
+    return User.from_db(
+        DEFAULT_DB_ALIAS, field_names, [data[name] for name in field_names]
+    )
+
+
+def get_principal(user_id: Any) -> User | None:
+    """Return the user identified by *user_id*, consulting the caches first.
+
+    Lookups go local LRU -> shared cache -> database. Only the
+    ``PRINCIPAL_FIELDS`` are loaded; touching any other attribute on the
+    returned instance triggers Django's deferred-field query. The database
+    read always goes to the primary: a lagging replica could otherwise put a
+    deactivated user back into the shared cache right after invalidation.
+    """
+
+    key = _principal_key(user_id)
+    enabled = settings.AUTH_PRINCIPAL_CACHE_ENABLED
+    local_generation = _local_principals.generation
+    generation = _UNAVAILABLE
+    if enabled:
+        values = _local_principals.get(key)
+        if values is not None:
+            _count("local_hits")
+            return _build_user(dict(zip(PRINCIPAL_FIELDS, values, strict=True)))
+        values, generation = _shared_get(key, _generation_key(user_id))
+        if values is not None:
+            _count("shared_hits")
+            _local_principals.set(key, values, generation=local_generation)
+            return _build_user(dict(zip(PRINCIPAL_FIELDS, values, strict=True)))
+
+    _count("misses")
+    values = (
+        User.objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk=user_id)
+        .values_list(*PRINCIPAL_FIELDS)
+        .first()
+    )
+    if values is None:
+        return None
+    if enabled:
+        _local_principals.set(key, values, generation=local_generation)
+        _shared_set(key, values, generation)
+    return _build_user(dict(zip(PRINCIPAL_FIELDS, values, strict=True)))
+
+
+async def aget_principal(user_id: Any) -> User | None:
+    """Async counterpart of :func:`get_principal`."""
+
+    key = _principal_key(user_id)
+    enabled = settings.AUTH_PRINCIPAL_CACHE_ENABLED
+    local_generation = _local_principals.generation
+    generation = _UNAVAILABLE
+    if enabled:
+        values = _local_principals.get(key)
+        if values is not None:
+            _count("local_hits")
+            return _build_user(dict(zip(PRINCIPAL_FIELDS, values, strict=True)))
+        values, generation = await _ashared_get(key, _generation_key(user_id))
+        if values is not None:
+            _count("shared_hits")
+            _local_principals.set(key, values, generation=local_generation)
+            return _build_user(dict(zip(PRINCIPAL_FIELDS, values, strict=True)))
+
+    _count("misses")
+    values = (
+        await User.objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk=user_id)
+        .values_list(*PRINCIPAL_FIELDS)
+        .afirst()
+    )
+    if values is None:
+        return None
+    if enabled:
+        _local_principals.set(key, values, generation=local_generation)
+        await _ashared_set(key, values, generation)
+    return _build_user(dict(zip(PRINCIPAL_FIELDS, values, strict=True)))
+
+
+def principal_from_claims(payload: dict[str, Any]) -> User:
+    """Build a principal from verified access-token claims without touching the DB."""
+
+    return _build_user(
+        {
+            "id": int(payload["sub"]),
+            "email": payload.get("email", ""),
+            "role": payload.get("role", ""),
+            "is_active": True,
+            "auth_epoch": payload.get("epoch", 0),
+        }
+    )
+
+
+def get_revocation_epoch(user_id: Any) -> int:
+    """Return the current token epoch for *user_id*, or ``REVOKED_EPOCH``.
+
+    Only a single integer per user is cached, so this stays cheap even when
+    the principal itself is never loaded.
+    """
+
+    key = _epoch_key(user_id)
+    local_generation = _local_epochs.generation
+    epoch = _local_epochs.get(key)
+    if epoch is not None:
+        _count("local_hits")
+        return int(epoch)
+    epoch, generation = _shared_get(key, _generation_key(user_id))
+    if epoch is not None:
+        _count("shared_hits")
+        _local_epochs.set(key, epoch, generation=local_generation)
+        return int(epoch)
+
+    _count("misses")
+    row = (
+        User.objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk=user_id)
+        .values_list("auth_epoch", "is_active")
+        .first()
+    )
+    epoch = REVOKED_EPOCH if row is None or not row[1] else row[0]
+    _local_epochs.set(key, epoch, generation=local_generation)
+    _shared_set(key, epoch, generation)
+    return epoch
+
+
+async def aget_revocation_epoch(user_id: Any) -> int:
+    """Async counterpart of :func:`get_revocation_epoch`."""
+
+    key = _epoch_key(user_id)
+    local_generation = _local_epochs.generation
+    epoch = _local_epochs.get(key)
+    if epoch is not None:
+        _count("local_hits")
+        return int(epoch)
+    epoch, generation = await _ashared_get(key, _generation_key(user_id))
+    if epoch is not None:
+        _count("shared_hits")
+        _local_epochs.set(key, epoch, generation=local_generation)
+        return int(epoch)
+
+    _count("misses")
+    row = (
+        await User.objects.using(DEFAULT_DB_ALIAS)
+        .filter(pk=user_id)
+        .values_list("auth_epoch", "is_active")
+        .afirst()
+    )
+    epoch = REVOKED_EPOCH if row is None or not row[1] else row[0]
+    _local_epochs.set(key, epoch, generation=local_generation)
+    await _ashared_set(key, epoch, generation)
+    return epoch
+
+
+def invalidate_principal(user_id: Any) -> None:
+    """Evict *user_id* and its token epoch from both tiers.
+
+    The user's shared generation is replaced too, so a lookup that read the
+    old row before this ran cannot store it afterwards. Other processes only
+    notice through the shared tier, so their local copies live for at most
+    ``AUTH_PRINCIPAL_CACHE_LOCAL_TTL_SECONDS``.
+    """
+
+    principal_key = _principal_key(user_id)
+    epoch_key = _epoch_key(user_id)
+    _local_principals.delete(principal_key)
+    _local_epochs.delete(epoch_key)
+    try:
+        cache = _shared_cache()
+        # Outlives any entry stored against the generation it replaces.
+        cache.set(
+            _generation_key(user_id),
+            time.time_ns(),
+            timeout=2 * settings.AUTH_PRINCIPAL_CACHE_TTL_SECONDS,
+        )
+        cache.delete_many([principal_key, epoch_key])
+    except Exception:
+        logger.warning(
+            "Principal cache invalidation failed for user %s.", user_id, exc_info=True
+        )
@@ -1,12 +1,23 @@
 from __future__ import annotations
 
-from typing import Any, Callable
+from collections.abc import Callable
+from typing import Any
 
 import jwt
+from django.conf import settings
 from django.http import HttpRequest
 from ninja.errors import HttpError
 from ninja.security import HttpBearer
 
+from assets_backend.profiling import phase
+
+from .cache import (
+    aget_principal,
+    aget_revocation_epoch,
+    get_principal,
+    get_revocation_epoch,
+    principal_from_claims,
+)
 from .constants import is_auth_exempt_path
 from .models import AuthAuditLog, User
 from .tokens import validate_access_token
@@ -18,6 +29,14 @@ class JWTAuth(HttpBearer):
         if is_auth_exempt_path(request.path):
             return {}
 
+        token = self._extract_token(request)
+        if not token:
+            _record_denied(request, None, "Missing bearer token")
+            raise HttpError(401, "Authentication credentials were not provided")
+        with phase("auth"):
+            return self.authenticate(request, token)
+
+    def _extract_token(self, request: HttpRequest) -> str | None:
         auth_value = request.headers.get(self.header)
         token: str | None = None
         if auth_value:
@@ -26,10 +45,7 @@ class JWTAuth(HttpBearer):
                 token = " ".join(parts[1:]).strip()
         if not token:
             token = request.COOKIES.get("access_token")
-        if not token:
-            _record_denied(request, None, "Missing bearer token")
-            raise HttpError(401, "Authentication credentials were not provided")
-        return self.authenticate(request, token)
+        return token
 
     def authenticate(self, request: HttpRequest, token: str) -> dict[str, Any]:
         try:
@@ -41,20 +57,93 @@ class JWTAuth(HttpBearer):
             _record_denied(request, None, "Invalid token")
             raise HttpError(401, "Invalid authentication token") from exc
 
-        try:
-            user = User.objects.get(pk=payload["sub"])
-        except User.DoesNotExist as exc:
+        if settings.AUTH_STATELESS_MODE:
+            user = self._principal_from_claims(request, payload)
+        else:
+            user = self._load_principal(request, payload)
+
+        request.auth = payload
+        request.user = user
+        return payload
+
+    def _load_principal(self, request: HttpRequest, payload: dict[str, Any]) -> User:
+        user = get_principal(payload["sub"])
+        if user is None:
             _record_denied(request, None, "Unknown user")
-            raise HttpError(401, "User not found") from exc
+            raise HttpError(401, "User not found")
 
         if not user.is_active:
             _record_denied(request, user, "Inactive user")
             raise HttpError(403, "User account is inactive")
 
+        if user.auth_epoch != payload.get("epoch", 0):
+            _record_denied(request, user, "Revoked token")
+            raise HttpError(401, "Token has been revoked")
+        return user
+
+    def _principal_from_claims(
+        self, request: HttpRequest, payload: dict[str, Any]
+    ) -> User:
+        # ``REVOKED_EPOCH`` is negative, so inactive or deleted users fail this too.
+        if get_revocation_epoch(payload["sub"]) != payload.get("epoch", 0):
+            _record_denied(request, None, "Revoked token")
+            raise HttpError(401, "Token has been revoked")
+        return principal_from_claims(payload)
+
+
+class AsyncJWTAuth(JWTAuth):
+    """``JWTAuth`` for async operations; lookups go through the async ORM and cache."""
+
+    async def __call__(self, request: HttpRequest) -> dict[str, Any]:  # type: ignore[override]
+        if is_auth_exempt_path(request.path):
+            return {}
+
+        token = self._extract_token(request)
+        if not token:
+            await _arecord_denied(request, None, "Missing bearer token")
+            raise HttpError(401, "Authentication credentials were not provided")
+        with phase("auth"):
+            return await self.authenticate(request, token)
+
+    async def authenticate(self, request: HttpRequest, token: str) -> dict[str, Any]:  # type: ignore[override]
+        try:
+            payload = validate_access_token(token)
+        except jwt.ExpiredSignatureError as exc:  # pragma: no cover - library message
+            await _arecord_denied(request, None, "Expired signature")
+            raise HttpError(401, "Token has expired") from exc
+        except jwt.InvalidTokenError as exc:
+            await _arecord_denied(request, None, "Invalid token")
+            raise HttpError(401, "Invalid authentication token") from exc
+
+        if settings.AUTH_STATELESS_MODE:
+            if await aget_revocation_epoch(payload["sub"]) != payload.get("epoch", 0):
+                await _arecord_denied(request, None, "Revoked token")
+                raise HttpError(401, "Token has been revoked")
+            user = principal_from_claims(payload)
+        else:
+            user = await self._aload_principal(request, payload)
+
         request.auth = payload
         request.user = user
         return payload
 
+    async def _aload_principal(
+        self, request: HttpRequest, payload: dict[str, Any]
+    ) -> User:
+        user = await aget_principal(payload["sub"])
+        if user is None:
+            await _arecord_denied(request, None, "Unknown user")
+            raise HttpError(401, "User not found")
+
+        if not user.is_active:
+            await _arecord_denied(request, user, "Inactive user")
+            raise HttpError(403, "User account is inactive")
+
+        if user.auth_epoch != payload.get("epoch", 0):
+            await _arecord_denied(request, user, "Revoked token")
+            raise HttpError(401, "Token has been revoked")
+        return user
+
 
 def require_role(role: User.Role) -> Callable[[HttpRequest], User]:
     def dependency(request: HttpRequest) -> User:
@@ -80,3 +169,15 @@ def _record_denied(request: HttpRequest, user: User | None, reason: str) -> None
         user_agent=get_user_agent(request),
         metadata={"reason": reason},
     )
+
+
+async def _arecord_denied(request: HttpRequest, user: User | None, reason: str) -> None:
+    await AuthAuditLog.alog(
+        user=user,
+        email=user.email if user else "",
+        action=AuthAuditLog.Action.ACCESS_DENIED,
+        successful=False,
+        ip_address=get_client_ip(request),
+        user_agent=get_user_agent(request),
+        metadata={"reason": reason},
+    )
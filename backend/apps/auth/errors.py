@@ -0,0 +1,33 @@
+"""HTTP errors raised by the auth app beyond Ninja's built-in ``HttpError``."""
+
+from __future__ import annotations
+
+from ninja.errors import HttpError
+
+
+class RetryableHttpError(HttpError):
+    """``HttpError`` rendered with a ``Retry-After`` header (see ``assets_backend.api``)."""
+
+    def __init__(self, status_code: int, message: str, *, retry_after: int) -> None:
+        super().__init__(status_code, message)
+        self.retry_after = retry_after
+
+
+class HashingPoolBusy(RetryableHttpError):
+    """Raised when a password hash cannot be admitted within the queue-time limit."""
+
+    def __init__(self, *, retry_after: int) -> None:
+        super().__init__(
+            503,
+            "Authentication is temporarily overloaded, please retry",
+            retry_after=retry_after,
+        )
+
+
+class LoginThrottled(RetryableHttpError):
+    """Raised before any hashing when a client or account exceeds its login rate."""
+
+    def __init__(self, *, retry_after: int) -> None:
+        super().__init__(
+            429, "Too many login attempts, please retry later", retry_after=retry_after
+        )
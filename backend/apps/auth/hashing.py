@@ -0,0 +1,176 @@
+"""Bounded worker pool that keeps password hashing off the request threads."""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, TypeVar
+
+import django
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.contrib.auth.hashers import make_password, verify_password
+
+from assets_backend.metrics import PASSWORD_HASH_SECONDS, PASSWORD_HASH_WAIT_SECONDS
+
+from .errors import HashingPoolBusy
+from .models import User
+
+T = TypeVar("T")
+
+
+class PasswordHashingPool:
+    """Run hash and verify operations under a concurrency cap.
+
+    At most ``max_concurrency`` operations are admitted at once; a caller that
+    cannot be admitted within ``queue_timeout`` seconds gets ``HashingPoolBusy``
+    instead of queueing indefinitely. With ``workers`` greater than zero the
+    work itself runs in a process pool, otherwise on the calling thread.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        max_concurrency: int,
+        queue_timeout: float,
+        retry_after: int,
+    ) -> None:
+        self.workers = workers
+        self.max_concurrency = max(max_concurrency, 1)
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = threading.BoundedSemaphore(self.max_concurrency)
+        self._executor: ProcessPoolExecutor | None = None
+        self._executor_pid: int | None = None
+        self._lock = threading.Lock()
+        self._stats: dict[str, float] = {
+            "queue_depth": 0,
+            "in_flight": 0,
+            "completed": 0,
+            "rejected": 0,
+            "queue_wait_seconds_total": 0.0,
+            "hash_seconds_total": 0.0,
+            "hash_seconds_max": 0.0,
+        }
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            return dict(self._stats)
+
+    def hash(self, password: str) -> str:
+        return self._run("hash", make_password, password)
+
+    def verify(self, password: str, encoded: str) -> tuple[bool, bool]:
+        """Return ``(is_correct, must_update)`` as ``verify_password`` does."""
+
+        return self._run("verify", verify_password, password, encoded)
+
+    def shutdown(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True)
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        with self._lock:
+            # Created lazily and per process so pre-forking servers do not
+            # share one pool between workers.
+            if self._executor is None or self._executor_pid != os.getpid():
+                # ``django.setup`` is a no-op for forked workers and configures
+                # spawned ones from the inherited DJANGO_SETTINGS_MODULE.
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers, initializer=django.setup
+                )
+                self._executor_pid = os.getpid()
+            return self._executor
+
+    def _run(self, operation: str, func: Callable[..., T], *args: Any) -> T:
+        queued_at = time.perf_counter()
+        with self._lock:
+            self._stats["queue_depth"] += 1
+        admitted = self._slots.acquire(timeout=self.queue_timeout)
+        started = time.perf_counter()
+        with self._lock:
+            self._stats["queue_depth"] -= 1
+            if not admitted:
+                self._stats["rejected"] += 1
+            else:
+                self._stats["in_flight"] += 1
+                self._stats["queue_wait_seconds_total"] += started - queued_at
+        PASSWORD_HASH_WAIT_SECONDS.labels(operation).observe(started - queued_at)
+        if not admitted:
+            raise HashingPoolBusy(retry_after=self.retry_after)
+
+        try:
+            if self.workers > 0:
+                return self._get_executor().submit(func, *args).result()
+            return func(*args)
+        finally:
+            elapsed = time.perf_counter() - started
+            self._slots.release()
+            PASSWORD_HASH_SECONDS.labels(operation).observe(elapsed)
+            with self._lock:
+                self._stats["in_flight"] -= 1
+                self._stats["completed"] += 1
+                self._stats["hash_seconds_total"] += elapsed
+                self._stats["hash_seconds_max"] = max(
+                    self._stats["hash_seconds_max"], elapsed
+                )
+
+
+_pool: PasswordHashingPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_hashing_pool() -> PasswordHashingPool:
+    global _pool  # noqa: PLW0603 - process-wide singleton
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordHashingPool(
+                    workers=settings.AUTH_HASH_POOL_WORKERS,
+                    max_concurrency=settings.AUTH_HASH_MAX_CONCURRENCY,
+                    queue_timeout=settings.AUTH_HASH_QUEUE_TIMEOUT_MS / 1000,
+                    retry_after=settings.AUTH_HASH_RETRY_AFTER_SECONDS,
+                )
+    return _pool
+
+
+def hash_password(password: str) -> str:
+    return get_hashing_pool().hash(password)
+
+
+def authenticate_credentials(email: str, password: str) -> User | None:
+    """``ModelBackend.authenticate`` with every hash routed through the pool."""
+
+    pool = get_hashing_pool()
+    try:
+        user = User._default_manager.get_by_natural_key(email)
+    except User.DoesNotExist:
+        # Hash anyway so unknown emails take as long as wrong passwords.
+        pool.hash(password)
+        return None
+
+    is_correct, must_update = pool.verify(password, user.password)
+    if not is_correct or not user.is_active:
+        return None
+    if must_update:
+        user.password = pool.hash(password)
+        user.save(update_fields=["password"])
+    return user
+
+
+async def ahash_password(password: str) -> str:
+    return await sync_to_async(get_hashing_pool().hash, thread_sensitive=False)(
+        password
+    )
+
+
+async def averify_password(password: str, encoded: str) -> tuple[bool, bool]:
+    return await sync_to_async(get_hashing_pool().verify, thread_sensitive=False)(
+        password, encoded
+    )
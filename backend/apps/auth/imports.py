@@ -0,0 +1,455 @@
+"""Bulk user import from CSV or JSONL files.
+
+Records are read in batches. New passwords are hashed across a process pool
+and each batch is written in one transaction: on PostgreSQL through ``COPY``
+into a staging table and a single ``INSERT ... ON CONFLICT DO NOTHING``,
+elsewhere with ``bulk_create``. Rows that cannot be imported, including email
+conflicts, go to a JSONL reject file without their password fields.
+
+After every committed batch the byte offset of the next record is written to
+a checkpoint file, so an interrupted run resumes where it stopped. Before a
+batch commits, the checkpoint also records its emails as pending: if the run
+stops after the commit but before the checkpoint moves on, the resumed run
+reads the batch again and counts those rows as imported, not as existing
+emails, and never imports them twice. Reject entries written after the
+checkpoint are cut from the reject file on resume, so that batch's rejects
+are not reported twice.
+"""
+
+from __future__ import annotations
+
+import csv
+import json
+import os
+import time
+from collections.abc import Callable, Iterator
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import IO, Any, NamedTuple
+
+import django
+from django.contrib.auth.hashers import (
+    UNUSABLE_PASSWORD_PREFIX,
+    identify_hasher,
+    make_password,
+)
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import connections, router, transaction
+from django.utils import timezone
+
+from .models import User
+
+IMPORT_FORMATS: tuple[str, ...] = ("csv", "jsonl")
+
+# Never copied into the reject file.
+SECRET_FIELDS = frozenset({"password", "password_hash"})
+
+_TRUE = {"1", "true", "yes", "y", "t"}
+_FALSE = {"0", "false", "no", "n", "f", ""}
+
+
+class ImportRecord(NamedTuple):
+    line: int
+    end_offset: int
+    data: dict[str, Any] | None
+    error: str = ""
+
+
+class ImportBatch(NamedTuple):
+    imported: int
+    rejected: int
+    line: int
+    seconds: float
+
+
+class ImportReport(NamedTuple):
+    imported: int
+    rejected: int
+    batches: int
+    seconds: float
+
+
+class Checkpoint(NamedTuple):
+    source: str
+    offset: int
+    line: int
+    imported: int
+    rejected: int
+    # Emails of the batch being committed up to ``pending_offset``.
+    pending_offset: int = 0
+    pending: tuple[str, ...] = ()
+
+    @classmethod
+    def load(cls, path: Path) -> Checkpoint:
+        data = json.loads(path.read_text())
+        return cls(**{**data, "pending": tuple(data.get("pending", ()))})
+
+    def save(self, path: Path) -> None:
+        tmp_path = path.with_name(f"{path.name}.tmp")
+        with tmp_path.open("w") as handle:
+            json.dump(self._asdict(), handle)
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(tmp_path, path)
+
+
+def _lines(handle: IO[bytes], state: dict[str, int]) -> Iterator[str]:
+    for raw in iter(handle.readline, b""):
+        state["offset"] += len(raw)
+        state["line"] += 1
+        yield raw.decode("utf-8-sig" if state["line"] == 1 else "utf-8")
+
+
+def read_records(
+    path: Path, import_format: str, *, offset: int = 0, line: int = 0
+) -> Iterator[ImportRecord]:
+    """Yield the records of *path* after byte *offset* with their end offsets."""
+
+    with path.open("rb") as handle:
+        state = {"offset": 0, "line": 0}
+        fieldnames: list[str] | None = None
+        if import_format == "csv":
+            # The header is re-read on resume; records continue after *offset*.
+            fieldnames = next(csv.reader(_lines(handle, state)), None)
+            if fieldnames is None:
+                return
+            fieldnames = [name.strip() for name in fieldnames]
+        if offset > state["offset"]:
+            handle.seek(offset)
+            state = {"offset": offset, "line": line}
+        lines = _lines(handle, state)
+
+        if import_format == "csv":
+            for row in csv.reader(lines):
+                if not any(field.strip() for field in row):
+                    continue
+                try:
+                    data = dict(zip(fieldnames, row, strict=True))
+                except ValueError:
+                    yield ImportRecord(
+                        state["line"], state["offset"], None, "malformed record"
+                    )
+                    continue
+                yield ImportRecord(state["line"], state["offset"], data)
+            return
+
+        for text in lines:
+            if not text.strip():
+                continue
+            try:
+                data = json.loads(text)
+            except ValueError:
+                yield ImportRecord(
+                    state["line"], state["offset"], None, "malformed record"
+                )
+                continue
+            if not isinstance(data, dict):
+                yield ImportRecord(
+                    state["line"], state["offset"], None, "malformed record"
+                )
+                continue
+            yield ImportRecord(state["line"], state["offset"], data)
+
+
+def _as_bool(value: Any, default: bool) -> bool:
+    if value is None:
+        return default
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in _TRUE:
+        return True
+    if text in _FALSE:
+        return False
+    raise ValueError(text)
+
+
+def _build_user(data: dict[str, Any]) -> tuple[User | None, str | None, str]:
+    """Return ``(user, password_to_hash, rejection_reason)`` for one record."""
+
+    email = User.objects.normalize_email(str(data.get("email") or "").strip())
+    try:
+        validate_email(email)
+    except ValidationError:
+        return None, None, "invalid email"
+
+    role = str(data.get("role") or User.Role.USER).strip()
+    if role not in User.Role.values:
+        return None, None, "invalid role"
+    try:
+        is_active = _as_bool(data.get("is_active"), True)
+    except ValueError:
+        return None, None, "invalid is_active"
+
+    user = User(
+        email=email,
+        first_name=str(data.get("first_name") or "").strip()[:150],
+        last_name=str(data.get("last_name") or "").strip()[:150],
+        role=role,
+        is_active=is_active,
+        is_staff=role == User.Role.ADMIN,
+        date_joined=timezone.now(),
+    )
+    password_hash = data.get("password_hash")
+    password = data.get("password")
+    if password_hash:
+        password_hash = str(password_hash)
+        if not password_hash.startswith(UNUSABLE_PASSWORD_PREFIX):
+            try:
+                identify_hasher(password_hash)
+            except ValueError:
+                return None, None, "unknown password hash format"
+        user.password = password_hash
+        return user, None, ""
+    if password:
+        return user, str(password), ""
+    user.password = make_password(None)
+    return user, None, ""
+
+
+def _insert_with_copy(users: list[User], alias: str) -> set[str]:
+    """Insert *users* through ``COPY``; return the emails that were inserted."""
+
+    connection = connections[alias]
+    quote = connection.ops.quote_name
+    table = quote(User._meta.db_table)
+    fields = [field for field in User._meta.concrete_fields if not field.primary_key]
+    columns = ", ".join(quote(field.column) for field in fields)
+    staging = quote(f"{User._meta.db_table}_import")
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"CREATE TEMPORARY TABLE {staging} AS SELECT {columns} FROM {table} WITH NO DATA"
+        )
+        with cursor.copy(f"COPY {staging} ({columns}) FROM STDIN") as copy:
+            for user in users:
+                copy.write_row(
+                    [
+                        field.get_db_prep_save(getattr(user, field.attname), connection)
+                        for field in fields
+                    ]
+                )
+        # Conflicts with accounts created since the pre-check are skipped, not fatal.
+        cursor.execute(
+            f"INSERT INTO {table} ({columns}) SELECT {columns} FROM {staging} "
+            f"ON CONFLICT ({quote('email')}) DO NOTHING RETURNING {quote('email')}"
+        )
+        inserted = {row[0] for row in cursor.fetchall()}
+        # Dropped here rather than ON COMMIT: the batch may run inside an outer
+        # transaction. A failed batch rolls the CREATE back with everything else.
+        cursor.execute(f"DROP TABLE {staging}")
+        return inserted
+
+
+def _insert_batch(users: list[User], alias: str) -> set[str]:
+    if not users:
+        return set()
+    if connections[alias].vendor == "postgresql":
+        return _insert_with_copy(users, alias)
+    User.objects.using(alias).bulk_create(users, batch_size=1000)
+    return {user.email for user in users}
+
+
+class UserImporter:
+    """Import users from one file in batches; see the module docstring."""
+
+    def __init__(
+        self,
+        path: Path,
+        *,
+        import_format: str,
+        reject_path: Path,
+        checkpoint_path: Path,
+        batch_size: int = 5_000,
+        workers: int = 0,
+        on_batch: Callable[[ImportBatch], None] | None = None,
+    ) -> None:
+        self.path = path
+        self.import_format = import_format
+        self.reject_path = reject_path
+        self.checkpoint_path = checkpoint_path
+        self.batch_size = max(batch_size, 1)
+        self.workers = workers
+        self.on_batch = on_batch
+        self.alias = router.db_for_write(User)
+        self._pending: frozenset[str] = frozenset()
+        self._pending_offset = 0
+
+    def run(self, *, resume: bool = False) -> ImportReport:
+        checkpoint = Checkpoint(str(self.path.resolve()), 0, 0, 0, 0)
+        if resume and self.checkpoint_path.exists():
+            checkpoint = Checkpoint.load(self.checkpoint_path)
+            if (
+                checkpoint.source != str(self.path.resolve())
+                or checkpoint.offset > self.path.stat().st_size
+            ):
+                msg = f"{self.checkpoint_path} belongs to a different input file"
+                raise ValueError(msg)
+            self._pending, self._pending_offset = (
+                frozenset(checkpoint.pending),
+                checkpoint.pending_offset,
+            )
+
+        if resume:
+            self._trim_rejects(checkpoint.line)
+
+        started = time.perf_counter()
+        batches = 0
+        executor = (
+            ProcessPoolExecutor(max_workers=self.workers, initializer=django.setup)
+            if self.workers > 0
+            else None
+        )
+        try:
+            with self.reject_path.open(
+                "a" if resume else "w", encoding="utf-8"
+            ) as rejects:
+                batch: list[ImportRecord] = []
+                records = read_records(
+                    self.path,
+                    self.import_format,
+                    offset=checkpoint.offset,
+                    line=checkpoint.line,
+                )
+                for record in records:
+                    batch.append(record)
+                    if len(batch) >= self.batch_size:
+                        checkpoint = self._process(batch, checkpoint, rejects, executor)
+                        batches += 1
+                        batch = []
+                if batch:
+                    checkpoint = self._process(batch, checkpoint, rejects, executor)
+                    batches += 1
+        finally:
+            if executor is not None:
+                executor.shutdown()
+
+        self.checkpoint_path.unlink(missing_ok=True)
+        return ImportReport(
+            checkpoint.imported,
+            checkpoint.rejected,
+            batches,
+            time.perf_counter() - started,
+        )
+
+    def _trim_rejects(self, line: int) -> None:
+        """Drop reject entries past checkpointed *line*, including a torn last write."""
+
+        if not self.reject_path.exists():
+            return
+        with self.reject_path.open("r+b") as handle:
+            offset = 0
+            for raw in iter(handle.readline, b""):
+                try:
+                    entry = json.loads(raw)
+                except ValueError:
+                    break
+                if not raw.endswith(b"\n") or entry["line"] > line:
+                    break
+                offset += len(raw)
+            handle.truncate(offset)
+            handle.flush()
+            os.fsync(handle.fileno())
+
+    def _process(
+        self,
+        batch: list[ImportRecord],
+        checkpoint: Checkpoint,
+        rejects: IO[str],
+        executor: ProcessPoolExecutor | None,
+    ) -> Checkpoint:
+        started = time.perf_counter()
+        rejected: list[tuple[ImportRecord, str]] = []
+        candidates: dict[str, tuple[ImportRecord, User, str | None]] = {}
+        for record in batch:
+            if record.data is None:
+                rejected.append((record, record.error))
+                continue
+            user, password, reason = _build_user(record.data)
+            if user is None:
+                rejected.append((record, reason))
+            elif user.email in candidates:
+                rejected.append((record, "duplicate email in file"))
+            else:
+                candidates[user.email] = (record, user, password)
+
+        # Checked before hashing so conflicting rows cost no hashing time.
+        existing = set(
+            User.objects.using(self.alias)
+            .filter(email__in=list(candidates))
+            .values_list("email", flat=True)
+        )
+        resumed = 0
+        for email in existing:
+            record, _user, _password = candidates.pop(email)
+            if email in self._pending and record.end_offset <= self._pending_offset:
+                # Committed by the interrupted run after its last checkpoint.
+                resumed += 1
+            else:
+                rejected.append((record, "email already exists"))
+
+        to_hash = [
+            (user, password)
+            for _record, user, password in candidates.values()
+            if password is not None
+        ]
+        if to_hash:
+            passwords = [password for _user, password in to_hash]
+            if executor is not None:
+                chunksize = max(len(passwords) // (self.workers * 4), 1)
+                hashes = list(
+                    executor.map(make_password, passwords, chunksize=chunksize)
+                )
+            else:
+                hashes = [make_password(password) for password in passwords]
+            for (user, _password), encoded in zip(to_hash, hashes, strict=True):
+                user.password = encoded
+
+        if candidates:
+            checkpoint._replace(
+                pending_offset=batch[-1].end_offset, pending=tuple(candidates)
+            ).save(self.checkpoint_path)
+        with transaction.atomic(using=self.alias):
+            inserted = _insert_batch(
+                [user for _record, user, _password in candidates.values()], self.alias
+            )
+        for email, (record, _user, _password) in candidates.items():
+            if email not in inserted:
+                rejected.append((record, "email already exists"))
+
+        for record, reason in sorted(rejected, key=lambda item: item[0].line):
+            data = {
+                key: value
+                for key, value in (record.data or {}).items()
+                if key not in SECRET_FIELDS
+            }
+            rejects.write(
+                json.dumps({"line": record.line, "reason": reason, "record": data})
+                + "\n"
+            )
+        rejects.flush()
+        os.fsync(rejects.fileno())
+
+        checkpoint = checkpoint._replace(
+            offset=batch[-1].end_offset,
+            line=batch[-1].line,
+            imported=checkpoint.imported + len(inserted) + resumed,
+            rejected=checkpoint.rejected + len(rejected),
+            pending_offset=0,
+            pending=(),
+        )
+        checkpoint.save(self.checkpoint_path)
+        if self.on_batch is not None:
+            self.on_batch(
+                ImportBatch(
+                    len(inserted) + resumed,
+                    len(rejected),
+                    batch[-1].line,
+                    time.perf_counter() - started,
+                )
+            )
+        return checkpoint
+
+
+def detect_format(path: Path) -> str:
+    return "jsonl" if path.suffix.lower() in {".jsonl", ".ndjson", ".json"} else "csv"
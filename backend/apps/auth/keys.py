@@ -0,0 +1,263 @@
+"""Asymmetric signing keys for access tokens and their published JWKS.
+
+When ``JWT_KEYS_DIR`` is set, access tokens are signed with an EdDSA (Ed25519)
+or ES256 (P-256) key from that directory and carry its ``kid`` in the header.
+Each ``<kid>.pem`` file holds a PKCS#8 private key; ``<kid>.pub.pem`` holds the
+public half of a retired key that is kept only to verify tokens it signed.
+The public keys are served at ``/api/auth/jwks`` so other services and the
+edge tier can verify tokens without the Django secret or a round trip.
+
+Rotation never invalidates live tokens:
+
+1. ``manage.py generate_jwt_key`` adds a new key. It is in the JWKS at once,
+   but only signs once its file is ``JWT_KEY_ACTIVATION_SECONDS`` old (the
+   JWKS ``max-age`` by default) and it is the newest such kid, so verifiers
+   holding a cached JWKS have fetched it before they see its tokens.
+   ``JWT_ACTIVE_KID`` overrides the choice.
+2. Older keys stay in the directory, and keep verifying, until every token
+   they signed has expired: ``ACCESS_TOKEN_LIFETIME_MINUTES`` plus the JWKS
+   ``max-age``. Only then remove them.
+
+Parsed keys are held per process and the directory is rescanned at most every
+``JWT_KEYS_RELOAD_SECONDS``, or sooner when a token names an unknown ``kid``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any
+
+import jwt
+from cryptography.hazmat.primitives import serialization
+from cryptography.hazmat.primitives.asymmetric import ec, ed448, ed25519
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+logger = logging.getLogger(__name__)
+
+SIGNING_ALGORITHMS: tuple[str, ...] = ("EdDSA", "ES256")
+
+PRIVATE_SUFFIX = ".pem"
+PUBLIC_SUFFIX = ".pub.pem"
+
+# Floor between rescans triggered by unknown ``kid`` headers, so tokens with
+# made-up kids cannot turn every request into a directory scan.
+_MIN_RESCAN_SECONDS = 1.0
+
+
+@dataclass(frozen=True)
+class SigningKey:
+    kid: str
+    algorithm: str
+    public_key: Any
+    private_key: Any | None = None
+
+    def jwk(self) -> dict[str, Any]:
+        algorithm = jwt.get_algorithm_by_name(self.algorithm)
+        data = algorithm.to_jwk(self.public_key, as_dict=True)
+        return {**data, "kid": self.kid, "alg": self.algorithm, "use": "sig"}
+
+
+@dataclass
+class KeyRing:
+    keys: dict[str, SigningKey]
+    active_kid: str | None
+    # When a published key newer than the active one may start signing.
+    activates_at: float | None = None
+    jwks_body: bytes = field(init=False)
+    jwks_etag: str = field(init=False)
+
+    def __post_init__(self) -> None:
+        # Rendered once per load; the endpoint only ever serves these bytes.
+        document = {"keys": [self.keys[kid].jwk() for kid in sorted(self.keys)]}
+        self.jwks_body = json.dumps(
+            document, separators=(",", ":"), sort_keys=True
+        ).encode()
+        self.jwks_etag = f'"{hashlib.sha256(self.jwks_body).hexdigest()[:32]}"'
+
+    def signing_key(self) -> SigningKey:
+        key = self.keys.get(self.active_kid or "")
+        if key is None or key.private_key is None:
+            msg = f"No private JWT signing key {self.active_kid!r} in {settings.JWT_KEYS_DIR}"
+            raise ImproperlyConfigured(msg)
+        return key
+
+
+def _algorithm_for(public_key: Any, path: Path) -> str:
+    if isinstance(public_key, (ed25519.Ed25519PublicKey, ed448.Ed448PublicKey)):
+        return "EdDSA"
+    if isinstance(public_key, ec.EllipticCurvePublicKey) and isinstance(
+        public_key.curve, ec.SECP256R1
+    ):
+        return "ES256"
+    msg = f"{path} is not an Ed25519, Ed448 or P-256 key"
+    raise ImproperlyConfigured(msg)
+
+
+def _load_key(path: Path) -> SigningKey:
+    data = path.read_bytes()
+    try:
+        if path.name.endswith(PUBLIC_SUFFIX):
+            kid = path.name[: -len(PUBLIC_SUFFIX)]
+            private_key = None
+            public_key = serialization.load_pem_public_key(data)
+        else:
+            kid = path.name[: -len(PRIVATE_SUFFIX)]
+            private_key = serialization.load_pem_private_key(data, password=None)
+            public_key = private_key.public_key()
+    except (ValueError, TypeError) as exc:
+        msg = f"Cannot load JWT key {path}: {exc}"
+        raise ImproperlyConfigured(msg) from exc
+    return SigningKey(kid, _algorithm_for(public_key, path), public_key, private_key)
+
+
+def _scan(directory: Path) -> dict[str, float]:
+    """Key files in *directory* and their modification times."""
+
+    if not directory.is_dir():
+        # Nothing to sign with yet; ``generate_jwt_key`` creates it.
+        return {}
+    return {
+        entry.name: entry.stat().st_mtime
+        for entry in directory.iterdir()
+        if entry.is_file() and entry.name.endswith(PRIVATE_SUFFIX)
+    }
+
+
+def load_key_ring(
+    directory: Path, active_kid: str = "", *, activation_delay: float = 0.0
+) -> KeyRing:
+    keys: dict[str, SigningKey] = {}
+    published_at: dict[str, float] = {}
+    paths = sorted(directory.iterdir()) if directory.is_dir() else []
+    # Private keys first so a stray ``.pub.pem`` never shadows a signing key.
+    for path in sorted(paths, key=lambda path: path.name.endswith(PUBLIC_SUFFIX)):
+        if not path.is_file() or not path.name.endswith(PRIVATE_SUFFIX):
+            continue
+        key = _load_key(path)
+        if keys.setdefault(key.kid, key) is key and key.private_key is not None:
+            published_at[key.kid] = path.stat().st_mtime
+    activates_at = None
+    if not active_kid and published_at:
+        # Kids are expected to sort by age, e.g. the creation date. Until any
+        # key has been published long enough, the oldest one keeps signing.
+        now = time.time()
+        ready = [
+            kid
+            for kid, published in published_at.items()
+            if published + activation_delay <= now
+        ]
+        active_kid = max(ready) if ready else min(published_at)
+        pending = [
+            published + activation_delay
+            for kid, published in published_at.items()
+            if kid > active_kid
+        ]
+        activates_at = min(pending, default=None)
+    return KeyRing(keys, active_kid or None, activates_at)
+
+
+class _KeyRingHolder:
+    def __init__(self) -> None:
+        self._lock = threading.Lock()
+        self._ring: KeyRing | None = None
+        self._snapshot: dict[str, float] | None = None
+        self._checked_at = 0.0
+
+    def reset(self) -> None:
+        with self._lock:
+            self._ring = None
+            self._snapshot = None
+            self._checked_at = 0.0
+
+    def _fresh(self, interval: float) -> bool:
+        ring = self._ring
+        if ring is None or time.monotonic() - self._checked_at >= interval:
+            return False
+        return ring.activates_at is None or time.time() < ring.activates_at
+
+    def get(self, *, rescan: bool = False) -> KeyRing:
+        interval = _MIN_RESCAN_SECONDS if rescan else settings.JWT_KEYS_RELOAD_SECONDS
+        if self._fresh(interval):
+            return self._ring
+        with self._lock:
+            if self._fresh(interval):
+                return self._ring
+            directory = Path(settings.JWT_KEYS_DIR)
+            snapshot = _scan(directory)
+            activates_at = self._ring.activates_at if self._ring is not None else None
+            activating = activates_at is not None and time.time() >= activates_at
+            if self._ring is None or snapshot != self._snapshot or activating:
+                self._ring = load_key_ring(
+                    directory,
+                    settings.JWT_ACTIVE_KID,
+                    activation_delay=settings.JWT_KEY_ACTIVATION_SECONDS,
+                )
+                self._snapshot = snapshot
+                logger.info(
+                    "Loaded JWT keys %s; signing with %s",
+                    sorted(self._ring.keys),
+                    self._ring.active_kid,
+                )
+            self._checked_at = time.monotonic()
+            return self._ring
+
+
+_holder = _KeyRingHolder()
+
+
+def asymmetric_signing_enabled() -> bool:
+    return bool(settings.JWT_KEYS_DIR)
+
+
+def get_key_ring() -> KeyRing:
+    return _holder.get()
+
+
+def reset_key_ring() -> None:
+    _holder.reset()
+
+
+def signing_key() -> SigningKey:
+    return get_key_ring().signing_key()
+
+
+def verification_key(token: str) -> SigningKey:
+    """Return the published key named by *token*'s ``kid`` header.
+
+    Raises ``jwt.InvalidTokenError`` when the header names no known key.
+    """
+
+    kid = jwt.get_unverified_header(token).get("kid")
+    if not isinstance(kid, str) or not kid:
+        msg = "Token has no key id"
+        raise jwt.InvalidTokenError(msg)
+    key = get_key_ring().keys.get(kid)
+    if key is None:
+        # Another worker may already sign with a key this one has not loaded.
+        key = _holder.get(rescan=True).keys.get(kid)
+    if key is None:
+        msg = f"Unknown signing key {kid!r}"
+        raise jwt.InvalidTokenError(msg)
+    return key
+
+
+def generate_private_key(algorithm: str) -> bytes:
+    if algorithm == "EdDSA":
+        private_key: Any = ed25519.Ed25519PrivateKey.generate()
+    elif algorithm == "ES256":
+        private_key = ec.generate_private_key(ec.SECP256R1())
+    else:
+        msg = f"Unsupported signing algorithm {algorithm!r}"
+        raise ValueError(msg)
+    return private_key.private_bytes(
+        encoding=serialization.Encoding.PEM,
+        format=serialization.PrivateFormat.PKCS8,
+        encryption_algorithm=serialization.NoEncryption(),
+    )
@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import importlib.util
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from apps.auth.partitions import (
+    ARCHIVE_FORMATS,
+    add_months,
+    archive_partitions,
+    archive_rows,
+    ensure_partitions,
+    is_partitioned,
+    month_start,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Create upcoming AuthAuditLog partitions and archive then drop the ones past retention. "
+        "Run at least monthly."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--months",
+            type=int,
+            default=settings.AUTH_AUDIT_RETENTION_MONTHS,
+            help="Whole months to keep before the current one.",
+        )
+        parser.add_argument(
+            "--months-ahead", type=int, default=settings.AUTH_AUDIT_PARTITIONS_AHEAD
+        )
+        parser.add_argument(
+            "--archive-dir", type=Path, default=settings.AUTH_AUDIT_ARCHIVE_DIR
+        )
+        parser.add_argument("--format", choices=ARCHIVE_FORMATS, default="jsonl")
+        parser.add_argument("--batch-size", type=int, default=5_000)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        if (
+            options["format"] == "parquet"
+            and importlib.util.find_spec("pyarrow") is None
+        ):
+            raise CommandError(
+                "Parquet archives require pyarrow; install it or use --format jsonl."
+            )
+        if options["months"] < 0:
+            raise CommandError("--months must not be negative.")
+
+        now = timezone.now()
+        before = add_months(month_start(now), -options["months"])
+        archive_options = {
+            "before": before,
+            "directory": options["archive_dir"],
+            "archive_format": options["format"],
+            "batch_size": options["batch_size"],
+        }
+
+        if is_partitioned():
+            for name in ensure_partitions(
+                start=now, months_ahead=options["months_ahead"]
+            ):
+                self.stdout.write(f"Created partition {name}")
+            results = archive_partitions(**archive_options)
+        else:
+            results = archive_rows(**archive_options)
+
+        for result in results:
+            self.stdout.write(
+                f"Archived {result.rows} rows from {result.name} to {result.path}"
+            )
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Audit events before {before:%Y-%m-%d} archived ({len(results)} archives)."
+            )
+        )
@@ -0,0 +1,54 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.utils import timezone
+
+from apps.auth.keys import (
+    PRIVATE_SUFFIX,
+    PUBLIC_SUFFIX,
+    SIGNING_ALGORITHMS,
+    generate_private_key,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Add a new access token signing key to JWT_KEYS_DIR. It is published in the JWKS at once and signs new "
+        "tokens after JWT_KEY_ACTIVATION_SECONDS (or once JWT_ACTIVE_KID names it); keep older keys until the "
+        "tokens they signed have expired."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--algorithm", choices=SIGNING_ALGORITHMS, default="EdDSA")
+        parser.add_argument(
+            "--kid",
+            help="Key id; defaults to the current UTC time, which sorts newest last.",
+        )
+        parser.add_argument(
+            "--keys-dir", type=Path, default=settings.JWT_KEYS_DIR or None
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        directory: Path | None = options["keys_dir"]
+        if directory is None:
+            raise CommandError("Set JWT_KEYS_DIR or pass --keys-dir.")
+        kid = options["kid"] or timezone.now().strftime("%Y%m%dT%H%M%SZ")
+        if not kid.replace("-", "").replace("_", "").isalnum():
+            raise CommandError("--kid may only contain letters, digits, '-' and '_'.")
+        path = directory / f"{kid}{PRIVATE_SUFFIX}"
+        if path.exists() or (directory / f"{kid}{PUBLIC_SUFFIX}").exists():
+            raise CommandError(f"A key with id {kid!r} already exists in {directory}.")
+
+        directory.mkdir(parents=True, exist_ok=True)
+        # Created owner-only from the start rather than chmod-ed afterwards.
+        descriptor = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_EXCL, 0o600)
+        with os.fdopen(descriptor, "wb") as handle:
+            handle.write(generate_private_key(options["algorithm"]))
+        self.stdout.write(
+            self.style.SUCCESS(f"Wrote {options['algorithm']} key {kid} to {path}.")
+        )
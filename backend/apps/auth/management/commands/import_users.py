@@ -0,0 +1,81 @@
+from __future__ import annotations
+
+import os
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+
+from apps.auth.imports import IMPORT_FORMATS, ImportBatch, UserImporter, detect_format
+
+
+class Command(BaseCommand):
+    help = (
+        "Import users from a CSV or JSONL file with email, first_name, last_name, role, is_active and either "
+        "password or password_hash (an encoded Django password). Interrupted runs continue with --resume."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("path", type=Path)
+        parser.add_argument(
+            "--format", choices=IMPORT_FORMATS, help="Defaults to the file extension."
+        )
+        parser.add_argument("--batch-size", type=int, default=5_000)
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes hashing plain-text passwords; 0 hashes in this process.",
+        )
+        parser.add_argument(
+            "--rejects", type=Path, help="Defaults to <path>.rejects.jsonl."
+        )
+        parser.add_argument(
+            "--checkpoint", type=Path, help="Defaults to <path>.checkpoint.json."
+        )
+        parser.add_argument(
+            "--resume", action="store_true", help="Continue from the checkpoint file."
+        )
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        path: Path = options["path"]
+        if not path.is_file():
+            raise CommandError(f"{path} does not exist.")
+        checkpoint = options["checkpoint"] or path.with_name(
+            f"{path.name}.checkpoint.json"
+        )
+        if checkpoint.exists() and not options["resume"]:
+            raise CommandError(
+                f"{checkpoint} exists from an interrupted run; pass --resume or delete it."
+            )
+
+        def report_batch(batch: ImportBatch) -> None:
+            rate = (
+                (batch.imported + batch.rejected) / batch.seconds
+                if batch.seconds
+                else 0.0
+            )
+            self.stdout.write(
+                f"Line {batch.line}: imported {batch.imported}, rejected {batch.rejected} ({rate:.0f} rows/s)"
+            )
+
+        importer = UserImporter(
+            path,
+            import_format=options["format"] or detect_format(path),
+            reject_path=options["rejects"]
+            or path.with_name(f"{path.name}.rejects.jsonl"),
+            checkpoint_path=checkpoint,
+            batch_size=options["batch_size"],
+            workers=options["workers"],
+            on_batch=report_batch,
+        )
+        try:
+            report = importer.run(resume=options["resume"])
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Imported {report.imported} users, rejected {report.rejected} "
+                f"({report.batches} batches, {report.seconds:.1f} s). Rejects: {importer.reject_path}"
+            )
+        )
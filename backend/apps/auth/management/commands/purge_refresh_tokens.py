@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from datetime import timedelta
+from typing import Any
+
+from django.conf import settings
+from django.core.management.base import CommandParser
+
+from apps.auth.maintenance import (
+    PurgeChunk,
+    PurgeCommand,
+    PurgeReport,
+    purge_refresh_tokens,
+)
+
+
+class Command(PurgeCommand):
+    help = "Delete expired or revoked refresh tokens past the grace period in throttled chunks."
+    noun = "refresh tokens"
+    batch_size_setting = "AUTH_REFRESH_PURGE_BATCH_SIZE"
+    pause_ms_setting = "AUTH_REFRESH_PURGE_PAUSE_MS"
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--grace-hours",
+            type=int,
+            default=settings.AUTH_REFRESH_PURGE_GRACE_HOURS,
+            help="Keep tokens that expired or were issued within this many hours.",
+        )
+        super().add_arguments(parser)
+
+    def purge(
+        self, options: dict[str, Any], on_chunk: Callable[[PurgeChunk], None]
+    ) -> PurgeReport:
+        return purge_refresh_tokens(
+            grace=timedelta(hours=options["grace_hours"]),
+            batch_size=options["batch_size"],
+            pause=options["pause_ms"] / 1000,
+            on_chunk=on_chunk,
+        )
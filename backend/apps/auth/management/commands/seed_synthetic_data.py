@@ -0,0 +1,95 @@
+from __future__ import annotations
+
+from datetime import UTC, datetime
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.auth.seed import (
+    DEFAULT_ANCHOR,
+    DEFAULT_SYNTHETIC_PASSWORD,
+    SyntheticConfig,
+    generate_synthetic_data,
+)
+
+
+def _anchor(value: str) -> datetime:
+    moment = datetime.fromisoformat(value)
+    return moment if moment.tzinfo else moment.replace(tzinfo=UTC)
+
+
+class Command(BaseCommand):
+    help = (
+        "Fill an empty database with a deterministic synthetic dataset for benchmarks: users, refresh-token "
+        "histories, audit events, wallets and their ledgers. The same seed, volumes and anchor always produce "
+        "the same rows."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument("--users", type=int, default=1_000)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument(
+            "--refresh-tokens-per-user",
+            type=float,
+            default=3.0,
+            help="Average history length.",
+        )
+        parser.add_argument(
+            "--audit-events-per-user",
+            type=float,
+            default=20.0,
+            help="Average, after registration.",
+        )
+        parser.add_argument(
+            "--transfers-per-user",
+            type=float,
+            default=10.0,
+            help="Wallet postings, on average.",
+        )
+        parser.add_argument(
+            "--months", type=int, default=12, help="How far back the history reaches."
+        )
+        parser.add_argument(
+            "--anchor",
+            type=_anchor,
+            default=DEFAULT_ANCHOR,
+            help=f"ISO timestamp the history ends at (default {DEFAULT_ANCHOR.isoformat()}).",
+        )
+        parser.add_argument("--batch-size", type=int, default=10_000)
+        parser.add_argument(
+            "--password",
+            default=DEFAULT_SYNTHETIC_PASSWORD,
+            help="Shared by every synthetic user.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        verbosity = options["verbosity"]
+        config = SyntheticConfig(
+            users=options["users"],
+            seed=options["seed"],
+            refresh_tokens_per_user=options["refresh_tokens_per_user"],
+            audit_events_per_user=options["audit_events_per_user"],
+            transfers_per_user=options["transfers_per_user"],
+            months=options["months"],
+            anchor=options["anchor"],
+            batch_size=options["batch_size"],
+            password=options["password"],
+            database=options["database"],
+        )
+
+        def report_batch(label: str, written: int, seconds: float) -> None:
+            if verbosity > 1:
+                self.stdout.write(
+                    f"{label}: {written} rows ({seconds * 1000:.0f} ms for the last batch)"
+                )
+
+        try:
+            report = generate_synthetic_data(config, on_batch=report_batch)
+        except ValueError as exc:
+            raise CommandError(str(exc)) from exc
+        rows = ", ".join(f"{count} {name}" for name, count in report.rows.items())
+        self.stdout.write(
+            self.style.SUCCESS(f"Generated {rows} in {report.seconds:.1f} s.")
+        )
@@ -0,0 +1,17 @@
+# Generated by Django 5.0.6 on 2026-10-18 03:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets_auth", "0002_alter_authauditlog_action"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="auth_epoch",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
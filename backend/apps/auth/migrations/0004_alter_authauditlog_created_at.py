@@ -0,0 +1,20 @@
+# Generated by Django 5.0.6 on 2026-10-18 03:35
+
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets_auth", "0003_user_auth_epoch"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="authauditlog",
+            name="created_at",
+            field=models.DateTimeField(
+                default=django.utils.timezone.now, editable=False
+            ),
+        ),
+    ]
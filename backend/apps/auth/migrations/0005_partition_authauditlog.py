@@ -0,0 +1,127 @@
+"""Partition ``AuthAuditLog`` by month on PostgreSQL.
+
+The existing table is renamed to ``<table>_legacy`` and attached, without
+copying rows, as the partition for everything before next month. A BRIN index
+on ``created_at`` covers range scans; partitions for the coming months and a
+default partition are created up front and then maintained by the
+``audit_log_retention`` command. Other databases keep a single table.
+
+The ``(created_at, id)`` index added afterwards is built on the legacy rows
+while the table is locked; on a large table, build a matching index with
+``CREATE INDEX CONCURRENTLY`` first and it is attached instead.
+"""
+
+from datetime import UTC, datetime
+
+from django.db import migrations, models
+from django.db.migrations.exceptions import IrreversibleError
+
+MONTHS_AHEAD = 3
+
+
+def _add_months(moment, months):
+    index = moment.year * 12 + moment.month - 1 + months
+    return moment.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_audit_log(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    model = apps.get_model("assets_auth", "AuthAuditLog")
+    qn = schema_editor.quote_name
+    table = model._meta.db_table
+    legacy = f"{table}_legacy"
+    sequence = f"{table}_id_seq"
+    execute = schema_editor.execute
+
+    execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(legacy)}")
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT conname FROM pg_constraint WHERE conrelid = %s::regclass AND contype = 'p'",
+            [legacy],
+        )
+        primary_keys = [row[0] for row in cursor.fetchall()]
+        cursor.execute(
+            "SELECT indexname FROM pg_indexes WHERE tablename = %s", [legacy]
+        )
+        legacy_indexes = [
+            row[0] for row in cursor.fetchall() if row[0] not in primary_keys
+        ]
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) + 1 FROM {qn(legacy)}")
+        next_id = cursor.fetchone()[0]
+    # Index names are schema-wide; free them for the partitioned parent.
+    for name in legacy_indexes:
+        execute(f"ALTER INDEX {qn(name)} RENAME TO {qn(f'{name[:55]}_legacy')}")
+
+    # Replaced by the parent's (id, created_at) key when the table is attached.
+    for name in primary_keys:
+        execute(f"ALTER TABLE {qn(legacy)} DROP CONSTRAINT {qn(name)}")
+
+    # Identity columns are not supported on partitioned tables before
+    # PostgreSQL 17, so ids come from a plain sequence owned by the parent.
+    execute(f"ALTER TABLE {qn(legacy)} ALTER COLUMN id DROP IDENTITY IF EXISTS")
+    execute(
+        f"CREATE TABLE {qn(table)} (LIKE {qn(legacy)} INCLUDING DEFAULTS INCLUDING STORAGE) "
+        "PARTITION BY RANGE (created_at)"
+    )
+    execute(
+        f"CREATE SEQUENCE {qn(sequence)} START WITH {int(next_id)} OWNED BY {qn(table)}.id"
+    )
+    execute(
+        f"ALTER TABLE {qn(table)} ALTER COLUMN id SET DEFAULT nextval('{sequence}')"
+    )
+    # Unique constraints on a partitioned table must include the partition key.
+    execute(
+        f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_pkey')} PRIMARY KEY (id, created_at)"
+    )
+    user_table = model._meta.get_field("user").related_model._meta.db_table
+    execute(
+        f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(f'{table}_user_id_fk')} "
+        f"FOREIGN KEY (user_id) REFERENCES {qn(user_table)} (id) DEFERRABLE INITIALLY DEFERRED"
+    )
+    execute(f"CREATE INDEX {qn(f'{table}_user_id_idx')} ON {qn(table)} (user_id)")
+    execute(
+        f"CREATE INDEX {qn(f'{table}_created_brin')} ON {qn(table)} USING brin (created_at)"
+    )
+
+    next_month = _add_months(
+        datetime.now(UTC).replace(day=1, hour=0, minute=0, second=0, microsecond=0), 1
+    )
+    execute(
+        f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(legacy)} FOR VALUES FROM (MINVALUE) TO (%s)",
+        [next_month],
+    )
+    month = next_month
+    for _ in range(MONTHS_AHEAD):
+        upper = _add_months(month, 1)
+        execute(
+            f"CREATE TABLE {qn(f'{table}_p{month:%Y%m}')} PARTITION OF {qn(table)} FOR VALUES FROM (%s) TO (%s)",
+            [month, upper],
+        )
+        month = upper
+    execute(f"CREATE TABLE {qn(f'{table}_default')} PARTITION OF {qn(table)} DEFAULT")
+
+
+def unpartition_audit_log(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    raise IrreversibleError(
+        "Partitioned AuthAuditLog storage cannot be converted back automatically."
+    )
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets_auth", "0004_alter_authauditlog_created_at"),
+    ]
+
+    operations = [
+        migrations.RunPython(partition_audit_log, unpartition_audit_log),
+        migrations.AddIndex(
+            model_name="authauditlog",
+            index=models.Index(
+                fields=["created_at", "id"], name="auth_audit_created_id_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.0.6 on 2026-10-18 03:58
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets_auth", "0005_partition_authauditlog"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="authauditlog",
+            index=models.Index(
+                fields=["user", "created_at", "id"], name="auth_audit_user_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="authauditlog",
+            index=models.Index(
+                fields=["email", "created_at", "id"],
+                name="auth_audit_email_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="authauditlog",
+            index=models.Index(
+                fields=["action", "successful", "created_at", "id"],
+                name="auth_audit_action_created_idx",
+            ),
+        ),
+        migrations.AlterField(
+            model_name="authauditlog",
+            name="user",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+    ]
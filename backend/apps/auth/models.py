@@ -6,6 +6,7 @@ import secrets
 from datetime import timedelta
 from typing import Any
 
+from asgiref.sync import sync_to_async
 from django.conf import settings
 from django.contrib.auth.base_user import AbstractBaseUser, BaseUserManager
 from django.contrib.auth.models import PermissionsMixin
@@ -14,6 +15,7 @@ from django.db import models
 from django.db.utils import OperationalError, ProgrammingError
 from django.utils import timezone
 
+from .audit import get_audit_writer
 
 logger = logging.getLogger(__name__)
 
@@ -23,23 +25,43 @@ class UserManager(BaseUserManager):
 
     use_in_migrations = True
 
-    def _create_user(self, email: str, password: str | None, **extra_fields: Any) -> "User":
+    def _create_user(
+        self,
+        email: str,
+        password: str | None,
+        password_hash: str | None = None,
+        **extra_fields: Any,
+    ) -> User:
         if not email:
             msg = "The email address must be set"
             raise ValueError(msg)
         email = self.normalize_email(email)
         user = self.model(email=email, **extra_fields)
-        user.set_password(password)
+        if password_hash is not None:
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save(using=self._db)
         return user
 
-    def create_user(self, email: str, password: str | None = None, **extra_fields: Any) -> "User":
+    def create_user(
+        self,
+        email: str,
+        password: str | None = None,
+        *,
+        password_hash: str | None = None,
+        **extra_fields: Any,
+    ) -> User:
+        """Create a regular user; pass *password_hash* to store an already encoded password."""
+
         extra_fields.setdefault("is_staff", False)
         extra_fields.setdefault("is_superuser", False)
         extra_fields.setdefault("role", User.Role.USER)
-        return self._create_user(email, password, **extra_fields)
+        return self._create_user(email, password, password_hash, **extra_fields)
 
-    def create_superuser(self, email: str, password: str | None, **extra_fields: Any) -> "User":
+    def create_superuser(
+        self, email: str, password: str | None, **extra_fields: Any
+    ) -> User:
         extra_fields.setdefault("is_staff", True)
         extra_fields.setdefault("is_superuser", True)
         extra_fields.setdefault("role", User.Role.ADMIN)
@@ -68,6 +90,7 @@ class User(AbstractBaseUser, PermissionsMixin):
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=True)
     date_joined = models.DateTimeField(default=timezone.now)
+    auth_epoch = models.PositiveIntegerField(default=0)
 
     objects = UserManager()
 
@@ -86,14 +109,28 @@ class User(AbstractBaseUser, PermissionsMixin):
     def full_name(self) -> str:
         return self.get_full_name()
 
-    def email_user(self, subject: str, message: str, from_email: str | None = None, **kwargs: Any) -> None:
+    def revoke_sessions(self) -> None:
+        """Invalidate every access and refresh token issued to this user so far."""
+
+        self.auth_epoch = models.F("auth_epoch") + 1
+        self.save(update_fields=["auth_epoch"])
+        self.refresh_from_db(fields=["auth_epoch"])
+        self.refresh_tokens.filter(revoked=False).update(revoked=True)
+
+    def email_user(
+        self, subject: str, message: str, from_email: str | None = None, **kwargs: Any
+    ) -> None:
         send_mail(subject, message, from_email, [self.email], **kwargs)
 
 
 class RefreshToken(models.Model):
     """Persistent refresh tokens that can be revoked individually."""
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name="refresh_tokens")
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="refresh_tokens",
+    )
     token_hash = models.CharField(max_length=128, unique=True)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
@@ -122,7 +159,7 @@ class RefreshToken(models.Model):
         lifetime: timedelta,
         user_agent: str = "",
         ip_address: str = "",
-    ) -> tuple["RefreshToken", str]:
+    ) -> tuple[RefreshToken, str]:
         raw_token, token_hash = cls.build_token()
         expires_at = timezone.now() + lifetime
         token = cls.objects.create(
@@ -134,6 +171,26 @@ class RefreshToken(models.Model):
         )
         return token, raw_token
 
+    @classmethod
+    async def acreate_for_user(
+        cls,
+        user: User,
+        *,
+        lifetime: timedelta,
+        user_agent: str = "",
+        ip_address: str = "",
+    ) -> tuple[RefreshToken, str]:
+        raw_token, token_hash = cls.build_token()
+        expires_at = timezone.now() + lifetime
+        token = await cls.objects.acreate(
+            user=user,
+            token_hash=token_hash,
+            expires_at=expires_at,
+            user_agent=user_agent[:500],
+            ip_address=ip_address[:64],
+        )
+        return token, raw_token
+
     def mark_used(self) -> None:
         self.last_used_at = timezone.now()
         self.save(update_fields=["last_used_at"])
@@ -155,17 +212,43 @@ class AuthAuditLog(models.Model):
         ACCESS_DENIED = "access_denied", "Access Denied"
         TOKEN_REVOKED = "token_revoked", "Token Revoked"
 
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, null=True, blank=True, on_delete=models.SET_NULL)
+    # Indexed by the composite ``auth_audit_user_created_idx`` below.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.SET_NULL,
+        db_index=False,
+    )
     email = models.EmailField(blank=True)
     action = models.CharField(max_length=32, choices=Action.choices)
     successful = models.BooleanField(default=False)
     ip_address = models.CharField(max_length=64, blank=True)
     user_agent = models.TextField(blank=True)
     metadata = models.JSONField(default=dict, blank=True)
-    created_at = models.DateTimeField(auto_now_add=True)
+    # Stamped when the event happens rather than when a buffered batch is flushed.
+    created_at = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         ordering = ["-created_at"]
+        # On PostgreSQL the table is range-partitioned by month on
+        # ``created_at`` (migration 0005); see ``apps.auth.partitions``.
+        # Every index ends in (created_at, id) so filtered, newest-first keyset
+        # pages are a single index range scan.
+        indexes = [
+            models.Index(fields=["created_at", "id"], name="auth_audit_created_id_idx"),
+            models.Index(
+                fields=["user", "created_at", "id"], name="auth_audit_user_created_idx"
+            ),
+            models.Index(
+                fields=["email", "created_at", "id"],
+                name="auth_audit_email_created_idx",
+            ),
+            models.Index(
+                fields=["action", "successful", "created_at", "id"],
+                name="auth_audit_action_created_idx",
+            ),
+        ]
 
     @classmethod
     def log(
@@ -173,24 +256,40 @@ class AuthAuditLog(models.Model):
         *,
         user: User | None,
         email: str,
-        action: "AuthAuditLog.Action",
+        action: AuthAuditLog.Action,
         successful: bool,
         ip_address: str = "",
         user_agent: str = "",
         metadata: dict[str, Any] | None = None,
-    ) -> "AuthAuditLog | None":
+    ) -> AuthAuditLog | None:
+        fields: dict[str, Any] = {
+            "user": user,
+            "email": email,
+            "action": action,
+            "successful": successful,
+            "ip_address": ip_address[:64],
+            "user_agent": user_agent[:500],
+            "metadata": metadata or {},
+        }
+        if settings.AUTH_AUDIT_BUFFERED:
+            # The entry is written later by the background writer and may be
+            # dropped under backpressure; see ``AuditWriter``.
+            entry = cls(**fields)
+            get_audit_writer().submit(entry)
+            return entry
         try:
-            return cls.objects.create(
-                user=user,
-                email=email,
-                action=action,
-                successful=successful,
-                ip_address=ip_address[:64],
-                user_agent=user_agent[:500],
-                metadata=metadata or {},
-            )
+            return cls.objects.create(**fields)
         except (ProgrammingError, OperationalError):
             logger.warning(
                 "Skipping authentication audit log write because the database table is missing."
             )
             return None
+
+    @classmethod
+    async def alog(cls, **kwargs: Any) -> AuthAuditLog | None:
+        """Async counterpart of :meth:`log`."""
+
+        if settings.AUTH_AUDIT_BUFFERED:
+            # Buffered logging only enqueues, so it is safe on the event loop.
+            return cls.log(**kwargs)
+        return await sync_to_async(cls.log)(**kwargs)
@@ -0,0 +1,387 @@
+"""Monthly range partitions for ``AuthAuditLog`` and their retention.
+
+On PostgreSQL the audit table is partitioned by ``created_at`` (see migration
+``0005``): one partition per calendar month, a ``_default`` partition that
+catches anything outside the prepared range, and ``_legacy`` holding the rows
+that existed before partitioning. Expired partitions are streamed to a
+compressed archive, then detached and dropped. Other databases keep a single
+table and fall back to archiving and deleting old rows in chunks.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import re
+from collections.abc import Iterator
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import connections, router, transaction
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import Q
+
+from .models import AuthAuditLog
+
+ARCHIVE_FORMATS = ("jsonl", "parquet")
+_BOUND_RE = re.compile(r"FROM \((?P<lower>[^)]*)\) TO \((?P<upper>[^)]*)\)")
+
+
+@dataclass(frozen=True)
+class Partition:
+    name: str
+    lower: datetime | None
+    upper: datetime | None
+    is_default: bool = False
+
+
+def month_start(moment: datetime) -> datetime:
+    return moment.astimezone(UTC).replace(
+        day=1, hour=0, minute=0, second=0, microsecond=0
+    )
+
+
+def add_months(moment: datetime, months: int) -> datetime:
+    index = moment.year * 12 + moment.month - 1 + months
+    return moment.replace(year=index // 12, month=index % 12 + 1)
+
+
+def partition_name(table: str, month: datetime) -> str:
+    return f"{table}_p{month:%Y%m}"
+
+
+def _connection() -> BaseDatabaseWrapper:
+    return connections[router.db_for_write(AuthAuditLog)]
+
+
+def is_partitioned(connection: BaseDatabaseWrapper | None = None) -> bool:
+    connection = connection or _connection()
+    if connection.vendor != "postgresql":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT 1 FROM pg_partitioned_table pt JOIN pg_class c ON c.oid = pt.partrelid "
+            "WHERE c.relname = %s AND pg_table_is_visible(c.oid)",
+            [AuthAuditLog._meta.db_table],
+        )
+        return cursor.fetchone() is not None
+
+
+def _parse_bound(value: str) -> datetime | None:
+    value = value.strip()
+    if value.upper() == "MINVALUE" or value.upper() == "MAXVALUE":
+        return None
+    return datetime.fromisoformat(value.strip("'"))
+
+
+def list_partitions(connection: BaseDatabaseWrapper | None = None) -> list[Partition]:
+    """Return the attached partitions ordered by lower bound."""
+
+    connection = connection or _connection()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) "
+            "FROM pg_inherits i "
+            "JOIN pg_class parent ON parent.oid = i.inhparent "
+            "JOIN pg_class child ON child.oid = i.inhrelid "
+            "WHERE parent.relname = %s AND pg_table_is_visible(parent.oid)",
+            [AuthAuditLog._meta.db_table],
+        )
+        rows = cursor.fetchall()
+
+    partitions = []
+    for name, bound in rows:
+        if bound == "DEFAULT":
+            partitions.append(Partition(name, None, None, is_default=True))
+            continue
+        match = _BOUND_RE.search(bound)
+        if match is None:
+            continue
+        partitions.append(
+            Partition(name, _parse_bound(match["lower"]), _parse_bound(match["upper"]))
+        )
+    floor = datetime.min.replace(tzinfo=UTC)
+    return sorted(partitions, key=lambda p: (p.is_default, p.lower or floor))
+
+
+def ensure_partitions(
+    *, start: datetime, months_ahead: int, connection: BaseDatabaseWrapper | None = None
+) -> list[str]:
+    """Create the monthly partitions from *start* through *months_ahead* months later.
+
+    Months already covered by an existing partition are skipped. Rows for a
+    new month that already landed in the default partition are moved into it
+    in the same transaction. Returns the names of the partitions created.
+    """
+
+    connection = connection or _connection()
+    table = AuthAuditLog._meta.db_table
+    partitions = list_partitions(connection)
+    existing = [p for p in partitions if not p.is_default]
+    default = next((p.name for p in partitions if p.is_default), None)
+    created = []
+    month = month_start(start)
+    for _ in range(months_ahead + 1):
+        upper = add_months(month, 1)
+        overlaps = any(
+            (p.lower is None or p.lower < upper)
+            and (p.upper is None or p.upper > month)
+            for p in existing
+        )
+        if not overlaps:
+            name = partition_name(table, month)
+            _create_partition(connection, table, name, month, upper, default)
+            created.append(name)
+        month = upper
+    return created
+
+
+def _create_partition(
+    connection: BaseDatabaseWrapper,
+    table: str,
+    name: str,
+    lower: datetime,
+    upper: datetime,
+    default: str | None,
+) -> None:
+    qn = connection.ops.quote_name
+    bounds = "FOR VALUES FROM (%s) TO (%s)"
+    with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+        strays = False
+        if default is not None:
+            # Attaching over rows still in the default partition would fail.
+            cursor.execute(
+                f"SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE created_at >= %s AND created_at < %s)",
+                [lower, upper],
+            )
+            strays = cursor.fetchone()[0]
+        if not strays:
+            cursor.execute(
+                f"CREATE TABLE {qn(name)} PARTITION OF {qn(table)} {bounds}",
+                [lower, upper],
+            )
+            return
+        cursor.execute(
+            f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING STORAGE)"
+        )
+        cursor.execute(
+            f"WITH moved AS (DELETE FROM {qn(default)} WHERE created_at >= %s AND created_at < %s RETURNING *) "
+            f"INSERT INTO {qn(name)} SELECT * FROM moved",
+            [lower, upper],
+        )
+        cursor.execute(
+            f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} {bounds}",
+            [lower, upper],
+        )
+
+
+class _ArchiveEncoder(DjangoJSONEncoder):
+    def default(self, o: Any) -> Any:
+        # Keep full precision; DjangoJSONEncoder truncates to milliseconds.
+        if isinstance(o, datetime):
+            return o.isoformat()
+        return super().default(o)
+
+
+class ArchiveMismatch(RuntimeError):
+    def __init__(self, name: str, *, archived: int, found: int) -> None:
+        super().__init__(
+            f"{name} gained rows while it was archived ({archived} archived, {found} found); kept it"
+        )
+        self.name = name
+
+
+@dataclass(frozen=True)
+class ArchiveResult:
+    name: str
+    rows: int
+    path: Path
+
+
+class _ArchiveWriter:
+    """Write rows to ``<path>.tmp`` and move it into place once durable."""
+
+    def __init__(self, path: Path, archive_format: str) -> None:
+        if archive_format not in ARCHIVE_FORMATS:
+            raise ValueError(f"Unsupported archive format: {archive_format}")
+        self.path = path
+        self.archive_format = archive_format
+        self.tmp_path = path.with_name(path.name + ".tmp")
+        self.rows = 0
+        self._batch: list[dict[str, Any]] = []
+        self._parquet_writer: Any = None
+        self._gzip: Any = None
+
+    def __enter__(self) -> _ArchiveWriter:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        if self.archive_format == "jsonl":
+            self._gzip = gzip.open(self.tmp_path, "wt", encoding="utf-8")
+        else:
+            import pyarrow.parquet as pq
+
+            self._parquet_writer = pq.ParquetWriter(
+                self.tmp_path, _parquet_schema(), compression="zstd"
+            )
+        return self
+
+    def write(self, row: dict[str, Any]) -> None:
+        self.rows += 1
+        line = json.dumps(row, cls=_ArchiveEncoder, separators=(",", ":"))
+        if self._gzip is not None:
+            self._gzip.write(line)
+            self._gzip.write("\n")
+            return
+        # Round-trip through JSON so both sources store timestamps as ISO text.
+        record = json.loads(line)
+        record["metadata"] = json.dumps(record.get("metadata"))
+        self._batch.append(record)
+        if len(self._batch) >= 10_000:
+            self._flush_parquet()
+
+    def _flush_parquet(self) -> None:
+        import pyarrow as pa
+
+        if self._batch:
+            self._parquet_writer.write_table(
+                pa.Table.from_pylist(self._batch, schema=self._parquet_writer.schema)
+            )
+            self._batch = []
+
+    def __exit__(self, exc_type: Any, exc: Any, tb: Any) -> None:
+        if self._gzip is not None:
+            self._gzip.close()
+        else:
+            if exc_type is None:
+                self._flush_parquet()
+            self._parquet_writer.close()
+        if exc_type is not None:
+            self.tmp_path.unlink(missing_ok=True)
+            return
+        with open(self.tmp_path, "rb") as handle:
+            os.fsync(handle.fileno())
+        os.replace(self.tmp_path, self.path)
+
+
+def _parquet_schema() -> Any:
+    import pyarrow as pa
+
+    # Metadata is free-form, so it is stored as JSON text to keep one schema.
+    return pa.schema(
+        [
+            ("id", pa.int64()),
+            ("user_id", pa.int64()),
+            ("email", pa.string()),
+            ("action", pa.string()),
+            ("successful", pa.bool_()),
+            ("ip_address", pa.string()),
+            ("user_agent", pa.string()),
+            ("metadata", pa.string()),
+            ("created_at", pa.string()),
+        ]
+    )
+
+
+def _archive_path(directory: Path, name: str, archive_format: str) -> Path:
+    suffix = ".jsonl.gz" if archive_format == "jsonl" else ".parquet"
+    return directory / f"{name}{suffix}"
+
+
+def _stream_rows(
+    connection: BaseDatabaseWrapper, table: str, batch_size: int
+) -> Iterator[dict[str, Any]]:
+    qn = connection.ops.quote_name
+    with (
+        transaction.atomic(using=connection.alias),
+        connection.chunked_cursor() as cursor,
+    ):
+        cursor.execute(
+            f"SELECT row_to_json(t)::text FROM {qn(table)} t ORDER BY created_at, id"
+        )
+        while rows := cursor.fetchmany(batch_size):
+            for (line,) in rows:
+                yield json.loads(line)
+
+
+def archive_partitions(
+    *,
+    before: datetime,
+    directory: Path,
+    archive_format: str = "jsonl",
+    batch_size: int = 5_000,
+    connection: BaseDatabaseWrapper | None = None,
+) -> list[ArchiveResult]:
+    """Archive, then detach and drop, every partition that ends on or before *before*.
+
+    Each partition is exported while still attached, so writers are never
+    blocked for the length of an export. It is then detached and dropped in
+    one transaction, and only if it still holds exactly the rows that were
+    archived. A failure at any point leaves it attached and the next run
+    archives it again.
+    """
+
+    connection = connection or _connection()
+    table = AuthAuditLog._meta.db_table
+    qn = connection.ops.quote_name
+    results = []
+    for partition in list_partitions(connection):
+        if partition.is_default or partition.upper is None or partition.upper > before:
+            continue
+        path = _archive_path(directory, partition.name, archive_format)
+        with _ArchiveWriter(path, archive_format) as writer:
+            for row in _stream_rows(connection, partition.name, batch_size):
+                writer.write(row)
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(
+                f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(partition.name)}"
+            )
+            cursor.execute(f"SELECT count(*) FROM {qn(partition.name)}")
+            (rows,) = cursor.fetchone()
+            if rows != writer.rows:
+                raise ArchiveMismatch(partition.name, archived=writer.rows, found=rows)
+            cursor.execute(f"DROP TABLE {qn(partition.name)}")
+        results.append(ArchiveResult(partition.name, writer.rows, path))
+    return results
+
+
+def archive_rows(
+    *,
+    before: datetime,
+    directory: Path,
+    archive_format: str = "jsonl",
+    batch_size: int = 5_000,
+) -> list[ArchiveResult]:
+    """Non-partitioned fallback: archive and delete old rows in chunks."""
+
+    name = f"{AuthAuditLog._meta.db_table}_before_{before:%Y%m%d}"
+    path = _archive_path(directory, name, archive_format)
+    fields = [field.attname for field in AuthAuditLog._meta.concrete_fields]
+    old_rows = AuthAuditLog.objects.filter(created_at__lt=before).order_by(
+        "created_at", "id"
+    )
+    last_key: tuple[datetime, int] | None = None
+    with _ArchiveWriter(path, archive_format) as writer:
+        page = old_rows
+        while batch := list(page.values(*fields)[:batch_size]):
+            for row in batch:
+                writer.write(row)
+            last_key = (batch[-1]["created_at"], batch[-1]["id"])
+            page = old_rows.filter(
+                Q(created_at__gt=last_key[0])
+                | Q(created_at=last_key[0], id__gt=last_key[1])
+            )
+    if last_key is None:
+        path.unlink(missing_ok=True)
+        return []
+
+    # Rows are only deleted once the archive is durable, and only up to the
+    # last archived key.
+    archived = old_rows.filter(
+        Q(created_at__lt=last_key[0]) | Q(created_at=last_key[0], id__lte=last_key[1])
+    )
+    while ids := list(archived.values_list("id", flat=True)[:batch_size]):
+        AuthAuditLog.objects.filter(pk__in=ids).delete()
+    return [ArchiveResult(name, writer.rows, path)]
@@ -1,6 +1,7 @@
 from __future__ import annotations
 
 from datetime import datetime
+from typing import Any
 
 from ninja import Field, Schema
 from pydantic import ConfigDict
@@ -46,3 +47,31 @@ class UserResponse(Schema):
     email: str
     full_name: str = Field(alias="fullName")
     role: str
+
+
+class AuditLogFilters(Schema):
+    user_id: int | None = None
+    email: str | None = None
+    action: str | None = None
+    successful: bool | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    cursor: str | None = None
+    limit: int = Field(50, ge=1, le=200)
+
+
+class AuditLogEntry(Schema):
+    id: int
+    user_id: int | None
+    email: str
+    action: str
+    successful: bool
+    ip_address: str
+    user_agent: str
+    metadata: dict[str, Any]
+    created_at: datetime
+
+
+class AuditLogPage(Schema):
+    items: list[AuditLogEntry]
+    next_cursor: str | None
@@ -1,13 +1,41 @@
+"""Development and benchmark data.
+
+``seed_dev_data`` creates the two accounts ``runserver`` starts with in
+``DEBUG``. ``SyntheticDataGenerator`` (behind the ``seed_synthetic_data``
+command) fills a database with as many users as a benchmark needs, each with a
+rotated refresh-token history and a stream of audit events spread over the
+preceding months. The rows are a pure function of the seed, the volumes and
+the anchor time, so two runs against empty databases produce identical tables
+and benchmark results stay comparable.
+
+Every synthetic account shares one password hash, computed once, so
+generating millions of users costs no hashing and any of them can still log in
+with the configured password. Rows are written in batches with ``COPY`` on
+PostgreSQL and multi-row inserts elsewhere, bypassing model ``save()`` and
+signals. Other apps add their own tables with :func:`register_seed_step`.
+"""
+
 from __future__ import annotations
 
+import hashlib
 import logging
 import os
+import random
+import time
+from collections.abc import Callable, Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from itertools import islice
+from typing import Any
 
 from django.conf import settings
 from django.contrib.auth import get_user_model
-from django.db import DEFAULT_DB_ALIAS, connections
+from django.contrib.auth.hashers import make_password
+from django.core.management.color import no_style
+from django.db import DEFAULT_DB_ALIAS, connections, models, transaction
 from django.db.utils import OperationalError, ProgrammingError
 
+from .models import AuthAuditLog, RefreshToken
 
 logger = logging.getLogger(__name__)
 
@@ -52,4 +80,366 @@ def seed_dev_data() -> None:
         role=user_model.Role.USER,
     )
 
-    logger.info("Seeded development authentication data with default users (admin id=%s)", admin.id)
+    logger.info(
+        "Seeded development authentication data with default users (admin id=%s)",
+        admin.id,
+    )
+
+
+SYNTHETIC_EMAIL_DOMAIN = "synthetic.invalid"
+DEFAULT_SYNTHETIC_PASSWORD = "SyntheticPass123!"
+DEFAULT_ANCHOR = datetime(2026, 1, 1, tzinfo=UTC)
+
+_FIRST_NAMES = (
+    "Ali", "Amir", "Ava", "Darya", "Elena", "Farid", "Hana", "Ivan", "Leila", "Maya",
+    "Mina", "Navid", "Noah", "Omid", "Parisa", "Reza", "Sara", "Sina", "Yara", "Zoe",
+)  # fmt: skip
+_LAST_NAMES = (
+    "Ahmadi", "Bauer", "Costa", "Dubois", "Ebrahimi", "Fischer", "Garcia", "Hosseini", "Ito", "Karimi",
+    "Kowalski", "Moradi", "Novak", "Petrov", "Rahimi", "Rossi", "Sato", "Silva", "Tehrani", "Weber",
+)  # fmt: skip
+_USER_AGENTS = (
+    "Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36 Chrome/124.0 Safari/537.36",
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_4) AppleWebKit/605.1.15 Version/17.4 Safari/605.1.15",
+    "Mozilla/5.0 (X11; Linux x86_64; rv:125.0) Gecko/20100101 Firefox/125.0",
+    "Mozilla/5.0 (iPhone; CPU iPhone OS 17_4 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148",
+    "Mozilla/5.0 (Linux; Android 14; Pixel 8) AppleWebKit/537.36 Chrome/124.0 Mobile Safari/537.36",
+    "assets-mobile/2.3.1 (Android 14)",
+)
+# (action, relative weight, success rate) for the events after registration.
+_AUDIT_MIX = (
+    (AuthAuditLog.Action.LOGIN, 50, 0.9),
+    (AuthAuditLog.Action.REFRESH, 35, 0.97),
+    (AuthAuditLog.Action.LOGOUT, 8, 1.0),
+    (AuthAuditLog.Action.ACCESS_DENIED, 5, 0.0),
+    (AuthAuditLog.Action.TOKEN_REVOKED, 2, 1.0),
+)
+_REFRESH_LIFETIME = timedelta(days=14)
+_ADMIN_EVERY = 1000
+
+
+@dataclass(frozen=True)
+class SyntheticConfig:
+    users: int = 1000
+    seed: int = 0
+    refresh_tokens_per_user: float = 3.0
+    audit_events_per_user: float = 20.0
+    transfers_per_user: float = 10.0
+    months: int = 12
+    anchor: datetime = DEFAULT_ANCHOR
+    batch_size: int = 10_000
+    password: str = DEFAULT_SYNTHETIC_PASSWORD
+    database: str = DEFAULT_DB_ALIAS
+
+
+@dataclass(frozen=True)
+class SyntheticUser:
+    id: int
+    email: str
+    date_joined: datetime
+
+
+@dataclass
+class SyntheticReport:
+    rows: dict[str, int] = field(default_factory=dict)
+    seconds: float = 0.0
+
+
+SeedStep = Callable[["SyntheticDataGenerator"], dict[str, int]]
+_seed_steps: dict[str, SeedStep] = {}
+
+
+def register_seed_step(name: str, step: SeedStep) -> None:
+    """Add *step* to every synthetic run, after the auth tables and earlier steps.
+
+    A step receives the generator, writes its rows with
+    :meth:`SyntheticDataGenerator.write` and returns the rows written per
+    table. It should draw its randomness from :meth:`SyntheticDataGenerator.rng` so its
+    output is deterministic and independent of the other steps.
+    """
+
+    _seed_steps[name] = step
+
+
+def _chunks(rows: Iterable[Sequence[Any]], size: int) -> Iterator[list[Sequence[Any]]]:
+    iterator = iter(rows)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+def _count(rng: random.Random, mean: float) -> int:
+    """A non-negative count averaging *mean*, spread so histories vary in length."""
+
+    if mean <= 0:
+        return 0
+    return int(rng.expovariate(1 / mean) + 0.5)
+
+
+def _ip_address(rng: random.Random) -> str:
+    # Documentation ranges only (RFC 5737).
+    prefix = rng.choice(("192.0.2", "198.51.100", "203.0.113"))
+    return f"{prefix}.{rng.randrange(1, 255)}"
+
+
+class SyntheticDataGenerator:
+    """Write a deterministic synthetic dataset; see the module docstring."""
+
+    def __init__(
+        self,
+        config: SyntheticConfig,
+        *,
+        on_batch: Callable[[str, int, float], None] | None = None,
+    ) -> None:
+        self.config = config
+        self.connection = connections[config.database]
+        self.on_batch = on_batch
+        self.users: list[SyntheticUser] = []
+        self.start = config.anchor - timedelta(days=30 * config.months)
+        self._models: list[type[models.Model]] = []
+
+    def rng(self, step: str) -> random.Random:
+        """A generator private to *step*, so adding a step never changes the others' rows."""
+
+        return random.Random(f"{self.config.seed}:{step}")
+
+    def run(self) -> SyntheticReport:
+        user_model = get_user_model()
+        if (
+            user_model.objects.using(self.config.database)
+            .filter(email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}")
+            .exists()
+        ):
+            msg = f"The database already holds synthetic users (@{SYNTHETIC_EMAIL_DOMAIN}); start from a fresh one."
+            raise ValueError(msg)
+
+        started = time.perf_counter()
+        report = SyntheticReport()
+        self._prepare_audit_partitions()
+        report.rows["users"] = self.write(user_model, self._user_rows())
+        report.rows["refresh_tokens"] = self.write(
+            RefreshToken, self._refresh_token_rows()
+        )
+        report.rows["audit_log"] = self.write(AuthAuditLog, self._audit_rows())
+        for step in _seed_steps.values():
+            report.rows.update(step(self))
+        self._reset_sequences()
+        report.seconds = time.perf_counter() - started
+        return report
+
+    def write(self, model: type[models.Model], rows: Iterable[Sequence[Any]]) -> int:
+        """Insert *rows*, each holding a value per concrete field in declaration order.
+
+        Values go in as given: ``auto_now_add`` and field defaults are not
+        applied, so timestamps stay deterministic. Each batch commits on its
+        own.
+        """
+
+        if model not in self._models:
+            self._models.append(model)
+        fields = model._meta.concrete_fields
+        # psycopg adapts plain Python values itself; only JSON needs Django's
+        # wrapper, and preparing every value costs more than generating it.
+        native = self.connection.vendor == "postgresql"
+        prepare = [
+            (index, model_field)
+            for index, model_field in enumerate(fields)
+            if not native or isinstance(model_field, models.JSONField)
+        ]
+        label = model._meta.label
+        written = 0
+        for batch in _chunks(rows, self.config.batch_size):
+            batch_started = time.perf_counter()
+            prepared = []
+            for row in batch:
+                values = list(row)
+                for index, model_field in prepare:
+                    values[index] = model_field.get_db_prep_save(
+                        values[index], self.connection
+                    )
+                prepared.append(values)
+            with transaction.atomic(using=self.config.database):
+                self._insert(model, prepared)
+            written += len(batch)
+            if self.on_batch is not None:
+                self.on_batch(label, written, time.perf_counter() - batch_started)
+        return written
+
+    def _insert(self, model: type[models.Model], rows: list[list[Any]]) -> None:
+        quote = self.connection.ops.quote_name
+        table = quote(model._meta.db_table)
+        columns = ", ".join(
+            quote(model_field.column) for model_field in model._meta.concrete_fields
+        )
+        with self.connection.cursor() as cursor:
+            if self.connection.vendor == "postgresql":
+                with cursor.copy(f"COPY {table} ({columns}) FROM STDIN") as copy:
+                    for row in rows:
+                        copy.write_row(row)
+                return
+            placeholders = ", ".join(["%s"] * len(model._meta.concrete_fields))
+            cursor.executemany(
+                f"INSERT INTO {table} ({columns}) VALUES ({placeholders})", rows
+            )
+
+    def first_id(self, model: type[models.Model]) -> int:
+        last = model.objects.using(self.config.database).aggregate(
+            last=models.Max("pk")
+        )["last"]
+        return (last or 0) + 1
+
+    def _moment(self, rng: random.Random, after: datetime) -> datetime:
+        span = (self.config.anchor - after).total_seconds()
+        return after + timedelta(seconds=int(rng.random() * span))
+
+    def _prepare_audit_partitions(self) -> None:
+        from .partitions import ensure_partitions, is_partitioned
+
+        # Rows for a month without its partition would land in ``_default``
+        # and block creating that partition later.
+        if is_partitioned(self.connection):
+            with transaction.atomic(using=self.config.database):
+                ensure_partitions(
+                    start=self.start,
+                    months_ahead=self.config.months + 1,
+                    connection=self.connection,
+                )
+
+    def _user_rows(self) -> Iterator[list[Any]]:
+        user_model = get_user_model()
+        rng = self.rng("users")
+        password = make_password(
+            self.config.password, salt=f"synthetic{self.config.seed}"
+        )
+        first_id = self.first_id(user_model)
+        for index in range(self.config.users):
+            first_name = rng.choice(_FIRST_NAMES)
+            last_name = rng.choice(_LAST_NAMES)
+            is_admin = index % _ADMIN_EVERY == 0
+            user = SyntheticUser(
+                id=first_id + index,
+                email=f"{first_name.lower()}.{last_name.lower()}.{index}@{SYNTHETIC_EMAIL_DOMAIN}",
+                date_joined=self._moment(rng, self.start),
+            )
+            self.users.append(user)
+            values = {
+                "id": user.id,
+                "password": password,
+                "last_login": None,
+                "is_superuser": is_admin,
+                "email": user.email,
+                "first_name": first_name,
+                "last_name": last_name,
+                "role": user_model.Role.ADMIN if is_admin else user_model.Role.USER,
+                "is_staff": is_admin,
+                "is_active": rng.random() >= 0.02,
+                "date_joined": user.date_joined,
+                "auth_epoch": 0,
+            }
+            yield [
+                values[model_field.attname]
+                for model_field in user_model._meta.concrete_fields
+            ]
+
+    def _refresh_token_rows(self) -> Iterator[list[Any]]:
+        rng = self.rng("refresh_tokens")
+        token_id = self.first_id(RefreshToken)
+        for user in self.users:
+            count = _count(rng, self.config.refresh_tokens_per_user)
+            if not count:
+                continue
+            # One session per device, each rotated a few times: every rotation
+            # revokes the previous token and records its last use.
+            created = self._moment(rng, user.date_joined)
+            user_agent = rng.choice(_USER_AGENTS)
+            ip_address = _ip_address(rng)
+            for position in range(count):
+                if rng.random() < 0.3:
+                    user_agent = rng.choice(_USER_AGENTS)
+                    ip_address = _ip_address(rng)
+                last = position == count - 1
+                step = timedelta(seconds=int(rng.random() * 3 * 86400))
+                used = min(created + step, self.config.anchor)
+                values = {
+                    "id": token_id,
+                    "user_id": user.id,
+                    "token_hash": hashlib.sha256(
+                        f"{self.config.seed}:{token_id}".encode()
+                    ).hexdigest(),
+                    "created_at": created,
+                    "expires_at": created + _REFRESH_LIFETIME,
+                    "revoked": not last or rng.random() < 0.25,
+                    "last_used_at": None if last else used,
+                    "user_agent": user_agent,
+                    "ip_address": ip_address,
+                }
+                yield [
+                    values[model_field.attname]
+                    for model_field in RefreshToken._meta.concrete_fields
+                ]
+                token_id += 1
+                created = used
+
+    def _audit_rows(self) -> Iterator[list[Any]]:
+        rng = self.rng("audit_log")
+        actions = [action for action, _, _ in _AUDIT_MIX]
+        weights = [weight for _, weight, _ in _AUDIT_MIX]
+        success_rates = {action: rate for action, _, rate in _AUDIT_MIX}
+        entry_id = self.first_id(AuthAuditLog)
+        fields = AuthAuditLog._meta.concrete_fields
+        for user in self.users:
+            user_agent = rng.choice(_USER_AGENTS)
+            ip_address = _ip_address(rng)
+            events = [(user.date_joined, AuthAuditLog.Action.REGISTER)]
+            events.extend(
+                (self._moment(rng, user.date_joined), action)
+                for action in rng.choices(
+                    actions, weights, k=_count(rng, self.config.audit_events_per_user)
+                )
+            )
+            events.sort(key=lambda event: event[0])
+            for created_at, action in events:
+                successful = (
+                    action == AuthAuditLog.Action.REGISTER
+                    or rng.random() < success_rates[action]
+                )
+                # Shaped like what the auth endpoints log for the same event.
+                metadata: dict[str, Any] = {}
+                if action == AuthAuditLog.Action.ACCESS_DENIED:
+                    metadata = {"reason": "Role user lacks access"}
+                elif not successful:
+                    metadata = {
+                        "reason": "invalid_credentials"
+                        if action == AuthAuditLog.Action.LOGIN
+                        else "expired"
+                    }
+                elif action == AuthAuditLog.Action.TOKEN_REVOKED:
+                    metadata = {"auth_epoch": 0}
+                values = {
+                    "id": entry_id,
+                    "user_id": user.id,
+                    "email": user.email,
+                    "action": action,
+                    "successful": successful,
+                    "ip_address": ip_address,
+                    "user_agent": user_agent,
+                    "metadata": metadata,
+                    "created_at": created_at,
+                }
+                yield [values[model_field.attname] for model_field in fields]
+                entry_id += 1
+
+    def _reset_sequences(self) -> None:
+        statements = self.connection.ops.sequence_reset_sql(no_style(), self._models)
+        if not statements:
+            return
+        with self.connection.cursor() as cursor:
+            for statement in statements:
+                cursor.execute(statement)
+
+
+def generate_synthetic_data(
+    config: SyntheticConfig,
+    *,
+    on_batch: Callable[[str, int, float], None] | None = None,
+) -> SyntheticReport:
+    return SyntheticDataGenerator(config, on_batch=on_batch).run()
@@ -0,0 +1,78 @@
+from __future__ import annotations
+
+from functools import partial
+from typing import Any
+
+from django.core.signals import setting_changed
+from django.db import transaction
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .cache import invalidate_principal
+from .keys import reset_key_ring
+from .models import User
+from .tokens import reset_token_cache
+
+
+@receiver(
+    pre_save,
+    sender=User,
+    dispatch_uid="assets_auth.bump_auth_epoch_on_privilege_change",
+)
+def bump_auth_epoch_on_privilege_change(
+    sender: type[User],
+    instance: User,
+    raw: bool = False,
+    update_fields: frozenset[str] | None = None,
+    **kwargs: Any,
+) -> None:
+    """Revoke outstanding tokens when a user's role or active flag changes."""
+
+    if raw or instance._state.adding or instance.pk is None:
+        return
+    if update_fields is not None and not {"role", "is_active"} & update_fields:
+        return
+
+    previous = (
+        sender.objects.filter(pk=instance.pk)
+        .values("role", "is_active", "auth_epoch")
+        .first()
+    )
+    if previous is None:
+        return
+    if (
+        previous["role"] == instance.role
+        and previous["is_active"] == instance.is_active
+    ):
+        return
+
+    # Bumped with its own UPDATE so the new epoch is stored even when the
+    # caller's ``update_fields`` leave ``auth_epoch`` out.
+    sender.objects.filter(pk=instance.pk).update(auth_epoch=F("auth_epoch") + 1)
+    instance.auth_epoch = previous["auth_epoch"] + 1
+
+
+@receiver(
+    post_save, sender=User, dispatch_uid="assets_auth.invalidate_principal_on_save"
+)
+@receiver(
+    post_delete, sender=User, dispatch_uid="assets_auth.invalidate_principal_on_delete"
+)
+def invalidate_cached_principal(
+    sender: type[User], instance: User, **kwargs: Any
+) -> None:
+    # Evict now so this request sees the change, and again after commit so a
+    # concurrent request cannot re-cache the pre-commit row in between.
+    invalidate_principal(instance.pk)
+    transaction.on_commit(partial(invalidate_principal, instance.pk))
+
+
+@receiver(
+    setting_changed,
+    dispatch_uid="assets_auth.reset_token_verification_on_setting_change",
+)
+def reset_token_verification_on_setting_change(setting: str, **kwargs: Any) -> None:
+    if setting.startswith("JWT_") or setting == "SECRET_KEY":
+        reset_key_ring()
+        reset_token_cache()
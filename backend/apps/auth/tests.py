@@ -1,14 +1,107 @@
+import gzip
 import hashlib
-from unittest.mock import patch
+import json
+import os
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+from io import StringIO
+from pathlib import Path
+from typing import Any
+from unittest import skipIf, skipUnless
+from unittest.mock import MagicMock, patch
 
-from django.test import Client, RequestFactory, TestCase
-from django.db.utils import ProgrammingError
+import jwt
+from cryptography.hazmat.primitives import serialization
+from django.conf import settings
+from django.contrib.auth.hashers import make_password
+from django.core.cache import caches
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.db.utils import DatabaseError, ProgrammingError
+from django.http import HttpResponse
+from django.test import (
+    Client,
+    RequestFactory,
+    SimpleTestCase,
+    TestCase,
+    TransactionTestCase,
+    modify_settings,
+    override_settings,
+)
+from django.test.utils import CaptureQueriesContext
+from django.urls import path
+from django.utils import timezone
+from ninja import NinjaAPI
 from ninja.errors import HttpError
+from ninja.responses import NinjaJSONEncoder
+from prometheus_client import REGISTRY
 
-from .api import admin_required, jwt_auth, user_required
+from assets_backend.metrics import UNMATCHED_ROUTE
+from assets_backend.renderers import dumps
+from assets_backend.routers import (
+    PIN_COOKIE,
+    PrimaryReplicaRouter,
+    ReplicaRoutingMiddleware,
+    RoutingState,
+    _state,
+)
+
+from . import cache as cache_module
+from .api import _token_payload, _user_payload, admin_required, jwt_auth, user_required
+from .async_api import router as async_router
+from .audit import AuditWriter
+from .cache import (
+    VerifiedTokenCache,
+    get_principal,
+    get_revocation_epoch,
+    invalidate_principal,
+    principal_cache_stats,
+    reset_principal_cache,
+)
 from .constants import is_auth_exempt_path
+from .errors import HashingPoolBusy, LoginThrottled
+from .hashing import PasswordHashingPool
+from .imports import Checkpoint, UserImporter
+from .keys import PRIVATE_SUFFIX, PUBLIC_SUFFIX, generate_private_key
+from .maintenance import PurgeChunk, purge_refresh_tokens
 from .models import AuthAuditLog, RefreshToken, User
-from .tokens import create_access_token
+from .partitions import (
+    add_months,
+    archive_partitions,
+    ensure_partitions,
+    is_partitioned,
+    list_partitions,
+    month_start,
+)
+from .schemas import LoginResponse, UserResponse
+from .seed import (
+    SYNTHETIC_EMAIL_DOMAIN,
+    SyntheticConfig,
+    SyntheticReport,
+    generate_synthetic_data,
+)
+from .throttling import LoginThrottle, ThrottleRule
+from .tokens import (
+    create_access_token,
+    reset_token_cache,
+    rotate_refresh_token,
+    token_cache_stats,
+    validate_access_token,
+)
+from .utils import get_client_ip
+
+async_test_api = NinjaAPI(urls_namespace="auth-async-tests")
+async_test_api.add_router("auth/", async_router)
+urlpatterns = [
+    path("api/", async_test_api.urls),
+    path("items/<int:item_id>", lambda request, item_id: HttpResponse(status=204)),
+]
+
+
+def _metric(name: str, **labels: str) -> float:
+    return REGISTRY.get_sample_value(name, labels) or 0.0
 
 
 class AuthApiTests(TestCase):
@@ -50,7 +143,9 @@ class AuthApiTests(TestCase):
             "email": "alice@example.com",
             "password": "Ch@ngeMe12345",
         }
-        response = self.client.post("/api/auth/register", payload, content_type="application/json")
+        response = self.client.post(
+            "/api/auth/register", payload, content_type="application/json"
+        )
         self.assertEqual(response.status_code, 201)
         data = response.json()
         self.assertEqual(data["email"], payload["email"])
@@ -155,11 +250,14 @@ class AuthAuditLogTests(TestCase):
         )
 
     def test_log_handles_missing_table_gracefully(self) -> None:
-        with patch.object(
-            AuthAuditLog.objects,
-            "create",
-            side_effect=ProgrammingError("no such table: assets_auth_authauditlog"),
-        ), self.assertLogs("apps.auth.models", level="WARNING") as logs:
+        with (
+            patch.object(
+                AuthAuditLog.objects,
+                "create",
+                side_effect=ProgrammingError("no such table: assets_auth_authauditlog"),
+            ),
+            self.assertLogs("apps.auth.models", level="WARNING") as logs,
+        ):
             result = AuthAuditLog.log(
                 user=self.user,
                 email=self.user.email,
@@ -168,4 +266,1626 @@ class AuthAuditLogTests(TestCase):
             )
 
         self.assertIsNone(result)
-        self.assertTrue(any("Skipping authentication audit log write" in msg for msg in logs.output))
+        self.assertTrue(
+            any("Skipping authentication audit log write" in msg for msg in logs.output)
+        )
+
+
+class AuditWriterTests(TestCase):
+    def _entry(self, email: str) -> AuthAuditLog:
+        return AuthAuditLog(
+            email=email, action=AuthAuditLog.Action.LOGIN, successful=False
+        )
+
+    def test_full_queue_drops_and_counts_entries(self) -> None:
+        writer = AuditWriter(
+            AuthAuditLog, max_queue=2, batch_size=10, flush_interval=1, autostart=False
+        )
+
+        with self.assertLogs("apps.auth.audit", level="WARNING"):
+            results = [
+                writer.submit(self._entry(f"user{i}@example.com")) for i in range(3)
+            ]
+
+        self.assertEqual(results, [True, True, False])
+        self.assertEqual(writer.stats()["dropped"], 1)
+        self.assertEqual(writer.stats()["queue_depth"], 2)
+
+    def test_flush_writes_in_batches(self) -> None:
+        writer = AuditWriter(
+            AuthAuditLog, max_queue=10, batch_size=2, flush_interval=1, autostart=False
+        )
+        for i in range(5):
+            writer.submit(self._entry(f"user{i}@example.com"))
+
+        with CaptureQueriesContext(connection) as queries:
+            written = writer.flush()
+
+        # Each batch runs in its own savepoint here, inside the test's transaction.
+        self.assertEqual(sum(query["sql"].startswith("INSERT") for query in queries), 3)
+        self.assertEqual(written, 5)
+        self.assertEqual(AuthAuditLog.objects.count(), 5)
+        self.assertEqual(writer.stats()["flushes"], 3)
+
+    def _failing_inserts(self, fail) -> Any:
+        insert = AuthAuditLog.objects.bulk_create
+
+        def bulk_create(entries, *args, **kwargs):
+            if fail(entries):
+                raise DatabaseError("insert failed")
+            return insert(entries, *args, **kwargs)
+
+        return patch.object(
+            AuthAuditLog.objects, "bulk_create", side_effect=bulk_create
+        )
+
+    def test_failed_batch_is_retried_then_written_row_by_row(self) -> None:
+        writer = AuditWriter(
+            AuthAuditLog, max_queue=10, batch_size=10, flush_interval=1, autostart=False
+        )
+        for email in ("a@example.com", "bad@example.com", "b@example.com"):
+            writer.submit(self._entry(email))
+        calls: list[int] = []
+
+        def fail(entries) -> bool:
+            calls.append(len(entries))
+            return any(entry.email == "bad@example.com" for entry in entries)
+
+        with self._failing_inserts(fail), self.assertLogs("apps.auth.audit", "WARNING"):
+            self.assertEqual(writer.flush(), 2)
+
+        self.assertEqual(calls, [3, 3, 1, 1, 1])
+        self.assertEqual(
+            sorted(AuthAuditLog.objects.values_list("email", flat=True)),
+            ["a@example.com", "b@example.com"],
+        )
+        self.assertEqual((writer.stats()["written"], writer.stats()["failed"]), (2, 1))
+
+    def test_transient_failure_loses_nothing(self) -> None:
+        writer = AuditWriter(
+            AuthAuditLog, max_queue=10, batch_size=10, flush_interval=1, autostart=False
+        )
+        for i in range(3):
+            writer.submit(self._entry(f"user{i}@example.com"))
+        failures = [True]
+
+        with (
+            self._failing_inserts(lambda entries: failures and failures.pop()),
+            self.assertLogs("apps.auth.audit"),
+        ):
+            self.assertEqual(writer.flush(), 3)
+
+        self.assertEqual(AuthAuditLog.objects.count(), 3)
+        self.assertEqual(writer.stats()["failed"], 0)
+
+    @override_settings(AUTH_AUDIT_BUFFERED=True)
+    def test_log_enqueues_instead_of_inserting(self) -> None:
+        writer = AuditWriter(
+            AuthAuditLog, max_queue=10, batch_size=10, flush_interval=1, autostart=False
+        )
+        with (
+            patch("apps.auth.models.get_audit_writer", return_value=writer),
+            self.assertNumQueries(0),
+        ):
+            AuthAuditLog.log(
+                user=None,
+                email="queued@example.com",
+                action=AuthAuditLog.Action.LOGIN,
+                successful=False,
+            )
+
+        self.assertEqual(writer.stats()["queue_depth"], 1)
+
+
+class AuditWriterShutdownTests(TransactionTestCase):
+    def test_shutdown_flushes_pending_entries(self) -> None:
+        writer = AuditWriter(
+            AuthAuditLog, max_queue=100, batch_size=50, flush_interval=60
+        )
+        for i in range(3):
+            writer.submit(
+                AuthAuditLog(
+                    email=f"late{i}@example.com", action=AuthAuditLog.Action.LOGIN
+                )
+            )
+
+        writer.shutdown(timeout=5)
+
+        self.assertEqual(AuthAuditLog.objects.count(), 3)
+        self.assertEqual(writer.stats()["written"], 3)
+
+
+class PasswordHashingPoolTests(TestCase):
+    def test_rejects_when_no_slot_frees_up_within_queue_timeout(self) -> None:
+        pool = PasswordHashingPool(
+            workers=0, max_concurrency=1, queue_timeout=0.01, retry_after=2
+        )
+        started = threading.Event()
+        release = threading.Event()
+
+        def slow_hash(password: str) -> str:
+            started.set()
+            release.wait(5)
+            return "hashed"
+
+        with patch("apps.auth.hashing.make_password", side_effect=slow_hash):
+            worker = threading.Thread(target=pool.hash, args=("first",))
+            worker.start()
+            started.wait(5)
+            with self.assertRaises(HashingPoolBusy) as ctx:
+                pool.hash("second")
+            release.set()
+            worker.join()
+
+        self.assertEqual(ctx.exception.retry_after, 2)
+        stats = pool.stats()
+        self.assertEqual(stats["rejected"], 1)
+        self.assertEqual(stats["completed"], 1)
+        self.assertEqual(stats["in_flight"], 0)
+
+    def test_process_pool_hashes_and_verifies(self) -> None:
+        pool = PasswordHashingPool(
+            workers=1, max_concurrency=2, queue_timeout=5, retry_after=1
+        )
+        try:
+            encoded = pool.hash("Passw0rd!")
+            self.assertEqual(pool.verify("Passw0rd!", encoded), (True, False))
+            self.assertFalse(pool.verify("wrong", encoded)[0])
+        finally:
+            pool.shutdown()
+
+    def test_login_returns_503_with_retry_after_when_pool_is_busy(self) -> None:
+        with patch(
+            "apps.auth.api.authenticate_credentials",
+            side_effect=HashingPoolBusy(retry_after=3),
+        ):
+            response = Client().post(
+                "/api/auth/login",
+                {"email": "busy@example.com", "password": "whatever"},
+                content_type="application/json",
+            )
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response["Retry-After"], "3")
+
+
+@override_settings(AUTH_LOGIN_THROTTLE_ENABLED=True)
+class LoginThrottleTests(TestCase):
+    def setUp(self) -> None:
+        caches["default"].clear()
+        self.throttle = LoginThrottle(
+            rules=[ThrottleRule("ip", 5, 60), ThrottleRule("email", 2, 300)],
+            cache_alias="default",
+        )
+        patcher = patch("apps.auth.throttling._throttle", self.throttle)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user(
+            email="throttled@example.com", password="Passw0rd!"
+        )
+
+    def _login(self, email: str, ip: str = "203.0.113.7"):
+        return Client(REMOTE_ADDR=ip).post(
+            "/api/auth/login",
+            {"email": email, "password": "wrong"},
+            content_type="application/json",
+        )
+
+    def test_rejects_with_429_before_hashing(self) -> None:
+        with patch(
+            "apps.auth.api.authenticate_credentials", return_value=None
+        ) as authenticate:
+            statuses = [
+                self._login(email).status_code
+                for email in ("throttled@example.com", " Throttled@Example.COM")
+            ]
+            response = self._login("THROTTLED@example.com")
+
+        self.assertEqual(statuses, [401, 401])
+        self.assertEqual(response.status_code, 429)
+        self.assertGreaterEqual(int(response["Retry-After"]), 1)
+        self.assertEqual(authenticate.call_count, 2)
+        stats = self.throttle.stats()
+        self.assertEqual(
+            (stats["passed"], stats["throttled"], stats["throttled_email"]), (2, 1, 1)
+        )
+
+    def test_ip_limit_applies_across_emails(self) -> None:
+        # Frozen so a window rollover mid-test cannot discount earlier attempts.
+        clock = patch("apps.auth.throttling.time.time", return_value=time.time())
+        with clock, patch("apps.auth.api.authenticate_credentials", return_value=None):
+            statuses = [
+                self._login(f"user{index}@example.com").status_code
+                for index in range(6)
+            ]
+            other_ip = self._login("user9@example.com", ip="198.51.100.1")
+
+        self.assertEqual(statuses, [401] * 5 + [429])
+        self.assertEqual(other_ip.status_code, 401)
+        self.assertEqual(self.throttle.stats()["throttled_ip"], 1)
+
+    def test_previous_window_decays_as_the_window_slides(self) -> None:
+        # Near the real clock: the cache's own expiry also reads time.time().
+        start = (int(time.time()) // 300 + 1) * 300
+        with patch("apps.auth.throttling.time.time", return_value=start + 299):
+            self.throttle.check({"email": "slide@example.com"})
+            self.throttle.check({"email": "slide@example.com"})
+            with self.assertRaises(LoginThrottled):
+                self.throttle.check({"email": "slide@example.com"})
+        # After rollover the previous window's two attempts weigh 299/300...
+        with patch("apps.auth.throttling.time.time", return_value=start + 301):
+            self.throttle.check({"email": "slide@example.com"})
+            with self.assertRaises(LoginThrottled):
+                self.throttle.check({"email": "slide@example.com"})
+        # ...half a window later they still count as one...
+        with patch("apps.auth.throttling.time.time", return_value=start + 450):
+            with self.assertRaises(LoginThrottled):
+                self.throttle.check({"email": "slide@example.com"})
+        # ...and near the end of the window almost nothing.
+        with patch("apps.auth.throttling.time.time", return_value=start + 590):
+            self.throttle.check({"email": "slide@example.com"})
+
+    def test_parallel_attempts_cannot_exceed_the_limit(self) -> None:
+        barrier = threading.Barrier(10)
+        outcomes: list[str] = []
+        read_counts = self.throttle._get_many
+
+        def slow_read(keys: list[str]) -> dict[str, int]:
+            # Widens the gap between reading and writing the counters.
+            counts = read_counts(keys)
+            time.sleep(0.05)
+            return counts
+
+        def attempt() -> None:
+            barrier.wait()
+            try:
+                self.throttle.check({"email": "race@example.com"})
+                outcomes.append("passed")
+            except LoginThrottled:
+                outcomes.append("throttled")
+
+        clock = patch("apps.auth.throttling.time.time", return_value=time.time())
+        with clock, patch.object(self.throttle, "_get_many", side_effect=slow_read):
+            threads = [threading.Thread(target=attempt) for _ in range(10)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(sorted(outcomes), ["passed"] * 2 + ["throttled"] * 8)
+
+    def test_forwarding_headers_are_only_trusted_when_configured(self) -> None:
+        request = RequestFactory().get(
+            "/api/auth/login",
+            REMOTE_ADDR="203.0.113.7",
+            HTTP_X_FORWARDED_FOR="1.2.3.4",
+            HTTP_X_REAL_IP="5.6.7.8",
+        )
+        self.assertEqual(get_client_ip(request), "203.0.113.7")
+        with override_settings(AUTH_CLIENT_IP_HEADER="X-Real-IP"):
+            self.assertEqual(get_client_ip(request), "5.6.7.8")
+
+    def test_falls_back_to_process_counters_when_cache_is_down(self) -> None:
+        broken = MagicMock()
+        broken.get_many.side_effect = ConnectionError("cache down")
+        broken.add.side_effect = ConnectionError("cache down")
+        with (
+            patch("apps.auth.throttling.caches", {"default": broken}),
+            self.assertLogs("apps.auth.throttling", "WARNING"),
+        ):
+            self.throttle.check({"email": "down@example.com"})
+            self.throttle.check({"email": "down@example.com"})
+            with self.assertRaises(LoginThrottled):
+                self.throttle.check({"email": "down@example.com"})
+
+        self.assertGreater(self.throttle.stats()["fallback"], 0)
+
+
+class PrincipalCacheTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.factory = RequestFactory()
+        self.user = User.objects.create_user(
+            email="cached@example.com",
+            password="Passw0rd!",
+            first_name="Cached",
+            last_name="User",
+        )
+        self.token = create_access_token(self.user)
+
+    def test_repeated_authentication_skips_the_database(self) -> None:
+        jwt_auth.authenticate(self.factory.get("/protected"), self.token)
+
+        request = self.factory.get("/protected")
+        with self.assertNumQueries(0):
+            jwt_auth.authenticate(request, self.token)
+
+        self.assertEqual(request.user.pk, self.user.pk)
+        self.assertEqual(request.user.full_name, "Cached User")
+        stats = principal_cache_stats()
+        self.assertEqual(stats["misses"], 1)
+        self.assertEqual(stats["local_hits"], 1)
+
+    def test_saving_user_invalidates_cached_principal(self) -> None:
+        jwt_auth.authenticate(self.factory.get("/protected"), self.token)
+
+        self.user.is_active = False
+        self.user.save(update_fields=["is_active"])
+
+        with self.assertRaises(HttpError) as ctx:
+            jwt_auth.authenticate(self.factory.get("/protected"), self.token)
+        self.assertEqual(ctx.exception.status_code, 403)
+
+    def _change_before_store(self, change):
+        store = cache_module._shared_set
+        changed: list[bool] = []
+
+        def racing_store(*args: Any) -> None:
+            # The row changes after the lookup read it but before it is stored.
+            if not changed:
+                change()
+                changed.append(True)
+            store(*args)
+
+        return patch("apps.auth.cache._shared_set", side_effect=racing_store)
+
+    def test_fills_that_raced_an_invalidation_are_not_served(self) -> None:
+        caches["default"].clear()
+        epoch = self.user.auth_epoch
+
+        def bump_epoch() -> None:
+            self.user.auth_epoch = epoch + 1
+            self.user.save(update_fields=["auth_epoch"])
+
+        def deactivate() -> None:
+            self.user.is_active = False
+            self.user.save(update_fields=["is_active"])
+
+        # Each check runs as another process would: nothing local, only
+        # whatever the racing lookup left in the shared tier.
+        with self._change_before_store(bump_epoch):
+            self.assertEqual(get_revocation_epoch(self.user.pk), epoch)
+        reset_principal_cache()
+        self.assertEqual(get_revocation_epoch(self.user.pk), epoch + 1)
+
+        with self._change_before_store(deactivate):
+            self.assertTrue(get_principal(self.user.pk).is_active)
+        reset_principal_cache()
+        self.assertFalse(get_principal(self.user.pk).is_active)
+        self.assertEqual(principal_cache_stats()["shared_hits"], 0)
+
+    @override_settings(
+        DATABASE_READ_REPLICAS=["replica1"],
+        DATABASE_ROUTERS=["assets_backend.routers.PrimaryReplicaRouter"],
+    )
+    def test_cache_fills_read_from_the_primary_on_safe_requests(self) -> None:
+        # "replica1" has no connection, so any lookup routed to it would fail.
+        token = _state.set(RoutingState(pinned=False))
+        try:
+            with patch.object(connection, "in_atomic_block", False):
+                self.assertEqual(PrimaryReplicaRouter().db_for_read(User), "replica1")
+                principal = get_principal(self.user.pk)
+                epoch = get_revocation_epoch(self.user.pk)
+        finally:
+            _state.reset(token)
+
+        self.assertEqual(principal.email, self.user.email)
+        self.assertEqual(epoch, self.user.auth_epoch)
+
+    def test_deleting_user_invalidates_cached_principal(self) -> None:
+        jwt_auth.authenticate(self.factory.get("/protected"), self.token)
+
+        self.user.delete()
+
+        with self.assertRaises(HttpError) as ctx:
+            jwt_auth.authenticate(self.factory.get("/protected"), self.token)
+        self.assertEqual(ctx.exception.status_code, 401)
+
+
+class RevocationEpochTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.factory = RequestFactory()
+        self.client = Client()
+        self.password = "Passw0rd!"
+        self.user = User.objects.create_user(
+            email="epoch@example.com", password=self.password
+        )
+
+    def test_revoke_sessions_rejects_previously_issued_tokens(self) -> None:
+        token = create_access_token(self.user)
+        jwt_auth.authenticate(self.factory.get("/protected"), token)
+
+        self.user.revoke_sessions()
+
+        with self.assertRaises(HttpError) as ctx:
+            jwt_auth.authenticate(self.factory.get("/protected"), token)
+        self.assertEqual(ctx.exception.status_code, 401)
+        fresh_token = create_access_token(self.user)
+        payload = jwt_auth.authenticate(self.factory.get("/protected"), fresh_token)
+        self.assertEqual(payload["epoch"], 1)
+
+    def test_role_change_bumps_epoch(self) -> None:
+        self.user.role = User.Role.ADMIN
+        self.user.save(update_fields=["role"])
+
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.auth_epoch, 1)
+
+    @override_settings(AUTH_STATELESS_MODE=True)
+    def test_stateless_mode_uses_claims_without_user_queries(self) -> None:
+        token = create_access_token(self.user)
+        jwt_auth.authenticate(self.factory.get("/protected"), token)
+
+        request = self.factory.get("/protected")
+        with self.assertNumQueries(0):
+            jwt_auth.authenticate(request, token)
+        self.assertEqual(request.user.pk, self.user.pk)
+        self.assertEqual(request.user.role, User.Role.USER)
+
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(HttpError) as ctx:
+            jwt_auth.authenticate(self.factory.get("/protected"), token)
+        self.assertEqual(ctx.exception.status_code, 401)
+
+    @override_settings(AUTH_STATELESS_MODE=True)
+    def test_stateless_me_loads_the_name_columns_in_one_query(self) -> None:
+        User.objects.filter(pk=self.user.pk).update(
+            first_name="Ada", last_name="Lovelace"
+        )
+        token = create_access_token(self.user)
+        jwt_auth.authenticate(self.factory.get("/protected"), token)
+
+        with self.assertNumQueries(1):
+            response = self.client.get(
+                "/api/auth/me", HTTP_AUTHORIZATION=f"Bearer {token}"
+            )
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["full_name"], "Ada Lovelace")
+
+    def test_revoke_sessions_endpoint_revokes_refresh_tokens(self) -> None:
+        login_response = self.client.post(
+            "/api/auth/login",
+            {"email": self.user.email, "password": self.password},
+            content_type="application/json",
+        )
+        access_token = login_response.json()["access_token"]
+
+        response = self.client.post("/api/auth/sessions/revoke")
+
+        self.assertEqual(response.status_code, 204)
+        self.assertFalse(
+            RefreshToken.objects.filter(user=self.user, revoked=False).exists()
+        )
+        me_response = Client().get(
+            "/api/auth/me", HTTP_AUTHORIZATION=f"Bearer {access_token}"
+        )
+        self.assertEqual(me_response.status_code, 401)
+
+
+class RefreshRotationTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.user = User.objects.create_user(
+            email="rotate@example.com", password="Passw0rd!"
+        )
+        _token, self.raw_token = RefreshToken.create_for_user(
+            self.user, lifetime=timedelta(days=1)
+        )
+
+    def test_rotation_round_trip_budget(self) -> None:
+        # SAVEPOINT, UPDATE ... RETURNING, principal SELECT, INSERT, RELEASE.
+        with self.assertNumQueries(5):
+            rotation = rotate_refresh_token(self.raw_token)
+        self.assertEqual(rotation.status, "rotated")
+
+        # The principal is cached after the first rotation.
+        with self.assertNumQueries(4):
+            rotation = rotate_refresh_token(rotation.raw_token)
+        self.assertEqual(rotation.status, "rotated")
+        self.assertEqual(rotation.user.pk, self.user.pk)
+        self.assertEqual(
+            RefreshToken.objects.filter(user=self.user, revoked=False).count(), 1
+        )
+
+    def test_reusing_rotated_token_is_a_replay_that_revokes_all_sessions(self) -> None:
+        successor = rotate_refresh_token(self.raw_token)
+
+        replay = rotate_refresh_token(self.raw_token)
+
+        self.assertEqual(replay.status, "replayed")
+        self.assertFalse(
+            RefreshToken.objects.filter(user=self.user, revoked=False).exists()
+        )
+        self.assertEqual(
+            rotate_refresh_token(successor.raw_token).status, "expired_or_revoked"
+        )
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.auth_epoch, 1)
+
+    def test_expired_and_unknown_tokens_are_rejected(self) -> None:
+        RefreshToken.objects.filter(user=self.user).update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+
+        self.assertEqual(
+            rotate_refresh_token(self.raw_token).status, "expired_or_revoked"
+        )
+        self.assertEqual(rotate_refresh_token("not-a-token").status, "unknown_token")
+        self.assertTrue(RefreshToken.objects.get(user=self.user).revoked)
+
+    def test_inactive_user_gets_no_successor(self) -> None:
+        User.objects.filter(pk=self.user.pk).update(is_active=False)
+
+        rotation = rotate_refresh_token(self.raw_token)
+
+        self.assertEqual(rotation.status, "inactive")
+        self.assertEqual(RefreshToken.objects.filter(user=self.user).count(), 1)
+        self.assertTrue(RefreshToken.objects.get(user=self.user).revoked)
+
+    def test_refresh_endpoint_rejects_replayed_cookie(self) -> None:
+        client = Client()
+        client.cookies["refresh_token"] = self.raw_token
+        self.assertEqual(client.post("/api/auth/refresh").status_code, 200)
+
+        replay_client = Client()
+        replay_client.cookies["refresh_token"] = self.raw_token
+        response = replay_client.post("/api/auth/refresh")
+
+        self.assertEqual(response.status_code, 401)
+        entry = AuthAuditLog.objects.filter(action=AuthAuditLog.Action.REFRESH).latest(
+            "created_at"
+        )
+        self.assertEqual(entry.metadata["reason"], "replayed")
+        self.assertEqual(entry.user_id, self.user.pk)
+
+
+class JWTKeyRingTests(TestCase):
+    def setUp(self) -> None:
+        self.keys_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(
+            override_settings(
+                JWT_KEYS_DIR=str(self.keys_dir),
+                JWT_KEYS_RELOAD_SECONDS=3600,
+                JWT_KEY_ACTIVATION_SECONDS=0,
+            )
+        )
+        self.user = User.objects.create_user(
+            email="signed@example.com", password="Passw0rd!"
+        )
+
+    def _add_key(self, kid: str, algorithm: str = "EdDSA") -> None:
+        (self.keys_dir / f"{kid}{PRIVATE_SUFFIX}").write_bytes(
+            generate_private_key(algorithm)
+        )
+
+    def test_tokens_are_signed_with_newest_key_and_verify_against_jwks(self) -> None:
+        self._add_key("2026-01", "ES256")
+        self._add_key("2026-02")
+
+        token = create_access_token(self.user)
+
+        header = jwt.get_unverified_header(token)
+        self.assertEqual((header["alg"], header["kid"]), ("EdDSA", "2026-02"))
+        response = Client().get("/api/auth/jwks")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Cache-Control"], "public, max-age=300")
+        document = response.json()
+        self.assertEqual(
+            {key["kid"] for key in document["keys"]}, {"2026-01", "2026-02"}
+        )
+        self.assertFalse(any("d" in key for key in document["keys"]))
+        public_key = jwt.PyJWKSet.from_dict(document)["2026-02"].key
+        self.assertEqual(
+            jwt.decode(token, public_key, algorithms=["EdDSA"])["sub"],
+            str(self.user.pk),
+        )
+
+        cached = Client().get("/api/auth/jwks", HTTP_IF_NONE_MATCH=response["ETag"])
+        self.assertEqual(cached.status_code, 304)
+
+    def test_rotation_keeps_live_tokens_valid(self) -> None:
+        self._add_key("2026-01")
+        old_token = create_access_token(self.user)
+
+        # Picked up through the unknown-kid rescan despite the long reload interval.
+        self._add_key("2026-02")
+        self.enterContext(patch("apps.auth.keys._MIN_RESCAN_SECONDS", 0))
+        other_worker_token = jwt.encode(
+            {"sub": "1", "type": "access"},
+            (self.keys_dir / "2026-02.pem").read_bytes(),
+            algorithm="EdDSA",
+            headers={"kid": "2026-02"},
+        )
+        self.assertEqual(validate_access_token(other_worker_token)["sub"], "1")
+        self.assertEqual(
+            jwt.get_unverified_header(create_access_token(self.user))["kid"], "2026-02"
+        )
+
+        # Retired: only the public half remains, which still verifies.
+        old_path = self.keys_dir / "2026-01.pem"
+        private_key = serialization.load_pem_private_key(
+            old_path.read_bytes(), password=None
+        )
+        (self.keys_dir / f"2026-01{PUBLIC_SUFFIX}").write_bytes(
+            private_key.public_key().public_bytes(
+                serialization.Encoding.PEM,
+                serialization.PublicFormat.SubjectPublicKeyInfo,
+            )
+        )
+        old_path.unlink()
+        self.assertEqual(validate_access_token(old_token)["sub"], str(self.user.pk))
+
+    @override_settings(JWT_KEY_ACTIVATION_SECONDS=300)
+    def test_new_keys_are_published_before_they_sign(self) -> None:
+        self._add_key("2026-01")
+        published = time.time() - 3600
+        os.utime(self.keys_dir / "2026-01.pem", (published, published))
+        self._add_key("2026-02")
+
+        self.assertEqual(
+            jwt.get_unverified_header(create_access_token(self.user))["kid"], "2026-01"
+        )
+        document = Client().get("/api/auth/jwks").json()
+        self.assertEqual(
+            {key["kid"] for key in document["keys"]}, {"2026-01", "2026-02"}
+        )
+
+        # Swapped in on time even though the directory is not due a rescan.
+        with patch("apps.auth.keys.time.time", return_value=time.time() + 301):
+            self.assertEqual(
+                jwt.get_unverified_header(create_access_token(self.user))["kid"],
+                "2026-02",
+            )
+
+    def test_rejects_unknown_kid_and_symmetric_tokens(self) -> None:
+        self._add_key("2026-01")
+        forged = jwt.encode(
+            {"sub": "1", "type": "access"},
+            "secret",
+            algorithm="HS256",
+            headers={"kid": "2026-01"},
+        )
+        unknown = jwt.encode(
+            {"sub": "1", "type": "access"},
+            "secret",
+            algorithm="HS256",
+            headers={"kid": "nope"},
+        )
+
+        for token in (forged, unknown):
+            with self.assertRaises(jwt.InvalidTokenError):
+                validate_access_token(token)
+
+    def test_generate_jwt_key_command(self) -> None:
+        call_command(
+            "generate_jwt_key",
+            "--kid",
+            "2026-03",
+            "--algorithm",
+            "ES256",
+            stdout=StringIO(),
+        )
+
+        path = self.keys_dir / "2026-03.pem"
+        self.assertEqual(path.stat().st_mode & 0o777, 0o600)
+        self.assertEqual(
+            jwt.get_unverified_header(create_access_token(self.user))["alg"], "ES256"
+        )
+
+
+class VerifiedTokenCacheTests(TestCase):
+    def setUp(self) -> None:
+        reset_token_cache()
+        self.user = User.objects.create_user(
+            email="cached@example.com", password="Passw0rd!"
+        )
+
+    def test_repeat_validation_skips_signature_check(self) -> None:
+        token = create_access_token(self.user)
+        with patch("apps.auth.tokens.jwt.decode", wraps=jwt.decode) as decode:
+            first = validate_access_token(token)
+            second = validate_access_token(token)
+
+        self.assertEqual(decode.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertEqual(token_cache_stats()["hits"], 1)
+
+    def test_entries_expire_with_the_token(self) -> None:
+        token = create_access_token(self.user)
+        exp = validate_access_token(token)["exp"]
+
+        # At ``exp`` the entry is gone and PyJWT makes the expiry decision.
+        with (
+            patch("apps.auth.cache.time.time", return_value=exp),
+            patch(
+                "apps.auth.tokens.jwt.decode", side_effect=jwt.ExpiredSignatureError
+            ) as decode,
+            self.assertRaises(jwt.ExpiredSignatureError),
+        ):
+            validate_access_token(token)
+        self.assertEqual(decode.call_count, 1)
+
+    def test_only_valid_access_tokens_are_cached(self) -> None:
+        refresh_like = jwt.encode(
+            {"sub": "1", "type": "refresh", "exp": 2**32},
+            settings.SECRET_KEY,
+            algorithm="HS256",
+        )
+        for _ in range(2):
+            with self.assertRaises(jwt.InvalidTokenError):
+                validate_access_token(refresh_like)
+
+        self.assertEqual(token_cache_stats()["entries"], 0)
+
+    def test_byte_ceiling_evicts_least_recently_used(self) -> None:
+        token_size = 2 * 10 + VerifiedTokenCache.ENTRY_OVERHEAD
+        cache = VerifiedTokenCache(max_bytes=2 * token_size)
+        payload = {"exp": time.time() + 60}
+        cache.set("token-0001", payload)
+        cache.set("token-0002", payload)
+        cache.get("token-0001")
+        cache.set("token-0003", payload)
+
+        self.assertIsNotNone(cache.get("token-0001"))
+        self.assertIsNone(cache.get("token-0002"))
+        self.assertEqual(cache.stats()["evictions"], 1)
+        self.assertLessEqual(cache.stats()["bytes"], cache.max_bytes)
+
+    def test_reloaded_key_ring_invalidates_entries(self) -> None:
+        keys_dir = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        (keys_dir / f"2026-01{PRIVATE_SUFFIX}").write_bytes(
+            generate_private_key("EdDSA")
+        )
+        self.enterContext(
+            override_settings(JWT_KEYS_DIR=str(keys_dir), JWT_KEYS_RELOAD_SECONDS=0)
+        )
+        token = create_access_token(self.user)
+        validate_access_token(token)
+
+        (keys_dir / f"2026-01{PRIVATE_SUFFIX}").unlink()
+        with self.assertRaises(jwt.InvalidTokenError):
+            validate_access_token(token)
+
+
+class ApiMetricsTests(TestCase):
+    def setUp(self) -> None:
+        reset_token_cache()
+        self.user = User.objects.create_user(
+            email="metrics@example.com", password="Passw0rd!"
+        )
+
+    def test_records_request_status_and_database_cost(self) -> None:
+        labels = {"route": "api/auth/me", "method": "GET"}
+        requests_before = _metric("assets_http_requests_total", status="200", **labels)
+        queries_before = _metric("assets_http_request_db_queries_sum", **labels)
+        verified_before = _metric(
+            "assets_auth_jwt_verify_seconds_count", result="verified"
+        )
+
+        token = create_access_token(self.user)
+        reset_principal_cache()
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(
+                "/api/auth/me", HTTP_AUTHORIZATION=f"Bearer {token}"
+            )
+            queries = len(captured)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertGreater(queries, 0)
+        self.assertEqual(
+            _metric("assets_http_requests_total", status="200", **labels),
+            requests_before + 1,
+        )
+        self.assertEqual(
+            _metric("assets_http_request_db_queries_sum", **labels),
+            queries_before + queries,
+        )
+        self.assertEqual(
+            _metric("assets_auth_jwt_verify_seconds_count", result="verified"),
+            verified_before + 1,
+        )
+
+    @override_settings(ROOT_URLCONF=__name__)
+    def test_labels_use_the_route_template(self) -> None:
+        before = _metric(
+            "assets_http_requests_total",
+            route="items/<int:item_id>",
+            method="GET",
+            status="204",
+        )
+        for item_id in (1, 2, 3):
+            self.client.get(f"/items/{item_id}?page={item_id}")
+        self.client.get("/no-such-path/42")
+
+        self.assertEqual(
+            _metric(
+                "assets_http_requests_total",
+                route="items/<int:item_id>",
+                method="GET",
+                status="204",
+            ),
+            before + 3,
+        )
+        self.assertIsNone(
+            REGISTRY.get_sample_value(
+                "assets_http_requests_total",
+                {"route": "items/1", "method": "GET", "status": "204"},
+            )
+        )
+        self.assertGreater(
+            _metric(
+                "assets_http_requests_total",
+                route=UNMATCHED_ROUTE,
+                method="GET",
+                status="404",
+            ),
+            0,
+        )
+
+    def test_password_hashing_is_timed(self) -> None:
+        before = _metric("assets_auth_password_hash_seconds_count", operation="verify")
+        pool = PasswordHashingPool(
+            workers=0, max_concurrency=1, queue_timeout=1, retry_after=1
+        )
+        pool.verify("Passw0rd!", self.user.password)
+
+        self.assertEqual(
+            _metric("assets_auth_password_hash_seconds_count", operation="verify"),
+            before + 1,
+        )
+
+    def test_metrics_endpoint_serves_prometheus_text(self) -> None:
+        self.client.get("/api/health")
+        response = self.client.get("/metrics")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response["Content-Type"].startswith("text/plain"))
+        self.assertIn(
+            b'assets_http_requests_total{method="GET",route="api/health",status="200"}',
+            response.content,
+        )
+
+
+@modify_settings(MIDDLEWARE={"prepend": "assets_backend.profiling.ProfilingMiddleware"})
+class RequestProfilingTests(TestCase):
+    def setUp(self) -> None:
+        self.profiles = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        self.enterContext(
+            override_settings(
+                PROFILING_DIR=self.profiles,
+                PROFILING_SAMPLE_RATE=0,
+                PROFILING_MAX_FILES=2,
+            )
+        )
+        self.admin = User.objects.create_user(
+            email="ops@example.com", role=User.Role.ADMIN
+        )
+        self.user = User.objects.create_user(email="member@example.com")
+
+    def _me(self, user: User, **headers: str):
+        return self.client.get(
+            "/api/auth/me",
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(user)}",
+            **headers,
+        )
+
+    def _profiled_health(self, token: str):
+        return self.client.get(
+            "/api/health", HTTP_AUTHORIZATION=f"Bearer {token}", HTTP_X_PROFILE="1"
+        )
+
+    # The principal cache would otherwise answer the view's lookup without a query.
+    @override_settings(AUTH_PRINCIPAL_CACHE_ENABLED=False)
+    def test_admin_header_adds_server_timing_and_profile(self) -> None:
+        response = self._me(self.admin, HTTP_X_PROFILE="1")
+
+        self.assertEqual(response.status_code, 200)
+        timings = {
+            entry.split(";")[0]: entry
+            for entry in response["Server-Timing"].split(", ")
+        }
+        self.assertEqual(set(timings), {"auth", "db", "serialize", "view", "total"})
+        self.assertIn('desc="', timings["db"])
+        self.assertEqual(len(list(self.profiles.glob("*-GET-api_auth_me-*.prof"))), 1)
+
+    def test_header_is_ignored_for_non_admins_and_unprofiled_requests(self) -> None:
+        self.assertNotIn("Server-Timing", self._me(self.user, HTTP_X_PROFILE="1"))
+        self.assertNotIn("Server-Timing", self._me(self.admin))
+        self.assertEqual(list(self.profiles.iterdir()), [])
+
+    def test_header_is_ignored_once_the_admin_is_demoted_or_deactivated(self) -> None:
+        token = create_access_token(self.admin)
+        User.objects.filter(pk=self.admin.pk).update(role=User.Role.USER)
+        invalidate_principal(self.admin.pk)
+        self.assertNotIn("Server-Timing", self._profiled_health(token))
+
+        User.objects.filter(pk=self.admin.pk).update(
+            role=User.Role.ADMIN, is_active=False
+        )
+        invalidate_principal(self.admin.pk)
+        self.assertNotIn("Server-Timing", self._profiled_health(token))
+
+        User.objects.filter(pk=self.admin.pk).update(is_active=True)
+        invalidate_principal(self.admin.pk)
+        self.assertIn("Server-Timing", self._profiled_health(token))
+
+    @override_settings(AUTH_STATELESS_MODE=True)
+    def test_stateless_header_requires_a_current_epoch(self) -> None:
+        token = create_access_token(self.admin)
+        self.assertIn("Server-Timing", self._profiled_health(token))
+
+        self.admin.role = User.Role.USER
+        self.admin.save(update_fields=["role"])
+        self.assertNotIn("Server-Timing", self._profiled_health(token))
+
+    def test_sampled_profiles_are_rotated(self) -> None:
+        with override_settings(PROFILING_SAMPLE_RATE=1.0):
+            client = Client()
+            for _ in range(3):
+                self.assertIn("Server-Timing", client.get("/api/health"))
+
+        self.assertEqual(len(list(self.profiles.glob("*.prof"))), 2)
+
+
+@override_settings(
+    DATABASE_READ_REPLICAS=["replica1", "replica2"], DATABASE_REPLICA_PIN_SECONDS=5
+)
+class ReplicaRoutingTests(SimpleTestCase):
+    def setUp(self) -> None:
+        self.factory = RequestFactory()
+        self.router = PrimaryReplicaRouter()
+
+    def _route(self, request, *, write: bool = False) -> tuple[list[str], HttpResponse]:
+        seen = []
+
+        def view(request):
+            seen.append(self.router.db_for_read(User))
+            if write:
+                self.router.db_for_write(User)
+            seen.append(self.router.db_for_read(User))
+            return HttpResponse()
+
+        return seen, ReplicaRoutingMiddleware(view)(request)
+
+    def test_safe_requests_read_from_replicas_until_they_write(self) -> None:
+        seen, response = self._route(self.factory.get("/api/auth/me"), write=True)
+
+        self.assertIn(seen[0], {"replica1", "replica2"})
+        self.assertEqual(seen[1], "default")
+        self.assertEqual(response.cookies[PIN_COOKIE]["max-age"], 5)
+
+    def test_recent_writers_stay_on_the_primary(self) -> None:
+        request = self.factory.get("/api/auth/me")
+        request.COOKIES[PIN_COOKIE] = str(time.time() + 5)
+        seen, response = self._route(request)
+        self.assertEqual(seen, ["default", "default"])
+        self.assertNotIn(PIN_COOKIE, response.cookies)
+
+        request.COOKIES[PIN_COOKIE] = str(time.time() - 1)
+        seen, _response = self._route(request)
+        self.assertIn(seen[0], {"replica1", "replica2"})
+
+    def test_unsafe_requests_transactions_and_non_request_code_use_the_primary(
+        self,
+    ) -> None:
+        seen, _response = self._route(self.factory.post("/api/auth/login"))
+        self.assertEqual(seen, ["default", "default"])
+
+        with patch.object(connection, "in_atomic_block", True):
+            seen, _response = self._route(self.factory.get("/api/auth/me"))
+        self.assertEqual(seen, ["default", "default"])
+
+        self.assertEqual(self.router.db_for_read(User), "default")
+        self.assertFalse(self.router.allow_migrate("replica1", "assets_auth"))
+
+
+class JSONRenderingTests(TestCase):
+    def test_fast_paths_match_the_schema_rendering(self) -> None:
+        user = User.objects.create_user(
+            email="render@example.com", first_name="Ren", last_name="Der"
+        )
+        expires_at = timezone.now().replace(microsecond=987654)
+        tokens = {
+            "access_token": "a",
+            "refresh_token": "r",
+            "expires_at": expires_at,
+            "role": user.role,
+        }
+        schema = UserResponse(
+            id=str(user.pk), email=user.email, full_name=user.full_name, role=user.role
+        )
+
+        for fast, slow in (
+            (_token_payload(**tokens), LoginResponse(**tokens).dict()),
+            (_user_payload(user), schema.dict(by_alias=True)),
+            (_user_payload(user, by_alias=False), schema.dict()),
+        ):
+            self.assertEqual(
+                dumps(fast).decode(),
+                json.dumps(slow, cls=NinjaJSONEncoder, separators=(",", ":")),
+            )
+
+    def test_api_parses_and_renders_with_orjson(self) -> None:
+        response = self.client.post(
+            "/api/auth/login", "{not json", content_type="application/json"
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {"detail": "Cannot parse request body"})
+
+        response = self.client.post(
+            "/api/auth/login",
+            {"email": "nobody@example.com"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 422)
+        self.assertEqual(
+            response.json()["detail"][0]["loc"], ["body", "payload", "password"]
+        )
+
+
+class UserImportTests(TestCase):
+    def setUp(self) -> None:
+        self.directory = Path(self.enterContext(tempfile.TemporaryDirectory()))
+        User.objects.create_user(email="taken@example.com", password="Passw0rd!")
+        self.encoded = make_password("Hashed1!")
+
+    def _importer(self, path: Path, **kwargs) -> UserImporter:
+        return UserImporter(
+            path,
+            import_format=kwargs.pop("import_format", "csv"),
+            reject_path=self.directory / "rejects.jsonl",
+            checkpoint_path=self.directory / "checkpoint.json",
+            **kwargs,
+        )
+
+    def _rejects(self) -> list[dict]:
+        return [
+            json.loads(line)
+            for line in (self.directory / "rejects.jsonl").read_text().splitlines()
+        ]
+
+    def test_csv_import_hashes_passwords_and_rejects_bad_rows(self) -> None:
+        path = self.directory / "users.csv"
+        path.write_text(
+            "email,first_name,last_name,role,is_active,password,password_hash\n"
+            "plain@example.com,Ada,Lovelace,admin,true,Plain123!,\n"
+            f'hashed@example.com,"Smith, Jr",,user,0,,{self.encoded}\n'
+            "taken@example.com,,,user,,Other123!,\n"
+            "plain@example.com,,,user,,Again123!,\n"
+            "not-an-email,,,user,,x,\n"
+            "bad-hash@example.com,,,user,,,md6$nope\n"
+        )
+
+        report = self._importer(path, batch_size=100).run()
+
+        self.assertEqual((report.imported, report.rejected), (2, 4))
+        plain = User.objects.get(email="plain@example.com")
+        self.assertTrue(plain.check_password("Plain123!"))
+        self.assertEqual(
+            (plain.role, plain.is_staff, plain.first_name),
+            (User.Role.ADMIN, True, "Ada"),
+        )
+        hashed = User.objects.get(email="hashed@example.com")
+        self.assertEqual(
+            (hashed.password, hashed.is_active, hashed.first_name),
+            (self.encoded, False, "Smith, Jr"),
+        )
+        rejects = self._rejects()
+        self.assertEqual(
+            [(reject["line"], reject["reason"]) for reject in rejects],
+            [
+                (4, "email already exists"),
+                (5, "duplicate email in file"),
+                (6, "invalid email"),
+                (7, "unknown password hash format"),
+            ],
+        )
+        self.assertFalse(any("password" in reject["record"] for reject in rejects))
+        self.assertFalse((self.directory / "checkpoint.json").exists())
+
+    def test_csv_rows_with_the_wrong_field_count_are_malformed(self) -> None:
+        path = self.directory / "users.csv"
+        path.write_text(
+            "email,first_name\nshort@example.com\nlong@example.com,Ada,extra\nok@example.com,Ada\n"
+        )
+
+        report = self._importer(path).run()
+
+        self.assertEqual((report.imported, report.rejected), (1, 2))
+        self.assertEqual(
+            [(reject["line"], reject["reason"]) for reject in self._rejects()],
+            [(2, "malformed record"), (3, "malformed record")],
+        )
+
+    def test_interrupted_import_resumes_after_last_batch(self) -> None:
+        path = self.directory / "users.jsonl"
+        records = [
+            {"email": f"user{index}@example.com", "password_hash": self.encoded}
+            for index in range(5)
+        ]
+        path.write_text(
+            "\n".join(json.dumps(record) for record in records) + "\n{broken\n"
+        )
+
+        def interrupt(batch) -> None:
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            self._importer(
+                path, import_format="jsonl", batch_size=2, on_batch=interrupt
+            ).run()
+        self.assertEqual(User.objects.filter(email__startswith="user").count(), 2)
+
+        report = self._importer(path, import_format="jsonl", batch_size=2).run(
+            resume=True
+        )
+
+        self.assertEqual((report.imported, report.rejected), (5, 1))
+        self.assertEqual(User.objects.filter(email__startswith="user").count(), 5)
+        self.assertEqual(
+            [(reject["line"], reject["reason"]) for reject in self._rejects()],
+            [(6, "malformed record")],
+        )
+
+    def test_batch_committed_before_its_checkpoint_counts_as_imported_on_resume(
+        self,
+    ) -> None:
+        path = self.directory / "users.jsonl"
+        records = [
+            {"email": f"user{index}@example.com", "password_hash": self.encoded}
+            for index in range(3)
+        ]
+        records += [{"email": "taken@example.com"}, {"email": "not-an-email"}]
+        path.write_text("\n".join(json.dumps(record) for record in records) + "\n")
+        save = Checkpoint.save
+        committed = []
+
+        def crash_on_second_commit(checkpoint, checkpoint_path) -> None:
+            if not checkpoint.pending:
+                committed.append(checkpoint)
+                if len(committed) > 1:
+                    raise KeyboardInterrupt
+            save(checkpoint, checkpoint_path)
+
+        with (
+            patch.object(Checkpoint, "save", crash_on_second_commit),
+            self.assertRaises(KeyboardInterrupt),
+        ):
+            self._importer(path, import_format="jsonl", batch_size=2).run()
+        self.assertEqual(User.objects.filter(email__startswith="user").count(), 3)
+        self.assertEqual([reject["line"] for reject in self._rejects()], [4])
+
+        report = self._importer(path, import_format="jsonl", batch_size=2).run(
+            resume=True
+        )
+
+        self.assertEqual((report.imported, report.rejected), (3, 2))
+        self.assertEqual(
+            [(reject["line"], reject["reason"]) for reject in self._rejects()],
+            [(4, "email already exists"), (5, "invalid email")],
+        )
+
+    def test_command_refuses_stale_checkpoint_without_resume(self) -> None:
+        path = self.directory / "users.csv"
+        path.write_text("email,password_hash\nnew@example.com," + self.encoded + "\n")
+        call_command("import_users", str(path), "--workers", "0", stdout=StringIO())
+        self.assertTrue(User.objects.filter(email="new@example.com").exists())
+
+        Path(f"{path}.checkpoint.json").write_text("{}")
+        with self.assertRaises(CommandError):
+            call_command("import_users", str(path), "--workers", "0", stdout=StringIO())
+
+
+class PurgeRefreshTokensTests(TestCase):
+    def setUp(self) -> None:
+        self.user = User.objects.create_user(
+            email="purge@example.com", password="Passw0rd!"
+        )
+        self.now = timezone.now()
+
+    def _token(self, *, expires_in: timedelta, revoked: bool = False) -> RefreshToken:
+        token, _raw = RefreshToken.create_for_user(
+            self.user, lifetime=timedelta(days=14)
+        )
+        RefreshToken.objects.filter(pk=token.pk).update(
+            expires_at=self.now + expires_in, revoked=revoked
+        )
+        return token
+
+    def test_purges_old_expired_and_revoked_tokens_in_chunks(self) -> None:
+        expired = [self._token(expires_in=timedelta(days=-2)) for _ in range(5)]
+        old_revoked = self._token(expires_in=timedelta(days=10), revoked=True)
+        recently_expired = self._token(expires_in=timedelta(hours=-1))
+        recently_revoked = self._token(
+            expires_in=timedelta(days=13, hours=12), revoked=True
+        )
+        live = self._token(expires_in=timedelta(days=1))
+        chunks: list[PurgeChunk] = []
+
+        report = purge_refresh_tokens(
+            grace=timedelta(hours=24),
+            batch_size=2,
+            pause=0,
+            now=self.now,
+            on_chunk=chunks.append,
+        )
+
+        self.assertEqual(report.rows, len(expired) + 1)
+        self.assertEqual([chunk.rows for chunk in chunks], [2, 2, 2])
+        self.assertFalse(RefreshToken.objects.filter(pk=old_revoked.pk).exists())
+        self.assertEqual(
+            set(RefreshToken.objects.values_list("pk", flat=True)),
+            {recently_expired.pk, recently_revoked.pk, live.pk},
+        )
+
+    def test_command_reports_rows_removed(self) -> None:
+        self._token(expires_in=timedelta(days=-2))
+        out = StringIO()
+
+        call_command("purge_refresh_tokens", "--pause-ms=0", "-v2", stdout=out)
+
+        self.assertIn("Deleted 1 rows", out.getvalue())
+        self.assertIn("Purged 1 refresh tokens in 1 chunks", out.getvalue())
+        self.assertFalse(RefreshToken.objects.exists())
+
+
+class SyntheticDataTests(TestCase):
+    config = SyntheticConfig(
+        users=40,
+        seed=7,
+        refresh_tokens_per_user=3,
+        audit_events_per_user=5,
+        batch_size=16,
+    )
+
+    def _snapshot(self) -> dict[str, list[tuple]]:
+        return {
+            "users": list(
+                User.objects.order_by("pk").values_list(
+                    "pk", "email", "role", "is_active", "date_joined"
+                )
+            ),
+            "refresh_tokens": list(
+                RefreshToken.objects.order_by("pk").values_list(
+                    "user_id", "token_hash", "created_at", "revoked"
+                )
+            ),
+            "audit_log": list(
+                AuthAuditLog.objects.order_by("pk").values_list(
+                    "user_id", "action", "successful", "created_at"
+                )
+            ),
+        }
+
+    def _generate(
+        self, config: SyntheticConfig
+    ) -> tuple[SyntheticReport, dict[str, list[tuple]]]:
+        """Generate *config*, snapshot the rows, then roll them back."""
+
+        with transaction.atomic():
+            report = generate_synthetic_data(config)
+            snapshot = self._snapshot()
+            transaction.set_rollback(True)
+        return report, snapshot
+
+    def test_same_seed_generates_identical_rows(self) -> None:
+        report, first = self._generate(self.config)
+        _report, second = self._generate(self.config)
+
+        self.assertEqual(second, first)
+        self.assertEqual(report.rows["users"], 40)
+        self.assertEqual(report.rows["refresh_tokens"], len(first["refresh_tokens"]))
+        self.assertEqual(report.rows["audit_log"], len(first["audit_log"]))
+        # Every user registers once, and histories stay before the anchor.
+        self.assertEqual(
+            sum(
+                1
+                for row in first["audit_log"]
+                if row[1] == AuthAuditLog.Action.REGISTER
+            ),
+            40,
+        )
+        self.assertTrue(all(row[3] <= self.config.anchor for row in first["audit_log"]))
+
+        _report, other = self._generate(
+            SyntheticConfig(users=40, seed=8, audit_events_per_user=5)
+        )
+        self.assertNotEqual(other["users"], first["users"])
+
+    def test_users_share_a_working_password_and_sequences_continue(self) -> None:
+        generate_synthetic_data(
+            SyntheticConfig(users=3, refresh_tokens_per_user=0, audit_events_per_user=0)
+        )
+
+        self.assertEqual(len(set(User.objects.values_list("password", flat=True))), 1)
+        self.assertTrue(
+            User.objects.filter(is_active=True)
+            .first()
+            .check_password(self.config.password)
+        )
+        created = User.objects.create_user(email="after@example.com")
+        self.assertGreater(
+            created.pk, User.objects.exclude(pk=created.pk).order_by("-pk")[0].pk
+        )
+
+    def test_command_refuses_to_seed_twice(self) -> None:
+        out = StringIO()
+        call_command("seed_synthetic_data", "--users", "5", stdout=out)
+
+        self.assertIn("Generated 5 users", out.getvalue())
+        self.assertEqual(
+            User.objects.filter(email__endswith=f"@{SYNTHETIC_EMAIL_DOMAIN}").count(), 5
+        )
+        with self.assertRaises(CommandError):
+            call_command("seed_synthetic_data", "--users", "5", stdout=StringIO())
+
+
+class AuditLogRetentionTests(TestCase):
+    def setUp(self) -> None:
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.archive_dir = Path(tmp.name)
+
+    def _read_archive(self, path: Path) -> list[dict]:
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            return [json.loads(line) for line in handle]
+
+    @skipIf(
+        connection.vendor == "postgresql",
+        "partitioned tables are archived per partition",
+    )
+    def test_command_archives_and_deletes_old_rows(self) -> None:
+        now = timezone.now()
+        old_entries = [
+            AuthAuditLog.objects.create(
+                email="old@example.com",
+                action="login",
+                created_at=now - timedelta(days=age),
+            )
+            for age in (400, 500)
+        ]
+        recent = AuthAuditLog.objects.create(
+            email="new@example.com", action="login", metadata={"k": "v"}
+        )
+
+        call_command(
+            "audit_log_retention",
+            "--months=12",
+            f"--archive-dir={self.archive_dir}",
+            "--batch-size=1",
+            stdout=StringIO(),
+        )
+
+        self.assertEqual(
+            list(AuthAuditLog.objects.values_list("pk", flat=True)), [recent.pk]
+        )
+        (archive,) = self.archive_dir.iterdir()
+        rows = self._read_archive(archive)
+        self.assertEqual(
+            [row["email"] for row in rows], ["old@example.com", "old@example.com"]
+        )
+        self.assertEqual(
+            [datetime.fromisoformat(row["created_at"]) for row in rows],
+            sorted(entry.created_at for entry in old_entries),
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "requires PostgreSQL partitioning")
+    def test_partitions_are_archived_then_dropped(self) -> None:
+        self.assertTrue(is_partitioned())
+        entry = AuthAuditLog.objects.create(
+            email="p@example.com", action="login", metadata={"k": "v"}
+        )
+        # Outside the test transaction the deferred FK check has already run.
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        next_month = add_months(month_start(timezone.now()), 1)
+        legacy = next(p for p in list_partitions() if p.name.endswith("_legacy"))
+        self.assertEqual(legacy.upper, next_month)
+
+        results = archive_partitions(before=next_month, directory=self.archive_dir)
+
+        self.assertEqual([(r.name, r.rows) for r in results], [(legacy.name, 1)])
+        self.assertEqual(self._read_archive(results[0].path)[0]["metadata"], {"k": "v"})
+        self.assertFalse(AuthAuditLog.objects.filter(pk=entry.pk).exists())
+        self.assertNotIn(legacy.name, [p.name for p in list_partitions()])
+
+        created = ensure_partitions(start=timezone.now(), months_ahead=0)
+        self.assertEqual(len(created), 1)
+        AuthAuditLog.objects.create(email="p@example.com", action="login")
+
+    @skipUnless(connection.vendor == "postgresql", "requires PostgreSQL partitioning")
+    def test_new_partitions_take_over_rows_from_the_default_partition(self) -> None:
+        month = add_months(month_start(timezone.now()), 24)
+        stray = AuthAuditLog.objects.create(
+            email="later@example.com", action="login", created_at=month
+        )
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+
+        (name,) = ensure_partitions(start=month, months_ahead=0)
+
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT tableoid::regclass::text FROM {AuthAuditLog._meta.db_table} WHERE id = %s",
+                [stray.pk],
+            )
+            self.assertEqual(cursor.fetchone()[0], name)
+
+    @skipUnless(connection.vendor == "postgresql", "requires PostgreSQL partitioning")
+    def test_failed_archive_leaves_the_partition_attached(self) -> None:
+        entry = AuthAuditLog.objects.create(email="p@example.com", action="login")
+        with connection.cursor() as cursor:
+            cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        next_month = add_months(month_start(timezone.now()), 1)
+        names = [p.name for p in list_partitions()]
+
+        with (
+            patch(
+                "apps.auth.partitions._ArchiveWriter.write",
+                side_effect=OSError("disk full"),
+            ),
+            self.assertRaises(OSError),
+        ):
+            archive_partitions(before=next_month, directory=self.archive_dir)
+
+        self.assertEqual([p.name for p in list_partitions()], names)
+        self.assertTrue(AuthAuditLog.objects.filter(pk=entry.pk).exists())
+        self.assertEqual(list(self.archive_dir.iterdir()), [])
+
+
+class AuditLogApiTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.admin = User.objects.create_user(
+            email="auditor@example.com", password="Passw0rd!", role=User.Role.ADMIN
+        )
+        self.member = User.objects.create_user(
+            email="member@example.com", password="Passw0rd!"
+        )
+        self.client = Client(
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(self.admin)}"
+        )
+        start = timezone.now() - timedelta(hours=1)
+        # Pairs share a timestamp so pages must break ties on id.
+        AuthAuditLog.objects.bulk_create(
+            AuthAuditLog(
+                user=self.member if index % 2 else None,
+                email=self.member.email if index % 2 else "other@example.com",
+                action=AuthAuditLog.Action.LOGIN,
+                successful=index % 3 == 0,
+                created_at=start + timedelta(seconds=index // 2),
+            )
+            for index in range(25)
+        )
+
+    def _walk(self, **params) -> list[dict]:
+        items: list[dict] = []
+        cursor = None
+        while True:
+            query = {**params, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get("/api/auth/audit-logs", query)
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            items.extend(body["items"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return items
+
+    def test_cursor_pages_cover_every_row_once_newest_first(self) -> None:
+        items = self._walk(limit=4, action="login")
+
+        expected = list(
+            AuthAuditLog.objects.filter(action="login")
+            .order_by("-created_at", "-id")
+            .values_list("id", flat=True)
+        )
+        self.assertEqual([item["id"] for item in items], expected)
+
+    def test_filters_combine(self) -> None:
+        items = self._walk(limit=3, user_id=self.member.pk, successful="true")
+
+        expected = AuthAuditLog.objects.filter(user=self.member, successful=True)
+        self.assertEqual(
+            {item["id"] for item in items}, set(expected.values_list("id", flat=True))
+        )
+        self.assertTrue(
+            all(
+                item["user_id"] == self.member.pk and item["successful"]
+                for item in items
+            )
+        )
+
+    def test_time_range_and_email_filters(self) -> None:
+        newest = AuthAuditLog.objects.filter(email=self.member.email).latest(
+            "created_at"
+        )
+        response = self.client.get(
+            "/api/auth/audit-logs",
+            {"email": self.member.email, "since": newest.created_at.isoformat()},
+        )
+
+        self.assertEqual([item["id"] for item in response.json()["items"]], [newest.pk])
+
+    def test_page_query_uses_keyset_not_offset(self) -> None:
+        response = self.client.get("/api/auth/audit-logs", {"limit": 5})
+        cursor = response.json()["next_cursor"]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get("/api/auth/audit-logs", {"limit": 5, "cursor": cursor})
+
+        page_sql = queries.captured_queries[-1]["sql"]
+        self.assertIn("LIMIT 6", page_sql)
+        self.assertNotIn("OFFSET", page_sql)
+
+    def test_rejects_bad_cursor_and_non_admins(self) -> None:
+        response = self.client.get("/api/auth/audit-logs", {"cursor": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+        member_client = Client(
+            HTTP_AUTHORIZATION=f"Bearer {create_access_token(self.member)}"
+        )
+        self.assertEqual(member_client.get("/api/auth/audit-logs").status_code, 403)
+
+
+@override_settings(ROOT_URLCONF=__name__)
+class AsyncAuthApiTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.password = "S3curePass!"
+        self.user = User.objects.create_user(
+            email="async@example.com",
+            password=self.password,
+            first_name="Async",
+            last_name="User",
+        )
+
+    async def _login(self) -> None:
+        response = await self.async_client.post(
+            "/api/auth/login",
+            {"email": self.user.email, "password": self.password},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 200)
+
+    async def test_login_and_me(self) -> None:
+        await self._login()
+
+        response = await self.async_client.get("/api/auth/me")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["full_name"], "Async User")
+
+    async def test_login_rejects_invalid_credentials(self) -> None:
+        response = await self.async_client.post(
+            "/api/auth/login",
+            {"email": self.user.email, "password": "wrong"},
+            content_type="application/json",
+        )
+        self.assertEqual(response.status_code, 401)
+
+    async def test_refresh_rotates_and_logout_revokes(self) -> None:
+        await self._login()
+
+        refresh_response = await self.async_client.post("/api/auth/refresh")
+        self.assertEqual(refresh_response.status_code, 200)
+        self.assertEqual(
+            await RefreshToken.objects.filter(user=self.user, revoked=True).acount(), 1
+        )
+
+        logout_response = await self.async_client.post("/api/auth/logout")
+        self.assertEqual(logout_response.status_code, 204)
+        self.assertFalse(
+            await RefreshToken.objects.filter(user=self.user, revoked=False).aexists()
+        )
+
+    @override_settings(AUTH_STATELESS_MODE=True)
+    async def test_me_loads_names_for_stateless_principals(self) -> None:
+        await self._login()
+
+        response = await self.async_client.get("/api/auth/me")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["full_name"], "Async User")
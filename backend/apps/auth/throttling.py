@@ -0,0 +1,229 @@
+"""Sliding-window login throttling that runs before any password hashing."""
+
+from __future__ import annotations
+
+import hashlib
+import logging
+import math
+import threading
+import time
+from typing import Any, NamedTuple
+
+from django.conf import settings
+from django.core.cache import caches
+
+from .cache import LocalTTLCache
+from .errors import LoginThrottled
+
+logger = logging.getLogger(__name__)
+
+
+class ThrottleRule(NamedTuple):
+    scope: str
+    limit: int
+    window: int
+
+
+class LoginThrottle:
+    """Approximate sliding-window counters in the shared cache.
+
+    Each rule keeps one counter per fixed window; the rate is estimated as the
+    current window's count plus the previous window's count weighted by how
+    much of it still overlaps the sliding window. An attempt increments its
+    current-window counters first and compares the values the cache returns,
+    so parallel attempts never all see the same count; a rejected attempt
+    gives its increments back. If the shared cache is unreachable the
+    counters fall back to this process.
+    """
+
+    def __init__(
+        self,
+        *,
+        rules: list[ThrottleRule],
+        cache_alias: str,
+        local_maxsize: int = 100_000,
+    ) -> None:
+        self.rules = rules
+        self.cache_alias = cache_alias
+        longest = max((rule.window for rule in rules), default=1)
+        self._local = LocalTTLCache(maxsize=local_maxsize, ttl=2 * longest)
+        self._local_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "passed": 0,
+            "throttled": 0,
+            "fallback": 0,
+            **{f"throttled_{rule.scope}": 0 for rule in rules},
+        }
+
+    def stats(self) -> dict[str, int]:
+        with self._stats_lock:
+            return dict(self._stats)
+
+    def reset(self) -> None:
+        self._local.clear()
+        with self._stats_lock:
+            for name in self._stats:
+                self._stats[name] = 0
+
+    def _count(self, *names: str) -> None:
+        with self._stats_lock:
+            for name in names:
+                self._stats[name] += 1
+
+    def check(self, identities: dict[str, str]) -> None:
+        """Record an attempt for each scope's identity or raise ``LoginThrottled``."""
+
+        now = time.time()
+        windows = []
+        for rule in self.rules:
+            identity = identities.get(rule.scope)
+            if not identity or rule.limit <= 0:
+                continue
+            index, offset = divmod(now, rule.window)
+            base = f"auth:throttle:{rule.scope}:{_digest(identity)}"
+            windows.append(
+                (
+                    rule,
+                    f"{base}:{int(index) - 1}",
+                    f"{base}:{int(index)}",
+                    offset / rule.window,
+                )
+            )
+
+        previous_counts = self._get_many([previous for _, previous, _, _ in windows])
+        currents = [
+            self._incr(current_key, 2 * rule.window)
+            for rule, _, current_key, _ in windows
+        ]
+        for (rule, previous_key, _current_key, fraction), current in zip(
+            windows, currents, strict=True
+        ):
+            previous = previous_counts.get(previous_key, 0)
+            # ``current`` already includes this attempt.
+            if previous * (1 - fraction) + current - 1 >= rule.limit:
+                for _rule, _previous_key, current_key, _fraction in windows:
+                    self._decr(current_key)
+                self._count("throttled", f"throttled_{rule.scope}")
+                raise LoginThrottled(
+                    retry_after=_retry_after(rule, previous, current - 1, fraction)
+                )
+        self._count("passed")
+
+    def _get_many(self, keys: list[str]) -> dict[str, int]:
+        if not keys:
+            return {}
+        try:
+            return caches[self.cache_alias].get_many(keys)
+        except Exception:
+            logger.warning(
+                "Login throttle cache read failed; using in-process counters.",
+                exc_info=True,
+            )
+            self._count("fallback")
+        values = {key: self._local.get(key) for key in keys}
+        return {key: value for key, value in values.items() if value is not None}
+
+    def _incr(self, key: str, timeout: int) -> int:
+        """Atomically add one to *key* and return the new count."""
+
+        try:
+            cache = caches[self.cache_alias]
+            if cache.add(key, 1, timeout):
+                return 1
+            return cache.incr(key)
+        except ValueError:
+            # Expired between ``add`` and ``incr``.
+            caches[self.cache_alias].set(key, 1, timeout)
+            return 1
+        except Exception:
+            logger.warning(
+                "Login throttle cache write failed; using in-process counters.",
+                exc_info=True,
+            )
+            self._count("fallback")
+        with self._local_lock:
+            count = (self._local.get(key) or 0) + 1
+            self._local.set(key, count)
+            return count
+
+    def _decr(self, key: str) -> None:
+        try:
+            caches[self.cache_alias].decr(key)
+            return
+        except ValueError:
+            # Already expired; nothing to give back.
+            return
+        except Exception:
+            logger.warning(
+                "Login throttle cache write failed; using in-process counters.",
+                exc_info=True,
+            )
+            self._count("fallback")
+        with self._local_lock:
+            count = self._local.get(key)
+            if count:
+                self._local.set(key, count - 1)
+
+
+def _digest(identity: str) -> str:
+    # Keeps addresses out of cache keys and bounds the key length.
+    return hashlib.sha256(identity.encode("utf-8")).hexdigest()[:32]
+
+
+def _retry_after(
+    rule: ThrottleRule, previous: int, current: int, fraction: float
+) -> int:
+    """Seconds until the estimated rate drops below the limit again."""
+
+    if current < rule.limit and previous:
+        wait = rule.window * (1 - fraction - (rule.limit - current) / previous)
+    else:
+        # Only once this window has rolled over and partly slid out.
+        wait = rule.window * (1 - fraction) + rule.window * (
+            1 - rule.limit / max(current, 1)
+        )
+    return max(math.ceil(wait), 1)
+
+
+def normalize_email(email: str) -> str:
+    return email.strip().lower()
+
+
+_throttle: LoginThrottle | None = None
+_throttle_lock = threading.Lock()
+
+
+def get_login_throttle() -> LoginThrottle:
+    global _throttle  # noqa: PLW0603 - process-wide singleton
+    if _throttle is None:
+        with _throttle_lock:
+            if _throttle is None:
+                _throttle = LoginThrottle(
+                    rules=[
+                        ThrottleRule(
+                            "ip",
+                            settings.AUTH_LOGIN_THROTTLE_IP_LIMIT,
+                            settings.AUTH_LOGIN_THROTTLE_IP_WINDOW,
+                        ),
+                        ThrottleRule(
+                            "email",
+                            settings.AUTH_LOGIN_THROTTLE_EMAIL_LIMIT,
+                            settings.AUTH_LOGIN_THROTTLE_EMAIL_WINDOW,
+                        ),
+                    ],
+                    cache_alias=settings.AUTH_LOGIN_THROTTLE_CACHE_ALIAS,
+                )
+    return _throttle
+
+
+def check_login_attempt(ip_address: str, email: str) -> None:
+    """Raise ``LoginThrottled`` when this IP or email has exceeded its rate."""
+
+    if not settings.AUTH_LOGIN_THROTTLE_ENABLED:
+        return
+    get_login_throttle().check({"ip": ip_address, "email": normalize_email(email)})
+
+
+def login_throttle_stats() -> dict[str, Any]:
+    return get_login_throttle().stats()
@@ -1,16 +1,32 @@
 from __future__ import annotations
 
-from datetime import timedelta
-from typing import Any
+import hashlib
+import time
+from datetime import datetime, timedelta
+from typing import Any, NamedTuple
 
 import jwt
 from django.conf import settings
+from django.db import connections, router, transaction
 from django.utils import timezone
 
-from .models import User
+from assets_backend.metrics import JWT_VERIFY_SECONDS
+
+from .cache import VerifiedTokenCache, get_principal
+from .keys import (
+    asymmetric_signing_enabled,
+    get_key_ring,
+    signing_key,
+    verification_key,
+)
+from .models import RefreshToken, User
 
 ALGORITHM = "HS256"
 
+_verified_tokens = VerifiedTokenCache(max_bytes=settings.AUTH_TOKEN_CACHE_MAX_BYTES)
+_verify_ok = JWT_VERIFY_SECONDS.labels("verified")
+_verify_rejected = JWT_VERIFY_SECONDS.labels("rejected")
+
 
 def _expiration(delta: timedelta) -> int:
     expires_at = timezone.now() + delta
@@ -23,22 +39,158 @@ def create_access_token(user: User) -> str:
         "type": "access",
         "role": user.role,
         "email": user.email,
+        "epoch": user.auth_epoch,
         "exp": _expiration(timedelta(minutes=settings.ACCESS_TOKEN_LIFETIME_MINUTES)),
     }
+    if asymmetric_signing_enabled():
+        key = signing_key()
+        return jwt.encode(
+            payload, key.private_key, algorithm=key.algorithm, headers={"kid": key.kid}
+        )
     return jwt.encode(payload, settings.SECRET_KEY, algorithm=ALGORITHM)
 
 
 def decode_token(token: str) -> dict[str, Any]:
+    if asymmetric_signing_enabled():
+        # Pinning the algorithm to the key's own rules out HS256 tokens forged
+        # with a published public key as the secret.
+        key = verification_key(token)
+        return jwt.decode(token, key.public_key, algorithms=[key.algorithm])
     return jwt.decode(token, settings.SECRET_KEY, algorithms=[ALGORITHM])
 
 
 def validate_access_token(token: str) -> dict[str, Any]:
-    payload = decode_token(token)
-    if payload.get("type") != "access":
-        msg = "Invalid access token"
-        raise jwt.InvalidTokenError(msg)
+    """Return the claims of a valid access token or raise ``jwt.InvalidTokenError``.
+
+    Tokens that passed every check are remembered until they expire, so a
+    token presented again skips signature verification.
+    """
+
+    scope = get_key_ring() if asymmetric_signing_enabled() else None
+    payload = _verified_tokens.get(token, scope)
+    if payload is not None:
+        return payload
+    started = time.perf_counter()
+    try:
+        payload = decode_token(token)
+        if payload.get("type") != "access":
+            msg = "Invalid access token"
+            raise jwt.InvalidTokenError(msg)
+    except jwt.InvalidTokenError:
+        _verify_rejected.observe(time.perf_counter() - started)
+        raise
+    _verified_tokens.set(token, payload, scope)
+    _verify_ok.observe(time.perf_counter() - started)
     return payload
 
 
+def token_cache_stats() -> dict[str, int]:
+    return _verified_tokens.stats()
+
+
+def reset_token_cache() -> None:
+    _verified_tokens.clear()
+
+
 def build_role_claims(user: User) -> dict[str, Any]:
     return {"role": user.role, "user_id": str(user.pk)}
+
+
+class RefreshRotation(NamedTuple):
+    """Outcome of :func:`rotate_refresh_token`.
+
+    ``status`` is ``"rotated"`` on success, otherwise the audit reason:
+    ``unknown_token``, ``expired_or_revoked``, ``replayed`` or ``inactive``.
+    """
+
+    status: str
+    user: User | None = None
+    token: RefreshToken | None = None
+    raw_token: str = ""
+
+
+def _claim_refresh_token(token_hash: str, now: datetime) -> tuple[int, int] | None:
+    """Revoke the live token matching *token_hash*; return ``(id, user_id)`` if one was."""
+
+    alias = router.db_for_write(RefreshToken)
+    connection = connections[alias]
+    if not connection.features.can_return_columns_from_insert:
+        row = (
+            RefreshToken.objects.using(alias)
+            .select_for_update()
+            .filter(token_hash=token_hash, revoked=False, expires_at__gt=now)
+            .values_list("id", "user_id")
+            .first()
+        )
+        if row is not None:
+            RefreshToken.objects.using(alias).filter(pk=row[0]).update(
+                revoked=True, last_used_at=now
+            )
+        return row
+
+    qn = connection.ops.quote_name
+    adapted_now = connection.ops.adapt_datetimefield_value(now)
+    sql = (
+        f"UPDATE {qn(RefreshToken._meta.db_table)} "
+        f"SET {qn('revoked')} = %s, {qn('last_used_at')} = %s "
+        f"WHERE {qn('token_hash')} = %s AND {qn('revoked')} = %s AND {qn('expires_at')} > %s "
+        f"RETURNING {qn('id')}, {qn('user_id')}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [True, adapted_now, token_hash, False, adapted_now])
+        row = cursor.fetchone()
+    return (row[0], row[1]) if row else None
+
+
+def rotate_refresh_token(
+    raw_token: str, *, user_agent: str = "", ip_address: str = ""
+) -> RefreshRotation:
+    """Revoke *raw_token* and issue its successor in a single transaction.
+
+    The old row is claimed with a conditional ``UPDATE ... RETURNING`` (or a
+    row lock where RETURNING is unavailable), so two concurrent refreshes with
+    the same token cannot both succeed. Rotated tokens keep ``last_used_at``;
+    presenting one again is treated as a replay and revokes every session of
+    its owner.
+    """
+
+    token_hash = hashlib.sha256(raw_token.encode("utf-8")).hexdigest()
+    now = timezone.now()
+    with transaction.atomic(using=router.db_for_write(RefreshToken)):
+        claimed = _claim_refresh_token(token_hash, now)
+        if claimed is None:
+            return _reject_refresh_token(token_hash)
+
+        _token_id, user_id = claimed
+        user = get_principal(user_id)
+        if user is None or not user.is_active:
+            return RefreshRotation("inactive", user=user)
+
+        token, new_raw_token = RefreshToken.create_for_user(
+            user,
+            lifetime=timedelta(days=settings.REFRESH_TOKEN_LIFETIME_DAYS),
+            user_agent=user_agent,
+            ip_address=ip_address,
+        )
+    return RefreshRotation("rotated", user=user, token=token, raw_token=new_raw_token)
+
+
+def _reject_refresh_token(token_hash: str) -> RefreshRotation:
+    row = (
+        RefreshToken.objects.filter(token_hash=token_hash)
+        .values_list("id", "user_id", "revoked", "last_used_at")
+        .first()
+    )
+    if row is None:
+        return RefreshRotation("unknown_token")
+
+    token_id, user_id, revoked, last_used_at = row
+    user = get_principal(user_id)
+    if revoked and last_used_at is not None:
+        if user is not None:
+            user.revoke_sessions()
+        return RefreshRotation("replayed", user=user)
+
+    if not revoked:
+        RefreshToken.objects.filter(pk=token_id).update(revoked=True)
+    return RefreshRotation("expired_or_revoked", user=user)
@@ -2,15 +2,24 @@ from __future__ import annotations
 
 from typing import Any
 
+from django.conf import settings
 from django.http import HttpRequest
 
 from .models import AuthAuditLog, User
 
 
 def get_client_ip(request: HttpRequest) -> str:
-    header = request.META.get("HTTP_X_FORWARDED_FOR")
+    """Return the peer address, or ``AUTH_CLIENT_IP_HEADER`` as set by a trusted proxy.
+
+    Client-supplied forwarding headers are ignored unless that setting names
+    one; the per-IP login throttle keys on this value.
+    """
+
+    header = settings.AUTH_CLIENT_IP_HEADER
     if header:
-        return header.split(",")[0].strip()
+        value = request.headers.get(header, "").strip()
+        if value:
+            return value
     return request.META.get("REMOTE_ADDR", "")
 
 
@@ -38,6 +47,26 @@ def log_event(
     )
 
 
+async def alog_event(
+    *,
+    request: HttpRequest,
+    action: AuthAuditLog.Action,
+    email: str,
+    user: User | None,
+    successful: bool,
+    metadata: dict[str, Any] | None = None,
+) -> None:
+    await AuthAuditLog.alog(
+        user=user,
+        email=email,
+        action=action,
+        successful=successful,
+        ip_address=get_client_ip(request),
+        user_agent=get_user_agent(request),
+        metadata=metadata,
+    )
+
+
 def split_full_name(full_name: str) -> tuple[str, str]:
     parts = full_name.strip().split()
     if not parts:
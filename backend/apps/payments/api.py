@@ -1,6 +1,7 @@
-from ninja import Router
+from apps.wallet.idempotency import IdempotentRouter
 
-router = Router(tags=["Payments"])
+# Mutating payment endpoints honour ``Idempotency-Key`` like the wallet's.
+router = IdempotentRouter(tags=["Payments"])
 
 
 @router.get("status", summary="Payments service heartbeat")
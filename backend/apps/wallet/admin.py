@@ -1,3 +1,50 @@
 from django.contrib import admin
 
-# Register your models here.
+from .models import BalanceCheckpoint, LedgerEntry, LedgerVerification, Wallet
+
+
+@admin.register(Wallet)
+class WalletAdmin(admin.ModelAdmin):
+    list_display = ("id", "user", "code", "balance", "currency", "status", "updated_at")
+    list_filter = ("status", "currency")
+    search_fields = ("user__email", "code")
+    readonly_fields = ("balance", "entry_count", "last_entry_id")
+
+
+class AppendOnlyAdmin(admin.ModelAdmin):
+    def has_change_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_delete_permission(self, request, obj=None) -> bool:
+        return False
+
+    def has_add_permission(self, request) -> bool:
+        # Entries are only ever written through ``apps.wallet.ledger.post``.
+        return False
+
+
+@admin.register(LedgerEntry)
+class LedgerEntryAdmin(AppendOnlyAdmin):
+    list_display = ("created_at", "wallet", "type", "amount", "balance_after", "ref")
+    list_filter = ("type",)
+    search_fields = ("ref", "transaction_id")
+    show_full_result_count = False
+
+
+@admin.register(BalanceCheckpoint)
+class BalanceCheckpointAdmin(AppendOnlyAdmin):
+    list_display = ("created_at", "wallet", "entry", "balance", "entry_count")
+
+
+@admin.register(LedgerVerification)
+class LedgerVerificationAdmin(AppendOnlyAdmin):
+    list_display = (
+        "started_at",
+        "mode",
+        "verified_through",
+        "wallets",
+        "entries",
+        "mismatches",
+        "finished_at",
+    )
+    list_filter = ("mode",)
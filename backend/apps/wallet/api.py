@@ -1,8 +1,217 @@
-from ninja import Router
+from __future__ import annotations
 
-router = Router(tags=["Wallet"])
+import csv
+from collections.abc import Iterator, Sequence
+from typing import Any
+from uuid import UUID
+
+from django.db.models import QuerySet
+from django.http import HttpResponse, StreamingHttpResponse
+from ninja import Query
+
+from apps.auth.dependencies import JWTAuth
+from assets_backend.pagination import keyset_iterator, keyset_page
+from assets_backend.renderers import ORJSONResponse
+
+from .errors import InvalidPosting
+from .idempotency import IdempotentRouter
+from .ledger import Posting, post, user_wallet, wallets_for_users
+from .models import LedgerEntry, Wallet
+from .schemas import (
+    BatchTransferRequest,
+    BatchTransferResponse,
+    TransactionFilters,
+    TransactionPage,
+    TransactionPageFilters,
+    TransferRequest,
+    TransferResponse,
+    WalletResponse,
+)
+
+jwt_auth = JWTAuth()
+router = IdempotentRouter(tags=["Wallet"])
+
+_WALLET_FIELDS = ("pk", "balance", "currency", "status", "updated_at")
+
+# Newest first; matches the ``ledger_wallet_created_idx`` index.
+TRANSACTION_ORDERING = ("-created_at", "-id")
+_TRANSACTION_FIELDS = (
+    "id",
+    "transaction_id",
+    "type",
+    "amount",
+    "balance_after",
+    "ref",
+    "description",
+    "created_at",
+)
+EXPORT_CHUNK_SIZE = 2_000
 
 
 @router.get("status", summary="Wallet service heartbeat")
 def wallet_status(request):
     return {"service": "wallet", "status": "ok"}
+
+
+def _wallet_payload(row: tuple[Any, ...]) -> dict[str, Any]:
+    """``WalletResponse`` fields, in schema order, without the model."""
+
+    wallet_id, balance, currency, status, updated_at = row
+    return {
+        "wallet_id": wallet_id,
+        "balance": balance,
+        "currency": currency,
+        "status": status,
+        "updated_at": updated_at,
+    }
+
+
+@router.get(
+    "",
+    response=WalletResponse,
+    auth=jwt_auth,
+    summary="Return the current user's wallet and balance",
+)
+def wallet(request) -> HttpResponse:
+    # One lookup on the unique ``user_id`` index; the balance is materialized
+    # by the ledger, so history length does not matter.
+    try:
+        row = Wallet.objects.values_list(*_WALLET_FIELDS).get(user_id=request.user.pk)
+    except Wallet.DoesNotExist:
+        created = user_wallet(request.user.pk)
+        row = tuple(getattr(created, name) for name in _WALLET_FIELDS)
+    return ORJSONResponse(_wallet_payload(row))
+
+
+def _transfer(request, transfers: Sequence[TransferRequest]) -> list[UUID]:
+    sender_id = request.user.pk
+    if any(transfer.recipient_id == sender_id for transfer in transfers):
+        raise InvalidPosting("Cannot transfer to your own wallet")
+    wallet_ids = wallets_for_users(
+        [sender_id, *(transfer.recipient_id for transfer in transfers)]
+    )
+    postings = [
+        Posting(
+            debit_wallet_id=wallet_ids[sender_id],
+            credit_wallet_id=wallet_ids[transfer.recipient_id],
+            amount=transfer.amount,
+            description=transfer.description,
+        )
+        for transfer in transfers
+    ]
+    return post(postings, created_by_id=sender_id)
+
+
+@router.post(
+    "transfer/",
+    response=TransferResponse,
+    auth=jwt_auth,
+    summary="Transfer funds to another user",
+)
+def transfer(request, payload: TransferRequest) -> HttpResponse:
+    [transaction_id] = _transfer(request, [payload])
+    return ORJSONResponse({"status": "success", "transaction_id": transaction_id})
+
+
+@router.post(
+    "transfer/batch",
+    response=BatchTransferResponse,
+    auth=jwt_auth,
+    summary="Settle many transfers from the current user's wallet in one transaction",
+)
+def transfer_batch(request, payload: BatchTransferRequest) -> HttpResponse:
+    # All or nothing: one failed transfer rolls back the whole batch.
+    transaction_ids = _transfer(request, payload.transfers)
+    return ORJSONResponse({"status": "success", "transaction_ids": transaction_ids})
+
+
+def _history(request, filters: TransactionFilters) -> QuerySet[LedgerEntry]:
+    # Looked up first rather than in a subquery: with the wallet id as a
+    # literal the planner walks ``ledger_wallet_created_idx`` backwards and
+    # stops after one page, where a subquery hides how busy the wallet is and
+    # it sorts the whole history instead.
+    wallet_id = (
+        Wallet.objects.filter(user_id=request.user.pk)
+        .values_list("pk", flat=True)
+        .first()
+    )
+    if wallet_id is None:
+        return LedgerEntry.objects.none()
+    queryset = LedgerEntry.objects.filter(wallet_id=wallet_id).only(
+        *_TRANSACTION_FIELDS
+    )
+    if filters.type:
+        queryset = queryset.filter(type=filters.type)
+    if filters.since:
+        queryset = queryset.filter(created_at__gte=filters.since)
+    if filters.until:
+        queryset = queryset.filter(created_at__lt=filters.until)
+    return queryset
+
+
+@router.get(
+    "transactions",
+    response=TransactionPage,
+    auth=jwt_auth,
+    summary="List the current user's wallet transactions, newest first, with cursor pagination",
+)
+def transactions(request, filters: Query[TransactionPageFilters]) -> HttpResponse:
+    items, next_cursor = keyset_page(
+        _history(request, filters),
+        ordering=TRANSACTION_ORDERING,
+        cursor=filters.cursor,
+        limit=filters.limit,
+    )
+    payload = [
+        {name: getattr(entry, name) for name in _TRANSACTION_FIELDS} for entry in items
+    ]
+    return ORJSONResponse({"items": payload, "next_cursor": next_cursor})
+
+
+class _Echo:
+    """A file-like object for ``csv.writer`` that returns each line instead of buffering it."""
+
+    def write(self, value: str) -> str:
+        return value
+
+
+def _cell(value: str) -> str:
+    # Descriptions are user input; keep spreadsheets from running them as formulas.
+    return f"'{value}" if value[:1] in ("=", "+", "-", "@", "\t", "\r") else value
+
+
+def _csv_lines(queryset: QuerySet[LedgerEntry]) -> Iterator[str]:
+    writer = csv.writer(_Echo())
+    yield writer.writerow(_TRANSACTION_FIELDS)
+    for entry in keyset_iterator(
+        queryset, ordering=TRANSACTION_ORDERING, chunk_size=EXPORT_CHUNK_SIZE
+    ):
+        yield writer.writerow(
+            [
+                entry.id,
+                entry.transaction_id,
+                entry.type,
+                entry.amount,
+                entry.balance_after,
+                _cell(entry.ref),
+                _cell(entry.description),
+                entry.created_at.isoformat(),
+            ]
+        )
+
+
+@router.get(
+    "transactions/export",
+    auth=jwt_auth,
+    summary="Download the current user's wallet transactions as CSV",
+)
+def export_transactions(
+    request, filters: Query[TransactionFilters]
+) -> StreamingHttpResponse:
+    # Rows are read in keyset chunks as the client consumes the response, so
+    # the header goes out at once and memory does not grow with history.
+    response = StreamingHttpResponse(
+        _csv_lines(_history(request, filters)), content_type="text/csv"
+    )
+    response["Content-Disposition"] = 'attachment; filename="wallet-transactions.csv"'
+    return response
@@ -6,3 +6,12 @@ class WalletConfig(AppConfig):
     name = "apps.wallet"
     label = "assets_wallet"
     verbose_name = "Wallets"
+
+    def ready(self) -> None:
+        super().ready()
+
+        from apps.auth.seed import register_seed_step
+
+        from .seed import seed_wallets
+
+        register_seed_step("wallets", seed_wallets)
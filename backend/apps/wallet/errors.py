@@ -0,0 +1,47 @@
+"""Ledger errors, raised as ``HttpError`` so API handlers can let them through."""
+
+from __future__ import annotations
+
+from ninja.errors import HttpError
+
+from apps.auth.errors import RetryableHttpError
+
+
+class LedgerError(HttpError):
+    pass
+
+
+class InvalidPosting(LedgerError):
+    def __init__(self, message: str) -> None:
+        super().__init__(400, message)
+
+
+class AccountNotFound(LedgerError):
+    def __init__(self, user_id: int) -> None:
+        super().__init__(404, f"User {user_id} does not exist")
+        self.user_id = user_id
+
+
+class WalletNotFound(LedgerError):
+    def __init__(self, wallet_id: int) -> None:
+        super().__init__(404, f"Wallet {wallet_id} does not exist")
+        self.wallet_id = wallet_id
+
+
+class WalletFrozen(LedgerError):
+    def __init__(self, wallet_id: int) -> None:
+        super().__init__(409, f"Wallet {wallet_id} is frozen")
+        self.wallet_id = wallet_id
+
+
+class InsufficientFunds(LedgerError):
+    def __init__(self, wallet_id: int) -> None:
+        super().__init__(409, f"Wallet {wallet_id} has insufficient funds")
+        self.wallet_id = wallet_id
+
+
+class WalletBusy(RetryableHttpError):
+    """Raised when a wallet lock is not granted within ``WALLET_LOCK_TIMEOUT_MS``."""
+
+    def __init__(self) -> None:
+        super().__init__(503, "The wallet is busy, please retry", retry_after=1)
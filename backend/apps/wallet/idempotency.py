@@ -0,0 +1,215 @@
+"""``Idempotency-Key`` handling for mutating wallet and payment endpoints.
+
+A client that sends ``Idempotency-Key`` with a POST, PUT, PATCH or DELETE on
+an :class:`IdempotentRouter` gets at most one execution per key. Keys are
+scoped to the authenticated user, and requests without a key or a user run
+as usual.
+
+The key is claimed, the view runs and its response is stored all in one
+transaction, so a key becomes visible only together with the work it
+recorded. A retry of a finished request is then one indexed lookup that
+replays the stored status and body with ``Idempotent-Replayed: true``.
+On PostgreSQL, a duplicate that arrives while the first request is still
+running blocks on the unique ``(user, key)`` index until that transaction
+ends. It then replays the response, or runs itself if the first one failed.
+The wait is capped at ``IDEMPOTENCY_WAIT_TIMEOUT_MS``, after which it gets a
+retryable 409.
+
+Error responses from ``HttpError`` are stored and replayed like successes.
+Retryable errors, such as a busy wallet, are not: the claim is rolled back
+so the retry runs again. Reusing a key for a different method, path or body
+is rejected with 422. Keys expire after ``IDEMPOTENCY_KEY_TTL_HOURS`` and
+are deleted in bulk by ``manage.py purge_idempotency_keys``.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import inspect
+from collections.abc import Callable
+from datetime import timedelta
+from functools import wraps
+from typing import Any
+
+from django.conf import settings
+from django.db import IntegrityError, OperationalError, connection, transaction
+from django.http import HttpRequest, HttpResponse
+from django.utils import timezone
+from ninja import Router
+from ninja.errors import HttpError
+
+from apps.auth.errors import RetryableHttpError
+from apps.auth.maintenance import PurgeChunk, PurgeReport, purge_in_chunks
+from assets_backend.renderers import ORJSONResponse
+
+from .models import IdempotencyKey
+
+HEADER = "Idempotency-Key"
+REPLAYED_HEADER = "Idempotent-Replayed"
+UNSAFE_METHODS = frozenset({"POST", "PUT", "PATCH", "DELETE"})
+MAX_KEY_LENGTH = 255
+
+_LOCK_NOT_AVAILABLE = "55P03"
+
+
+class RequestInProgress(RetryableHttpError):
+    def __init__(self) -> None:
+        super().__init__(
+            409,
+            "A request with this Idempotency-Key is still in progress",
+            retry_after=1,
+        )
+
+
+def fingerprint(request: HttpRequest) -> str:
+    digest = hashlib.sha256()
+    for part in (request.method.encode(), request.path.encode(), request.body):
+        digest.update(len(part).to_bytes(8, "big"))
+        digest.update(part)
+    return digest.hexdigest()
+
+
+def _replay(stored: IdempotencyKey, request_fingerprint: str) -> HttpResponse:
+    if stored.fingerprint != request_fingerprint:
+        raise HttpError(
+            422, "This Idempotency-Key was already used for a different request"
+        )
+    response = HttpResponse(
+        bytes(stored.body), status=stored.status_code, content_type=stored.content_type
+    )
+    response[REPLAYED_HEADER] = "true"
+    return response
+
+
+def _stored(user_id: int, key: str) -> IdempotencyKey | None:
+    return (
+        IdempotencyKey.objects.filter(
+            user_id=user_id, key=key, expires_at__gt=timezone.now()
+        )
+        .only("fingerprint", "status_code", "content_type", "body")
+        .first()
+    )
+
+
+def _claim(user_id: int, key: str, request_fingerprint: str) -> IdempotencyKey | None:
+    """Insert the key, or return the response stored for it by a request that got there first."""
+
+    timeout = settings.IDEMPOTENCY_WAIT_TIMEOUT_MS
+    if not timeout or connection.vendor != "postgresql":
+        return _insert_or_fetch(user_id, key, request_fingerprint)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT current_setting('lock_timeout'), set_config('lock_timeout', %s, true)",
+            [f"{timeout}ms"],
+        )
+        previous = cursor.fetchone()[0]
+    try:
+        return _insert_or_fetch(user_id, key, request_fingerprint)
+    finally:
+        # The cap is for the key alone; locks the view takes keep their own timeouts.
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT set_config('lock_timeout', %s, true)", [previous])
+
+
+def _insert_or_fetch(
+    user_id: int, key: str, request_fingerprint: str
+) -> IdempotencyKey | None:
+    now = timezone.now()
+    for _attempt in range(2):
+        try:
+            with transaction.atomic():
+                IdempotencyKey.objects.create(
+                    user_id=user_id,
+                    key=key,
+                    fingerprint=request_fingerprint,
+                    expires_at=now
+                    + timedelta(hours=settings.IDEMPOTENCY_KEY_TTL_HOURS),
+                )
+            return None
+        except IntegrityError:
+            pass
+        except OperationalError as exc:
+            if getattr(exc.__cause__, "sqlstate", None) == _LOCK_NOT_AVAILABLE:
+                raise RequestInProgress from exc
+            raise
+        # The request holding the key committed while this one waited.
+        stored = _stored(user_id, key)
+        if stored is not None:
+            return stored
+        # Only an expired key not purged yet is in the way; replace it.
+        IdempotencyKey.objects.filter(
+            user_id=user_id, key=key, expires_at__lte=now
+        ).delete()
+    raise RequestInProgress
+
+
+def idempotent(view_func: Callable[..., Any]) -> Callable[..., Any]:
+    """Run *view_func* at most once per ``Idempotency-Key``; it must return an ``HttpResponse``."""
+
+    @wraps(view_func)
+    def wrapper(request: HttpRequest, *args: Any, **kwargs: Any) -> Any:
+        key = request.headers.get(HEADER)
+        user = getattr(request, "user", None)
+        if key is None or user is None or not user.is_authenticated:
+            return view_func(request, *args, **kwargs)
+        if not key or len(key) > MAX_KEY_LENGTH:
+            raise HttpError(400, f"{HEADER} must be 1 to {MAX_KEY_LENGTH} characters")
+
+        request_fingerprint = fingerprint(request)
+        stored = _stored(user.pk, key)
+        if stored is not None:
+            return _replay(stored, request_fingerprint)
+
+        with transaction.atomic():
+            stored = _claim(user.pk, key, request_fingerprint)
+            if stored is not None:
+                return _replay(stored, request_fingerprint)
+            try:
+                with transaction.atomic():
+                    response = view_func(request, *args, **kwargs)
+            except RetryableHttpError:
+                raise
+            except HttpError as exc:
+                response = ORJSONResponse({"detail": str(exc)}, status=exc.status_code)
+            if not isinstance(response, HttpResponse):
+                msg = f"{view_func.__qualname__} must return an HttpResponse to be idempotent"
+                raise TypeError(msg)
+            IdempotencyKey.objects.filter(user_id=user.pk, key=key).update(
+                status_code=response.status_code,
+                content_type=response.get("Content-Type", ""),
+                body=response.content,
+            )
+        return response
+
+    # Ninja resolves string annotations against the wrapper's module, not the view's.
+    wrapper.__signature__ = inspect.signature(view_func, eval_str=True)  # type: ignore[attr-defined]
+    return wrapper
+
+
+class IdempotentRouter(Router):
+    """A ``Router`` whose POST, PUT, PATCH and DELETE operations honour ``Idempotency-Key``."""
+
+    def add_api_operation(
+        self,
+        path: str,
+        methods: list[str],
+        view_func: Callable[..., Any],
+        **kwargs: Any,
+    ) -> None:
+        if UNSAFE_METHODS.intersection(method.upper() for method in methods):
+            view_func = idempotent(view_func)
+        super().add_api_operation(path, methods, view_func, **kwargs)
+
+
+def purge_idempotency_keys(
+    *,
+    batch_size: int = 1_000,
+    pause: float = 0.0,
+    on_chunk: Callable[[PurgeChunk], None] | None = None,
+) -> PurgeReport:
+    """Delete expired keys in throttled chunks of *batch_size* rows."""
+
+    expired = IdempotencyKey.objects.filter(expires_at__lte=timezone.now())
+    return purge_in_chunks(
+        expired, batch_size=batch_size, pause=pause, on_chunk=on_chunk
+    )
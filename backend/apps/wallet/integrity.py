@@ -0,0 +1,522 @@
+"""Ledger integrity verification, run by ``manage.py verify_ledger``.
+
+A run proves that the ledger and the balances derived from it agree:
+
+* each wallet's entries, replayed in id order, reproduce every
+  ``balance_after``, every ``BalanceCheckpoint`` and finally the wallet's
+  materialized ``balance``, ``entry_count`` and ``last_entry_id``;
+* each transaction is exactly one debit and one credit of the same amount.
+
+Work is split into shards, each a contiguous range of wallet ids together
+with a slice of the transaction-id space, and shards are checked in parallel
+worker processes. A shard reads everything from one read-only snapshot,
+so postings committed during the run cannot show up as mismatches. Entries
+are streamed in ``(wallet_id, id)`` order through server-side cursors and
+merged with the wallet and checkpoint streams, so memory stays constant
+however large the ledger is.
+
+An incremental run resumes from the last clean run. It only checks wallets
+with entries past that run's ``verified_through`` and replays each of them
+from its latest checkpoint at or before that point, which the earlier run
+already verified. Transactions are checked when they have such an entry.
+Out-of-band changes to a wallet with no new entries are only caught by a
+full run, so schedule one now and then.
+"""
+
+from __future__ import annotations
+
+import time
+import uuid
+from collections.abc import Callable, Iterator
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any, NamedTuple
+
+import django
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from django.db.models import (
+    BigIntegerField,
+    Case,
+    Count,
+    DecimalField,
+    F,
+    Max,
+    Min,
+    OuterRef,
+    Q,
+    Subquery,
+    Sum,
+    Value,
+    When,
+)
+from django.db.models.functions import Coalesce
+from django.utils import timezone
+
+from .models import BalanceCheckpoint, LedgerEntry, LedgerVerification, Wallet
+
+_UUID_SPACE = 1 << 128
+
+
+class LedgerShard(NamedTuple):
+    first_wallet_id: int
+    last_wallet_id: int
+    first_transaction_id: uuid.UUID
+    last_transaction_id: uuid.UUID
+
+
+class Mismatch(NamedTuple):
+    kind: str
+    wallet_id: int | None
+    entry_id: int | None
+    transaction_id: str | None
+    expected: str
+    found: str
+
+
+class ShardResult(NamedTuple):
+    wallets: int
+    entries: int
+    transactions: int
+    mismatches: int
+    # At most ``max_mismatches`` of them, so a badly broken shard stays cheap to report.
+    samples: list[Mismatch]
+    seconds: float
+
+
+class VerificationReport(NamedTuple):
+    mode: str
+    wallets: int
+    entries: int
+    transactions: int
+    mismatches: int
+    verified_through: int
+    seconds: float
+
+
+def plan_shards(
+    first_wallet_id: int, last_wallet_id: int, count: int
+) -> list[LedgerShard]:
+    """Split the wallet ids and the transaction-id space into *count* shards."""
+
+    count = max(min(count, last_wallet_id - first_wallet_id + 1), 1)
+    span = last_wallet_id - first_wallet_id + 1
+    shards = []
+    for index in range(count):
+        shards.append(
+            LedgerShard(
+                first_wallet_id + span * index // count,
+                first_wallet_id + span * (index + 1) // count - 1,
+                uuid.UUID(int=_UUID_SPACE * index // count),
+                uuid.UUID(int=_UUID_SPACE * (index + 1) // count - 1),
+            )
+        )
+    return shards
+
+
+@contextmanager
+def _snapshot(using: str) -> Iterator[None]:
+    connection = connections[using]
+    # Outside a transaction Django would declare WITH HOLD cursors, which is
+    # why they are disabled behind PgBouncer. Inside one they are safe.
+    disabled = connection.settings_dict.get("DISABLE_SERVER_SIDE_CURSORS", False)
+    connection.settings_dict["DISABLE_SERVER_SIDE_CURSORS"] = False
+    try:
+        if connection.in_atomic_block:
+            # Already inside the caller's transaction, e.g. in tests.
+            yield
+            return
+        with transaction.atomic(using=using):
+            if connection.vendor == "postgresql":
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SET TRANSACTION ISOLATION LEVEL REPEATABLE READ, READ ONLY"
+                    )
+            yield
+    finally:
+        connection.settings_dict["DISABLE_SERVER_SIDE_CURSORS"] = disabled
+
+
+class _ShardCheck:
+    def __init__(
+        self,
+        shard: LedgerShard,
+        *,
+        since: int | None,
+        using: str,
+        batch_size: int,
+        max_mismatches: int,
+    ):
+        self.shard = shard
+        self.since = since
+        self.using = using
+        self.batch_size = batch_size
+        self.max_mismatches = max_mismatches
+        self.mismatches = 0
+        self.samples: list[Mismatch] = []
+
+    def report(
+        self,
+        kind: str,
+        *,
+        expected: Any,
+        found: Any,
+        wallet_id: int | None = None,
+        entry_id: int | None = None,
+        transaction_id: uuid.UUID | None = None,
+    ) -> None:
+        self.mismatches += 1
+        if len(self.samples) < self.max_mismatches:
+            self.samples.append(
+                Mismatch(
+                    kind,
+                    wallet_id,
+                    entry_id,
+                    str(transaction_id) if transaction_id is not None else None,
+                    str(expected),
+                    str(found),
+                )
+            )
+
+    def _stream(self, queryset: Any) -> Iterator[tuple]:
+        return queryset.iterator(chunk_size=self.batch_size)
+
+    def _orphan(self, checkpoint: tuple) -> None:
+        wallet_id, entry_id = checkpoint[:2]
+        self.report(
+            "checkpoint",
+            wallet_id=wallet_id,
+            entry_id=entry_id,
+            expected=f"an entry of wallet {wallet_id}",
+            found=f"no entry {entry_id} in this wallet",
+        )
+
+    def wallets(self) -> tuple[int, int]:
+        shard = self.shard
+        wallets = Wallet.objects.using(self.using).filter(
+            pk__gte=shard.first_wallet_id, pk__lte=shard.last_wallet_id
+        )
+        entries = LedgerEntry.objects.using(self.using).filter(
+            wallet_id__gte=shard.first_wallet_id, wallet_id__lte=shard.last_wallet_id
+        )
+        checkpoints = BalanceCheckpoint.objects.using(self.using).filter(
+            wallet_id__gte=shard.first_wallet_id, wallet_id__lte=shard.last_wallet_id
+        )
+        columns = ["pk", "balance", "entry_count", "last_entry_id"]
+        if self.since is not None:
+            touched = entries.filter(pk__gt=self.since).values("wallet_id")
+            start = (
+                BalanceCheckpoint.objects.using(self.using)
+                .filter(entry_id__lte=self.since)
+                .order_by("-entry_id")
+            )
+            wallets = wallets.filter(pk__in=touched).annotate(
+                start_entry=Subquery(
+                    start.filter(wallet_id=OuterRef("pk")).values("entry_id")[:1]
+                ),
+                start_balance=Coalesce(
+                    Subquery(
+                        start.filter(wallet_id=OuterRef("pk")).values("balance")[:1]
+                    ),
+                    Value(Decimal(0)),
+                    output_field=DecimalField(),
+                ),
+                start_count=Coalesce(
+                    Subquery(
+                        start.filter(wallet_id=OuterRef("pk")).values("entry_count")[:1]
+                    ),
+                    Value(0),
+                    output_field=BigIntegerField(),
+                ),
+            )
+            columns += ["start_entry", "start_balance", "start_count"]
+            resume_after = Coalesce(
+                Subquery(
+                    start.filter(wallet_id=OuterRef("wallet_id")).values("entry_id")[:1]
+                ),
+                Value(0),
+                output_field=BigIntegerField(),
+            )
+            entries = entries.filter(wallet_id__in=touched, pk__gt=resume_after)
+            checkpoints = checkpoints.filter(
+                wallet_id__in=touched, entry_id__gt=resume_after
+            )
+
+        wallet_rows = self._stream(wallets.order_by("pk").values_list(*columns))
+        entry_rows = self._stream(
+            entries.order_by("wallet_id", "pk").values_list(
+                "wallet_id", "pk", "type", "amount", "balance_after"
+            )
+        )
+        checkpoint_rows = self._stream(
+            checkpoints.order_by("wallet_id", "entry_id").values_list(
+                "wallet_id", "entry_id", "balance", "entry_count"
+            )
+        )
+
+        wallet_count = entry_count = 0
+        entry = next(entry_rows, None)
+        checkpoint = next(checkpoint_rows, None)
+        for wallet_id, balance, count, last_entry_id, *start in wallet_rows:
+            wallet_count += 1
+            # Replay from the starting checkpoint, or from nothing.
+            last, total, seen = start or (None, Decimal(0), 0)
+            chain_intact = True
+            while entry is not None and entry[0] == wallet_id:
+                _wallet_id, entry_id, entry_type, amount, balance_after = entry
+                total += amount if entry_type == LedgerEntry.Type.CREDIT else -amount
+                seen += 1
+                last = entry_id
+                entry_count += 1
+                if chain_intact and balance_after != total:
+                    # Later entries would all differ too; report where the chain breaks.
+                    chain_intact = False
+                    self.report(
+                        "balance_after",
+                        wallet_id=wallet_id,
+                        entry_id=entry_id,
+                        expected=total,
+                        found=balance_after,
+                    )
+                while checkpoint is not None and (checkpoint[0], checkpoint[1]) <= (
+                    wallet_id,
+                    entry_id,
+                ):
+                    if checkpoint[1] != entry_id:
+                        self._orphan(checkpoint)
+                    elif (checkpoint[2], checkpoint[3]) != (total, seen):
+                        self.report(
+                            "checkpoint",
+                            wallet_id=wallet_id,
+                            entry_id=entry_id,
+                            expected=f"{total} after {seen} entries",
+                            found=f"{checkpoint[2]} after {checkpoint[3]} entries",
+                        )
+                    checkpoint = next(checkpoint_rows, None)
+                entry = next(entry_rows, None)
+            while checkpoint is not None and checkpoint[0] == wallet_id:
+                self._orphan(checkpoint)
+                checkpoint = next(checkpoint_rows, None)
+
+            if balance != total:
+                self.report(
+                    "balance", wallet_id=wallet_id, expected=total, found=balance
+                )
+            if count != seen:
+                self.report(
+                    "entry_count", wallet_id=wallet_id, expected=seen, found=count
+                )
+            if last_entry_id != last:
+                self.report(
+                    "last_entry",
+                    wallet_id=wallet_id,
+                    expected=last,
+                    found=last_entry_id,
+                )
+        return wallet_count, entry_count
+
+    def transactions(self) -> int:
+        shard = self.shard
+        entries = LedgerEntry.objects.using(self.using).filter(
+            transaction_id__gte=shard.first_transaction_id,
+            transaction_id__lte=shard.last_transaction_id,
+        )
+        if self.since is not None:
+            entries = entries.filter(
+                transaction_id__in=entries.filter(pk__gt=self.since).values(
+                    "transaction_id"
+                )
+            )
+        credit, debit = Q(type=LedgerEntry.Type.CREDIT), Q(type=LedgerEntry.Type.DEBIT)
+        totals = (
+            entries.values("transaction_id")
+            .annotate(
+                credits=Coalesce(
+                    Sum("amount", filter=credit),
+                    Value(Decimal(0)),
+                    output_field=DecimalField(),
+                ),
+                debits=Coalesce(
+                    Sum("amount", filter=debit),
+                    Value(Decimal(0)),
+                    output_field=DecimalField(),
+                ),
+                credit_entries=Count("pk", filter=credit),
+                debit_entries=Count("pk", filter=debit),
+            )
+            .order_by()
+        )
+        balanced = Q(credits=F("debits"), credit_entries=1, debit_entries=1)
+        # Counted in the database, so a clean shard sends back one row instead of one per transaction.
+        counts = totals.annotate(
+            is_unbalanced=Case(When(balanced, then=0), default=1)
+        ).aggregate(
+            checked=Count("transaction_id"),
+            unbalanced=Coalesce(Sum("is_unbalanced"), 0),
+        )
+        if counts["unbalanced"]:
+            rows = totals.exclude(balanced).values_list(
+                "transaction_id", "credits", "debits", "credit_entries", "debit_entries"
+            )
+            for (
+                transaction_id,
+                credits,
+                debits,
+                credit_entries,
+                debit_entries,
+            ) in self._stream(rows):
+                self.report(
+                    "transaction",
+                    transaction_id=transaction_id,
+                    expected="one debit and one credit of the same amount",
+                    found=f"{debit_entries} debits of {debits}, {credit_entries} credits of {credits}",
+                )
+        return counts["checked"]
+
+
+def verify_shard(
+    shard: LedgerShard,
+    *,
+    since: int | None = None,
+    using: str = DEFAULT_DB_ALIAS,
+    batch_size: int = 10_000,
+    max_mismatches: int = 100,
+) -> ShardResult:
+    """Check one shard; runs in a worker process or, with no workers, in the caller."""
+
+    started = time.perf_counter()
+    check = _ShardCheck(
+        shard,
+        since=since,
+        using=using,
+        batch_size=batch_size,
+        max_mismatches=max_mismatches,
+    )
+    with _snapshot(using):
+        wallets, entries = check.wallets()
+        transactions = check.transactions()
+    return ShardResult(
+        wallets,
+        entries,
+        transactions,
+        check.mismatches,
+        check.samples,
+        time.perf_counter() - started,
+    )
+
+
+def _settled_watermark(using: str, before: Any) -> int:
+    # The newest entry old enough that every posting with a lower id has
+    # committed by now. Postings take their ids just before committing, so
+    # WALLET_VERIFY_SETTLE_SECONDS only has to outlast one posting transaction.
+    cutoff = before - timedelta(seconds=settings.WALLET_VERIFY_SETTLE_SECONDS)
+    entries = (
+        LedgerEntry.objects.using(using).filter(created_at__lte=cutoff).order_by("-pk")
+    )
+    return entries.values_list("pk", flat=True).first() or 0
+
+
+def verify_ledger(
+    *,
+    incremental: bool = False,
+    workers: int = 0,
+    shards: int = 0,
+    batch_size: int = 10_000,
+    max_mismatches: int = 100,
+    using: str = DEFAULT_DB_ALIAS,
+    on_shard: Callable[[ShardResult], None] | None = None,
+    on_mismatch: Callable[[Mismatch], None] | None = None,
+) -> VerificationReport:
+    """Verify the ledger, record the run and return its totals.
+
+    With ``workers=0`` shards are checked one after another in this process.
+    ``shards`` defaults to four per worker so a shard holding a few very busy
+    wallets does not leave the other workers idle. Only ``max_mismatches``
+    mismatches per shard are passed to *on_mismatch*; the report counts all.
+    """
+
+    started_at = timezone.now()
+    started = time.perf_counter()
+    watermark = _settled_watermark(using, started_at)
+    since = None
+    if incremental:
+        last_clean = (
+            LedgerVerification.objects.using(using)
+            .filter(mismatches=0)
+            .order_by("-verified_through")
+            .values_list("verified_through", flat=True)
+            .first()
+        )
+        since = last_clean
+    mode = (
+        LedgerVerification.Mode.FULL
+        if since is None
+        else LedgerVerification.Mode.INCREMENTAL
+    )
+
+    bounds = Wallet.objects.using(using).aggregate(first=Min("pk"), last=Max("pk"))
+    plan = []
+    if bounds["first"] is not None:
+        plan = plan_shards(
+            bounds["first"], bounds["last"], shards or max(workers, 1) * 4
+        )
+    options = {
+        "since": since,
+        "using": using,
+        "batch_size": batch_size,
+        "max_mismatches": max_mismatches,
+    }
+
+    totals = [0, 0, 0, 0]
+
+    def collect(result: ShardResult) -> None:
+        for index, value in enumerate(result[:4]):
+            totals[index] += value
+        if on_mismatch is not None:
+            for mismatch in result.samples:
+                on_mismatch(mismatch)
+        if on_shard is not None:
+            on_shard(result)
+
+    if workers > 0 and plan:
+        # Forked workers must not share this process's connections.
+        connections.close_all()
+        with ProcessPoolExecutor(
+            max_workers=workers, initializer=django.setup
+        ) as executor:
+            pending: set[Future[ShardResult]] = set()
+            for shard in plan:
+                if len(pending) >= workers * 2:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        collect(future.result())
+                pending.add(executor.submit(verify_shard, shard, **options))
+            for future in wait(pending).done:
+                collect(future.result())
+    else:
+        for shard in plan:
+            collect(verify_shard(shard, **options))
+
+    wallets, entries, transactions, mismatches = totals
+    verified_through = max(watermark, since or 0)
+    LedgerVerification.objects.using(using).create(
+        mode=mode,
+        verified_through=verified_through,
+        wallets=wallets,
+        entries=entries,
+        transactions=transactions,
+        mismatches=mismatches,
+        started_at=started_at,
+        finished_at=timezone.now(),
+    )
+    return VerificationReport(
+        mode,
+        wallets,
+        entries,
+        transactions,
+        mismatches,
+        verified_through,
+        time.perf_counter() - started,
+    )
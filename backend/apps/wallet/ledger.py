@@ -0,0 +1,255 @@
+"""Double-entry postings and materialized wallet balances.
+
+A :class:`Posting` moves an amount from one wallet to another and is recorded
+as two append-only ``LedgerEntry`` rows, a debit and a credit sharing a
+``transaction_id``. :func:`post` writes any number of postings in one
+transaction. It locks the wallets involved in wallet-id order, appends the
+entries and updates each wallet's materialized ``balance``, ``entry_count``
+and ``last_entry_id``, so reading a balance is one row lookup regardless of
+history length.
+
+Every ``WALLET_CHECKPOINT_INTERVAL`` entries on a wallet a ``BalanceCheckpoint``
+is appended as well. :func:`rebuild_balance` recomputes a balance from the
+latest checkpoint plus the entries after it instead of the whole ledger.
+
+Postings to a hot wallet queue on its row lock. On PostgreSQL the wait is
+capped at ``WALLET_LOCK_TIMEOUT_MS``, after which the posting fails with a
+retryable 503 instead of holding a worker indefinitely.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass
+from decimal import Decimal, InvalidOperation
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import DEFAULT_DB_ALIAS, OperationalError, connections, transaction
+from django.db.models import Q, Sum
+from django.utils import timezone
+
+from .errors import (
+    AccountNotFound,
+    InsufficientFunds,
+    InvalidPosting,
+    WalletBusy,
+    WalletFrozen,
+    WalletNotFound,
+)
+from .models import BalanceCheckpoint, LedgerEntry, Wallet
+
+CENT = Decimal("0.01")
+_LOCK_NOT_AVAILABLE = "55P03"
+
+
+@dataclass(frozen=True)
+class Posting:
+    debit_wallet_id: int
+    credit_wallet_id: int
+    amount: Decimal
+    ref: str = ""
+    description: str = ""
+
+
+def _amount(value: Decimal) -> Decimal:
+    try:
+        amount = Decimal(value)
+    except (InvalidOperation, TypeError, ValueError) as exc:
+        raise InvalidPosting("Amount must be a decimal number") from exc
+    if not amount.is_finite() or amount <= 0 or amount != amount.quantize(CENT):
+        raise InvalidPosting("Amount must be positive with at most two decimal places")
+    return amount
+
+
+def _limit_lock_wait(using: str) -> None:
+    connection = connections[using]
+    timeout = settings.WALLET_LOCK_TIMEOUT_MS
+    if timeout and connection.vendor == "postgresql":
+        with connection.cursor() as cursor:
+            # Local to the transaction, so it is safe behind PgBouncer too.
+            cursor.execute(
+                "SELECT set_config('lock_timeout', %s, true)", [f"{timeout}ms"]
+            )
+
+
+def _lock_wallets(wallet_ids: list[int], using: str) -> dict[int, Wallet]:
+    # Locks are taken in ascending id order, so two transactions touching
+    # the same wallets always queue instead of deadlocking.
+    queryset = (
+        Wallet.objects.using(using)
+        .select_for_update()
+        .filter(pk__in=wallet_ids)
+        .order_by("pk")
+        .only("pk", "user_id", "balance", "status", "entry_count", "last_entry_id")
+    )
+    try:
+        return {wallet.pk: wallet for wallet in queryset}
+    except OperationalError as exc:
+        if getattr(exc.__cause__, "sqlstate", None) == _LOCK_NOT_AVAILABLE:
+            raise WalletBusy from exc
+        raise
+
+
+def post(
+    postings: Sequence[Posting],
+    *,
+    created_by_id: int | None = None,
+    using: str = DEFAULT_DB_ALIAS,
+) -> list[uuid.UUID]:
+    """Apply *postings* atomically and return their transaction ids, in order.
+
+    Raises ``InvalidPosting``, ``WalletNotFound``, ``WalletFrozen``,
+    ``InsufficientFunds`` (user wallets cannot go negative) or ``WalletBusy``
+    before anything is written. Callers that already hold wallet locks in an
+    enclosing transaction must have taken them in wallet-id order too.
+    """
+
+    if not postings:
+        return []
+    amounts = [_amount(posting.amount) for posting in postings]
+    for posting in postings:
+        if posting.debit_wallet_id == posting.credit_wallet_id:
+            raise InvalidPosting(
+                "A posting must move money between two different wallets"
+            )
+
+    wallet_ids = sorted(
+        {
+            wallet_id
+            for p in postings
+            for wallet_id in (p.debit_wallet_id, p.credit_wallet_id)
+        }
+    )
+    interval = settings.WALLET_CHECKPOINT_INTERVAL
+    with transaction.atomic(using=using):
+        _limit_lock_wait(using)
+        wallets = _lock_wallets(wallet_ids, using)
+        for wallet_id in wallet_ids:
+            if wallet_id not in wallets:
+                raise WalletNotFound(wallet_id)
+            if wallets[wallet_id].status != Wallet.Status.ACTIVE:
+                raise WalletFrozen(wallet_id)
+
+        now = timezone.now()
+        transaction_ids = []
+        entries = []
+        for posting, amount in zip(postings, amounts, strict=True):
+            debit = wallets[posting.debit_wallet_id]
+            credit = wallets[posting.credit_wallet_id]
+            debit.balance -= amount
+            if debit.user_id is not None and debit.balance < 0:
+                raise InsufficientFunds(debit.pk)
+            credit.balance += amount
+            transaction_id = uuid.uuid4()
+            transaction_ids.append(transaction_id)
+            for wallet, entry_type in (
+                (debit, LedgerEntry.Type.DEBIT),
+                (credit, LedgerEntry.Type.CREDIT),
+            ):
+                entries.append(
+                    LedgerEntry(
+                        wallet_id=wallet.pk,
+                        transaction_id=transaction_id,
+                        type=entry_type,
+                        amount=amount,
+                        balance_after=wallet.balance,
+                        ref=posting.ref[:64],
+                        description=posting.description,
+                        created_at=now,
+                        created_by_id=created_by_id,
+                    )
+                )
+        LedgerEntry.objects.using(using).bulk_create(entries)
+
+        checkpoints = []
+        for entry in entries:
+            wallet = wallets[entry.wallet_id]
+            wallet.entry_count += 1
+            wallet.last_entry_id = entry.pk
+            if wallet.entry_count % interval == 0:
+                checkpoints.append(
+                    BalanceCheckpoint(
+                        wallet_id=wallet.pk,
+                        entry_id=entry.pk,
+                        balance=entry.balance_after,
+                        entry_count=wallet.entry_count,
+                        created_at=now,
+                    )
+                )
+        if checkpoints:
+            BalanceCheckpoint.objects.using(using).bulk_create(checkpoints)
+        for wallet in wallets.values():
+            wallet.updated_at = now
+        Wallet.objects.using(using).bulk_update(
+            wallets.values(), ["balance", "entry_count", "last_entry_id", "updated_at"]
+        )
+    return transaction_ids
+
+
+def rebuild_balance(wallet_id: int, *, using: str = DEFAULT_DB_ALIAS) -> Decimal:
+    """Recompute a wallet's balance from its latest checkpoint and the entries after it."""
+
+    checkpoint = (
+        BalanceCheckpoint.objects.using(using)
+        .filter(wallet_id=wallet_id)
+        .order_by("-entry_id")
+        .values("entry_id", "balance")
+        .first()
+    )
+    entries = LedgerEntry.objects.using(using).filter(wallet_id=wallet_id)
+    balance = Decimal(0)
+    if checkpoint is not None:
+        entries = entries.filter(pk__gt=checkpoint["entry_id"])
+        balance = checkpoint["balance"]
+    totals = entries.aggregate(
+        credits=Sum("amount", filter=Q(type=LedgerEntry.Type.CREDIT)),
+        debits=Sum("amount", filter=Q(type=LedgerEntry.Type.DEBIT)),
+    )
+    return balance + (totals["credits"] or 0) - (totals["debits"] or 0)
+
+
+def user_wallet(user_id: int, *, using: str = DEFAULT_DB_ALIAS) -> Wallet:
+    """The user's wallet, created on first use for accounts that predate the ledger or were bulk imported."""
+
+    wallet, _created = Wallet.objects.using(using).get_or_create(user_id=user_id)
+    return wallet
+
+
+def wallets_for_users(
+    user_ids: Sequence[int], *, using: str = DEFAULT_DB_ALIAS
+) -> dict[int, int]:
+    """Map each user id to its wallet id in one query, creating missing wallets.
+
+    Raises ``AccountNotFound`` for ids that do not belong to an active user.
+    """
+
+    wanted = set(user_ids)
+    # One join checks every user, whether or not it has a wallet yet.
+    rows = (
+        get_user_model()
+        .objects.using(using)
+        .filter(pk__in=wanted, is_active=True)
+        .values_list("pk", "wallet__pk")
+    )
+    found = dict(rows)
+    if missing_users := wanted - found.keys():
+        raise AccountNotFound(min(missing_users))
+    missing = {user_id for user_id, wallet_id in found.items() if wallet_id is None}
+    if missing:
+        Wallet.objects.using(using).bulk_create(
+            [Wallet(user_id=user_id) for user_id in sorted(missing)],
+            ignore_conflicts=True,
+        )
+        found.update(
+            Wallet.objects.using(using)
+            .filter(user_id__in=missing)
+            .values_list("user_id", "pk")
+        )
+    return found
+
+
+def system_wallet(code: str, *, using: str = DEFAULT_DB_ALIAS) -> Wallet:
+    wallet, _created = Wallet.objects.using(using).get_or_create(code=code)
+    return wallet
@@ -0,0 +1,23 @@
+from __future__ import annotations
+
+from collections.abc import Callable
+from typing import Any
+
+from apps.auth.maintenance import PurgeChunk, PurgeCommand, PurgeReport
+from apps.wallet.idempotency import purge_idempotency_keys
+
+
+class Command(PurgeCommand):
+    help = "Delete expired Idempotency-Key responses in throttled chunks."
+    noun = "idempotency keys"
+    batch_size_setting = "IDEMPOTENCY_PURGE_BATCH_SIZE"
+    pause_ms_setting = "IDEMPOTENCY_PURGE_PAUSE_MS"
+
+    def purge(
+        self, options: dict[str, Any], on_chunk: Callable[[PurgeChunk], None]
+    ) -> PurgeReport:
+        return purge_idempotency_keys(
+            batch_size=options["batch_size"],
+            pause=options["pause_ms"] / 1000,
+            on_chunk=on_chunk,
+        )
@@ -0,0 +1,96 @@
+from __future__ import annotations
+
+import json
+import os
+from pathlib import Path
+from typing import Any
+
+from django.core.management.base import BaseCommand, CommandError, CommandParser
+from django.db import DEFAULT_DB_ALIAS
+
+from apps.wallet.integrity import Mismatch, ShardResult, verify_ledger
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that every wallet balance matches its ledger entries and that every transaction nets to zero. "
+        "--incremental only checks wallets posted to since the last clean run. Exits non-zero on mismatches."
+    )
+
+    def add_arguments(self, parser: CommandParser) -> None:
+        parser.add_argument(
+            "--incremental", action="store_true", help="Resume from the last clean run."
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=os.cpu_count() or 1,
+            help="Processes checking shards; 0 checks them in this process.",
+        )
+        parser.add_argument(
+            "--shards", type=int, default=0, help="Defaults to four per worker."
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            default=10_000,
+            help="Rows fetched per cursor round trip.",
+        )
+        parser.add_argument(
+            "--report", type=Path, help="Write mismatches to this JSONL file."
+        )
+        parser.add_argument(
+            "--max-mismatches",
+            type=int,
+            default=100,
+            help="Reported per shard; all are counted.",
+        )
+        parser.add_argument("--database", default=DEFAULT_DB_ALIAS)
+
+    def handle(self, *args: Any, **options: Any) -> None:
+        verbosity = options["verbosity"]
+        if options["workers"] < 0 or options["shards"] < 0:
+            raise CommandError("--workers and --shards must not be negative.")
+        report_path: Path | None = options["report"]
+        report_file = report_path.open("w", encoding="utf-8") if report_path else None
+
+        def report_shard(result: ShardResult) -> None:
+            if verbosity > 1:
+                self.stdout.write(
+                    f"Checked {result.wallets} wallets, {result.entries} entries and {result.transactions} "
+                    f"transactions in {result.seconds:.2f} s ({result.mismatches} mismatches)"
+                )
+
+        def report_mismatch(mismatch: Mismatch) -> None:
+            if report_file is not None:
+                report_file.write(json.dumps(mismatch._asdict()) + "\n")
+            elif verbosity > 0:
+                self.stderr.write(
+                    f"{mismatch.kind}: wallet {mismatch.wallet_id}, entry {mismatch.entry_id}, "
+                    f"transaction {mismatch.transaction_id}: expected {mismatch.expected}, found {mismatch.found}"
+                )
+
+        try:
+            report = verify_ledger(
+                incremental=options["incremental"],
+                workers=options["workers"],
+                shards=options["shards"],
+                batch_size=max(options["batch_size"], 1),
+                max_mismatches=options["max_mismatches"],
+                using=options["database"],
+                on_shard=report_shard,
+                on_mismatch=report_mismatch,
+            )
+        finally:
+            if report_file is not None:
+                report_file.close()
+
+        summary = (
+            f"{report.mode.capitalize()} verification of {report.wallets} wallets, {report.entries} entries and "
+            f"{report.transactions} transactions through entry {report.verified_through} "
+            f"in {report.seconds:.1f} s"
+        )
+        if report.mismatches:
+            where = f" See {report_path}." if report_path else ""
+            raise CommandError(f"{summary}: {report.mismatches} mismatches.{where}")
+        self.stdout.write(self.style.SUCCESS(f"{summary}: no mismatches."))
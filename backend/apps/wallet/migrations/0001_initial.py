@@ -0,0 +1,188 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:02
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="Wallet",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "code",
+                    models.CharField(blank=True, max_length=32, null=True, unique=True),
+                ),
+                (
+                    "balance",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=18),
+                ),
+                ("currency", models.CharField(default="IRR", max_length=10)),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[("active", "Active"), ("frozen", "Frozen")],
+                        default="active",
+                        max_length=10,
+                    ),
+                ),
+                ("entry_count", models.PositiveBigIntegerField(default=0)),
+                ("last_entry_id", models.BigIntegerField(blank=True, null=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                ("updated_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "user",
+                    models.OneToOneField(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="wallet",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+        ),
+        migrations.CreateModel(
+            name="LedgerEntry",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("transaction_id", models.UUIDField(db_index=True)),
+                (
+                    "type",
+                    models.CharField(
+                        choices=[("credit", "Credit"), ("debit", "Debit")], max_length=6
+                    ),
+                ),
+                ("amount", models.DecimalField(decimal_places=2, max_digits=18)),
+                ("balance_after", models.DecimalField(decimal_places=2, max_digits=18)),
+                ("ref", models.CharField(blank=True, max_length=64)),
+                ("description", models.TextField(blank=True)),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "created_by",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="entries",
+                        to="assets_wallet.wallet",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name_plural": "ledger entries",
+            },
+        ),
+        migrations.CreateModel(
+            name="BalanceCheckpoint",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("balance", models.DecimalField(decimal_places=2, max_digits=18)),
+                ("entry_count", models.PositiveBigIntegerField()),
+                ("created_at", models.DateTimeField(default=django.utils.timezone.now)),
+                (
+                    "entry",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="+",
+                        to="assets_wallet.ledgerentry",
+                    ),
+                ),
+                (
+                    "wallet",
+                    models.ForeignKey(
+                        db_index=False,
+                        on_delete=django.db.models.deletion.PROTECT,
+                        related_name="checkpoints",
+                        to="assets_wallet.wallet",
+                    ),
+                ),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name="wallet",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    models.Q(("code__isnull", True), ("user__isnull", False)),
+                    models.Q(("code__isnull", False), ("user__isnull", True)),
+                    _connector="OR",
+                ),
+                name="wallet_user_xor_code",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="wallet",
+            constraint=models.CheckConstraint(
+                check=models.Q(
+                    ("balance__gte", 0), ("user__isnull", True), _connector="OR"
+                ),
+                name="wallet_user_balance_non_negative",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(fields=["wallet", "id"], name="ledger_wallet_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="ledgerentry",
+            index=models.Index(
+                condition=models.Q(("ref", ""), _negated=True),
+                fields=["ref"],
+                name="ledger_ref_idx",
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="ledgerentry",
+            constraint=models.CheckConstraint(
+                check=models.Q(("amount__gt", 0)), name="ledger_amount_positive"
+            ),
+        ),
+        migrations.AddConstraint(
+            model_name="balancecheckpoint",
+            constraint=models.UniqueConstraint(
+                fields=("wallet", "entry"), name="checkpoint_wallet_entry_uniq"
+            ),
+        ),
+    ]
@@ -0,0 +1,50 @@
+"""Reject UPDATE and DELETE on the ledger tables on PostgreSQL.
+
+``LedgerEntry`` and ``BalanceCheckpoint`` refuse ``save()`` on existing rows
+and ``delete()`` in Python; these triggers apply the same rule to queryset
+updates, raw SQL and anything else that reaches the database. ``TRUNCATE`` is
+still allowed, for test flushes.
+"""
+
+from django.db import migrations
+
+FUNCTION = "assets_wallet_append_only"
+TABLES = ("assets_wallet_ledgerentry", "assets_wallet_balancecheckpoint")
+
+
+def create_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    qn = schema_editor.quote_name
+    # No params: the ``%`` is plpgsql's placeholder, not the driver's.
+    schema_editor.execute(
+        f"CREATE FUNCTION {qn(FUNCTION)}() RETURNS trigger LANGUAGE plpgsql AS $$ "
+        "BEGIN RAISE EXCEPTION '% rows are append-only', TG_TABLE_NAME; END $$",
+        None,
+    )
+    for table in TABLES:
+        schema_editor.execute(
+            f"CREATE TRIGGER {qn(f'{table}_append_only')} BEFORE UPDATE OR DELETE ON {qn(table)} "
+            f"FOR EACH ROW EXECUTE FUNCTION {qn(FUNCTION)}()"
+        )
+
+
+def drop_triggers(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+    qn = schema_editor.quote_name
+    for table in TABLES:
+        schema_editor.execute(
+            f"DROP TRIGGER IF EXISTS {qn(f'{table}_append_only')} ON {qn(table)}"
+        )
+    schema_editor.execute(f"DROP FUNCTION IF EXISTS {qn(FUNCTION)}()")
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets_wallet", "0001_initial"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_triggers, drop_triggers),
+    ]
@@ -0,0 +1,49 @@
+# Generated by Django 5.0.6 on 2026-10-18 05:16
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("assets_wallet", "0002_ledger_append_only"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LedgerVerification",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "mode",
+                    models.CharField(
+                        choices=[("full", "Full"), ("incremental", "Incremental")],
+                        max_length=11,
+                    ),
+                ),
+                ("verified_through", models.BigIntegerField()),
+                ("wallets", models.PositiveBigIntegerField(default=0)),
+                ("entries", models.PositiveBigIntegerField(default=0)),
+                ("transactions", models.PositiveBigIntegerField(default=0)),
+                ("mismatches", models.PositiveBigIntegerField(default=0)),
+                ("started_at", models.DateTimeField()),
+                ("finished_at", models.DateTimeField()),
+            ],
+            options={
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("mismatches", 0)),
+                        fields=["verified_through"],
+                        name="ledger_verified_clean_idx",
+                    )
+                ],
+            },
+        ),
+    ]
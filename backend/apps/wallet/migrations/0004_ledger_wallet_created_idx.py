@@ -0,0 +1,43 @@
+"""Index wallet history by ``(wallet_id, created_at, id)``.
+
+On PostgreSQL the index is built with ``CREATE INDEX CONCURRENTLY`` so
+postings keep flowing while it is built on a large ledger.
+"""
+
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class AddIndexOnline(AddIndexConcurrently):
+    def database_forwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_forwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_forwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+    def database_backwards(self, app_label, schema_editor, from_state, to_state):
+        if schema_editor.connection.vendor == "postgresql":
+            super().database_backwards(app_label, schema_editor, from_state, to_state)
+        else:
+            migrations.AddIndex.database_backwards(
+                self, app_label, schema_editor, from_state, to_state
+            )
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("assets_wallet", "0003_ledger_verification"),
+    ]
+
+    operations = [
+        AddIndexOnline(
+            model_name="ledgerentry",
+            index=models.Index(
+                fields=["wallet", "created_at", "id"], name="ledger_wallet_created_idx"
+            ),
+        ),
+    ]
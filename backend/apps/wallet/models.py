@@ -1,3 +1,193 @@
+from __future__ import annotations
+
+from typing import Any
+
+from django.conf import settings
 from django.db import models
+from django.db.models import Q
+from django.utils import timezone
+
+
+class Wallet(models.Model):
+    """A balance holder: one per user, plus platform wallets identified by ``code``.
+
+    ``balance`` is the materialized sum of the wallet's ledger entries,
+    maintained by ``apps.wallet.ledger.post`` together with ``entry_count``
+    and ``last_entry_id``. Reading it never touches the ledger.
+    """
+
+    class Status(models.TextChoices):
+        ACTIVE = "active", "Active"
+        FROZEN = "frozen", "Frozen"
+
+    # Platform wallets on the other side of deposits and ticket payments.
+    EXTERNAL = "external"
+    ESCROW = "escrow"
+
+    user = models.OneToOneField(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="wallet",
+    )
+    code = models.CharField(max_length=32, unique=True, null=True, blank=True)
+    balance = models.DecimalField(max_digits=18, decimal_places=2, default=0)
+    currency = models.CharField(max_length=10, default="IRR")
+    status = models.CharField(
+        max_length=10, choices=Status.choices, default=Status.ACTIVE
+    )
+    entry_count = models.PositiveBigIntegerField(default=0)
+    last_entry_id = models.BigIntegerField(null=True, blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    updated_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.CheckConstraint(
+                check=Q(user__isnull=False, code__isnull=True)
+                | Q(user__isnull=True, code__isnull=False),
+                name="wallet_user_xor_code",
+            ),
+            # Platform wallets may run negative: the external wallet mirrors
+            # money that entered the platform.
+            models.CheckConstraint(
+                check=Q(balance__gte=0) | Q(user__isnull=True),
+                name="wallet_user_balance_non_negative",
+            ),
+        ]
+
+    def __str__(self) -> str:  # pragma: no cover - trivial representation
+        return self.code or f"wallet {self.pk} (user {self.user_id})"
+
+
+class AppendOnlyModel(models.Model):
+    """Rows are inserted once and never changed; PostgreSQL also enforces this with a trigger."""
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args: Any, **kwargs: Any) -> None:
+        if not self._state.adding:
+            msg = f"{type(self).__name__} rows are append-only"
+            raise ValueError(msg)
+        super().save(*args, **kwargs)
+
+    def delete(self, *args: Any, **kwargs: Any) -> Any:
+        msg = f"{type(self).__name__} rows are append-only"
+        raise ValueError(msg)
+
+
+class LedgerEntry(AppendOnlyModel):
+    """One side of a double-entry posting; both sides share ``transaction_id``."""
+
+    class Type(models.TextChoices):
+        CREDIT = "credit", "Credit"
+        DEBIT = "debit", "Debit"
+
+    # Indexed by the composite ``ledger_wallet_id_idx`` below.
+    wallet = models.ForeignKey(
+        Wallet, on_delete=models.PROTECT, related_name="entries", db_index=False
+    )
+    transaction_id = models.UUIDField(db_index=True)
+    type = models.CharField(max_length=6, choices=Type.choices)
+    amount = models.DecimalField(max_digits=18, decimal_places=2)
+    # The wallet's balance right after this entry, so any entry is a checkpoint.
+    balance_after = models.DecimalField(max_digits=18, decimal_places=2)
+    ref = models.CharField(max_length=64, blank=True)
+    description = models.TextField(blank=True)
+    created_at = models.DateTimeField(default=timezone.now)
+    created_by = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        null=True,
+        blank=True,
+        on_delete=models.PROTECT,
+        related_name="+",
+    )
+
+    class Meta:
+        verbose_name_plural = "ledger entries"
+        constraints = [
+            models.CheckConstraint(check=Q(amount__gt=0), name="ledger_amount_positive")
+        ]
+        indexes = [
+            models.Index(fields=["wallet", "id"], name="ledger_wallet_id_idx"),
+            # Transaction history pages and exports, newest first, by keyset.
+            models.Index(
+                fields=["wallet", "created_at", "id"], name="ledger_wallet_created_idx"
+            ),
+            models.Index(fields=["ref"], name="ledger_ref_idx", condition=~Q(ref="")),
+        ]
+
+
+class BalanceCheckpoint(AppendOnlyModel):
+    """A wallet's balance after ``entry``, written every ``WALLET_CHECKPOINT_INTERVAL`` entries."""
+
+    wallet = models.ForeignKey(
+        Wallet, on_delete=models.PROTECT, related_name="checkpoints", db_index=False
+    )
+    entry = models.ForeignKey(LedgerEntry, on_delete=models.PROTECT, related_name="+")
+    balance = models.DecimalField(max_digits=18, decimal_places=2)
+    entry_count = models.PositiveBigIntegerField()
+    created_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["wallet", "entry"], name="checkpoint_wallet_entry_uniq"
+            )
+        ]
+
+
+class LedgerVerification(models.Model):
+    """One run of ``verify_ledger``; clean runs are where incremental runs resume."""
+
+    class Mode(models.TextChoices):
+        FULL = "full", "Full"
+        INCREMENTAL = "incremental", "Incremental"
+
+    mode = models.CharField(max_length=11, choices=Mode.choices)
+    # Every entry up to this id was committed, and so checked, when the run started.
+    verified_through = models.BigIntegerField()
+    wallets = models.PositiveBigIntegerField(default=0)
+    entries = models.PositiveBigIntegerField(default=0)
+    transactions = models.PositiveBigIntegerField(default=0)
+    mismatches = models.PositiveBigIntegerField(default=0)
+    started_at = models.DateTimeField()
+    finished_at = models.DateTimeField()
+
+    class Meta:
+        indexes = [
+            models.Index(
+                fields=["verified_through"],
+                name="ledger_verified_clean_idx",
+                condition=Q(mismatches=0),
+            ),
+        ]
+
+
+class IdempotencyKey(models.Model):
+    """A client's ``Idempotency-Key`` and the response its request produced; see ``apps.wallet.idempotency``."""
+
+    # Covered by the unique ``(user, key)`` constraint.
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        related_name="+",
+        db_index=False,
+    )
+    key = models.CharField(max_length=255)
+    # SHA-256 of the method, path and body, so a key cannot be reused for another request.
+    fingerprint = models.CharField(max_length=64)
+    status_code = models.PositiveSmallIntegerField(null=True)
+    content_type = models.CharField(max_length=100, blank=True)
+    body = models.BinaryField(default=b"")
+    created_at = models.DateTimeField(default=timezone.now)
+    expires_at = models.DateTimeField(db_index=True)
 
-# Create your models here.
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "key"], name="idempotency_user_key_uniq"
+            )
+        ]
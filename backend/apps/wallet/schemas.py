@@ -0,0 +1,67 @@
+from __future__ import annotations
+
+from datetime import datetime
+from decimal import Decimal
+from typing import Literal
+from uuid import UUID
+
+from ninja import Field, Schema
+
+MAX_BATCH_TRANSFERS = 500
+
+
+class WalletResponse(Schema):
+    wallet_id: int
+    balance: Decimal
+    currency: str
+    status: str
+    updated_at: datetime
+
+
+class TransferRequest(Schema):
+    recipient_id: int
+    amount: Decimal = Field(gt=0, max_digits=18, decimal_places=2)
+    description: str = Field("", max_length=255)
+
+
+class TransferResponse(Schema):
+    status: str
+    transaction_id: UUID
+
+
+class BatchTransferRequest(Schema):
+    transfers: list[TransferRequest] = Field(
+        min_length=1, max_length=MAX_BATCH_TRANSFERS
+    )
+
+
+class BatchTransferResponse(Schema):
+    status: str
+    transaction_ids: list[UUID]
+
+
+class TransactionFilters(Schema):
+    type: Literal["credit", "debit"] | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+
+class TransactionPageFilters(TransactionFilters):
+    cursor: str | None = None
+    limit: int = Field(50, ge=1, le=200)
+
+
+class TransactionEntry(Schema):
+    id: int
+    transaction_id: UUID
+    type: str
+    amount: Decimal
+    balance_after: Decimal
+    ref: str
+    description: str
+    created_at: datetime
+
+
+class TransactionPage(Schema):
+    items: list[TransactionEntry]
+    next_cursor: str | None
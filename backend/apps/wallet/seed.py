@@ -0,0 +1,206 @@
+"""Synthetic wallets and ledgers for ``seed_synthetic_data``.
+
+Every synthetic user gets a wallet, and the platform's external wallet funds
+them. The ledger is a time-ordered stream of top-ups (external to user) and
+transfers between users who had joined by then. The stream never overdraws a
+user wallet and writes checkpoints at ``WALLET_CHECKPOINT_INTERVAL`` like
+``ledger.post`` does.
+
+Wallets must exist before their entries, yet their balances depend on the
+whole stream. So the stream is generated twice from the same random state:
+once to work out each wallet's final balance, entry count and last entry, and
+once to write the entries.
+"""
+
+from __future__ import annotations
+
+import uuid
+from bisect import bisect_right
+from collections.abc import Iterator
+from datetime import timedelta
+from decimal import Decimal
+from typing import Any
+
+from django.conf import settings
+
+from apps.auth.seed import SyntheticDataGenerator
+
+from .models import BalanceCheckpoint, LedgerEntry, Wallet
+
+# Share of postings that are top-ups; the rest are transfers between users.
+_TOP_UP_SHARE = 0.3
+
+
+def _money(cents: int) -> Decimal:
+    return Decimal(cents).scaleb(-2)
+
+
+class _SyntheticLedger:
+    """One pass over the posting stream, tracking every wallet's running state."""
+
+    def __init__(
+        self,
+        generator: SyntheticDataGenerator,
+        *,
+        first_wallet_id: int,
+        first_entry_id: int,
+    ) -> None:
+        self.generator = generator
+        self.first_wallet_id = first_wallet_id
+        self.first_entry_id = first_entry_id
+        # Index 0 is the external wallet; user wallets follow in user order.
+        size = len(generator.users) + 1
+        self.balances = [0] * size
+        self.counts = [0] * size
+        self.last_entries: list[int | None] = [None] * size
+        self.updated = [generator.start] + [
+            user.date_joined for user in generator.users
+        ]
+        self.checkpoints: list[list[Any]] = []
+
+    def entries(self) -> Iterator[list[Any]]:
+        generator = self.generator
+        rng = generator.rng("wallets")
+        users = generator.users
+        joined = sorted(
+            (user.date_joined, index + 1) for index, user in enumerate(users)
+        )
+        join_times = [moment for moment, _ in joined]
+        postings = round(len(users) * generator.config.transfers_per_user)
+        span = (generator.config.anchor - generator.start).total_seconds()
+        entry_id = self.first_entry_id
+        fields = LedgerEntry._meta.concrete_fields
+
+        for position in range(postings):
+            created_at = generator.start + timedelta(
+                seconds=int(span * (position + rng.random()) / postings)
+            )
+            eligible = bisect_right(join_times, created_at)
+            if not eligible:
+                continue
+            sender_position = rng.randrange(eligible)
+            sender = joined[sender_position][1]
+            if (
+                rng.random() < _TOP_UP_SHARE
+                or eligible < 2
+                or self.balances[sender] < 100
+            ):
+                debit, credit = 0, sender
+                amount = rng.randrange(10_000, 5_000_000) * 100
+                ref = f"ZP{rng.randrange(10**12):012d}"
+                description = "Wallet top-up"
+            else:
+                receiver = joined[
+                    (sender_position + rng.randrange(1, eligible)) % eligible
+                ][1]
+                debit, credit = sender, receiver
+                amount = rng.randint(1, self.balances[sender] // 100) * 100
+                ref = ""
+                description = "Transfer"
+            transaction_id = uuid.UUID(int=rng.getrandbits(128), version=4)
+            created_by = users[sender - 1].id
+
+            for wallet, entry_type, delta in (
+                (debit, LedgerEntry.Type.DEBIT, -amount),
+                (credit, LedgerEntry.Type.CREDIT, amount),
+            ):
+                self.balances[wallet] += delta
+                self.counts[wallet] += 1
+                self.last_entries[wallet] = entry_id
+                self.updated[wallet] = created_at
+                balance_after = _money(self.balances[wallet])
+                values = {
+                    "id": entry_id,
+                    "wallet_id": self.first_wallet_id + wallet,
+                    "transaction_id": transaction_id,
+                    "type": entry_type,
+                    "amount": _money(amount),
+                    "balance_after": balance_after,
+                    "ref": ref,
+                    "description": description,
+                    "created_at": created_at,
+                    "created_by_id": created_by,
+                }
+                yield [values[field.attname] for field in fields]
+                if self.counts[wallet] % settings.WALLET_CHECKPOINT_INTERVAL == 0:
+                    self.checkpoints.append(
+                        [
+                            self.first_wallet_id + wallet,
+                            entry_id,
+                            balance_after,
+                            self.counts[wallet],
+                            created_at,
+                        ]
+                    )
+                entry_id += 1
+
+    def wallet_rows(self) -> Iterator[list[Any]]:
+        generator = self.generator
+        fields = Wallet._meta.concrete_fields
+        owners = [None, *(user.id for user in generator.users)]
+        created = [generator.start, *(user.date_joined for user in generator.users)]
+        for index, user_id in enumerate(owners):
+            values = {
+                "id": self.first_wallet_id + index,
+                "user_id": user_id,
+                "code": Wallet.EXTERNAL if user_id is None else None,
+                "balance": _money(self.balances[index]),
+                "currency": "IRR",
+                "status": Wallet.Status.ACTIVE,
+                "entry_count": self.counts[index],
+                "last_entry_id": self.last_entries[index],
+                "created_at": created[index],
+                "updated_at": self.updated[index],
+            }
+            yield [values[field.attname] for field in fields]
+
+    def checkpoint_rows(self, first_id: int) -> Iterator[list[Any]]:
+        fields = BalanceCheckpoint._meta.concrete_fields
+        for offset, (
+            wallet_id,
+            entry_id,
+            balance,
+            entry_count,
+            created_at,
+        ) in enumerate(self.checkpoints):
+            values = {
+                "id": first_id + offset,
+                "wallet_id": wallet_id,
+                "entry_id": entry_id,
+                "balance": balance,
+                "entry_count": entry_count,
+                "created_at": created_at,
+            }
+            yield [values[field.attname] for field in fields]
+
+
+def seed_wallets(generator: SyntheticDataGenerator) -> dict[str, int]:
+    database = generator.config.database
+    if (
+        Wallet.objects.using(database).filter(code=Wallet.EXTERNAL).exists()
+        or LedgerEntry.objects.using(database).exists()
+    ):
+        msg = "The database already holds a wallet ledger; start from a fresh one."
+        raise ValueError(msg)
+
+    first_wallet_id = generator.first_id(Wallet)
+    first_entry_id = generator.first_id(LedgerEntry)
+    planned = _SyntheticLedger(
+        generator, first_wallet_id=first_wallet_id, first_entry_id=first_entry_id
+    )
+    for _row in planned.entries():
+        pass
+    wallets = generator.write(Wallet, planned.wallet_rows())
+
+    ledger = _SyntheticLedger(
+        generator, first_wallet_id=first_wallet_id, first_entry_id=first_entry_id
+    )
+    entries = generator.write(LedgerEntry, ledger.entries())
+    checkpoints = generator.write(
+        BalanceCheckpoint, ledger.checkpoint_rows(generator.first_id(BalanceCheckpoint))
+    )
+    return {
+        "wallets": wallets,
+        "ledger_entries": entries,
+        "balance_checkpoints": checkpoints,
+    }
@@ -1,3 +1,793 @@
-from django.test import TestCase
+import csv
+import json
+import tempfile
+import threading
+import uuid
+from datetime import timedelta
+from decimal import Decimal
+from io import StringIO
+from itertools import pairwise
+from pathlib import Path
+from unittest import skipUnless
+from unittest.mock import patch
 
-# Create your tests here.
+from django.core.management import CommandError, call_command
+from django.db import connection, connections, transaction
+from django.db.models import F, Q, Sum
+from django.db.utils import DatabaseError
+from django.test import Client, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from apps.auth.cache import reset_principal_cache
+from apps.auth.models import User
+from apps.auth.seed import SyntheticConfig, generate_synthetic_data
+from apps.auth.tokens import create_access_token
+
+from .errors import InsufficientFunds, InvalidPosting, WalletBusy, WalletFrozen
+from .idempotency import _claim
+from .integrity import plan_shards
+from .ledger import Posting, post, rebuild_balance, system_wallet, user_wallet
+from .models import (
+    BalanceCheckpoint,
+    IdempotencyKey,
+    LedgerEntry,
+    LedgerVerification,
+    Wallet,
+)
+
+
+class LedgerPostingTests(TestCase):
+    def setUp(self) -> None:
+        self.external = system_wallet(Wallet.EXTERNAL)
+        self.alice = user_wallet(User.objects.create_user(email="alice@example.com").pk)
+        self.bob = user_wallet(User.objects.create_user(email="bob@example.com").pk)
+
+    def _top_up(self, wallet: Wallet, amount: str) -> None:
+        post([Posting(self.external.pk, wallet.pk, Decimal(amount), ref="ZP1")])
+
+    def test_posting_appends_a_balanced_pair_and_updates_balances(self) -> None:
+        self._top_up(self.alice, "100.00")
+        [transaction_id] = post(
+            [Posting(self.alice.pk, self.bob.pk, Decimal("30.50"), description="Rent")]
+        )
+
+        self.alice.refresh_from_db()
+        self.bob.refresh_from_db()
+        self.assertEqual(self.alice.balance, Decimal("69.50"))
+        self.assertEqual(self.bob.balance, Decimal("30.50"))
+        self.assertEqual(self.alice.entry_count, 2)
+        entries = list(
+            LedgerEntry.objects.filter(transaction_id=transaction_id).order_by("pk")
+        )
+        self.assertEqual(
+            [(e.wallet_id, e.type) for e in entries],
+            [(self.alice.pk, "debit"), (self.bob.pk, "credit")],
+        )
+        self.assertEqual(
+            [e.balance_after for e in entries], [Decimal("69.50"), Decimal("30.50")]
+        )
+        self.assertEqual(self.alice.last_entry_id, entries[0].pk)
+
+    def test_rejected_postings_write_nothing(self) -> None:
+        self._top_up(self.alice, "10.00")
+
+        with self.assertRaises(InsufficientFunds):
+            post(
+                [
+                    Posting(self.alice.pk, self.bob.pk, Decimal(amount))
+                    for amount in ("5.00", "6.00")
+                ]
+            )
+        for amount in ("0", "-1", "1.001"):
+            with self.assertRaises(InvalidPosting):
+                post([Posting(self.alice.pk, self.bob.pk, Decimal(amount))])
+        Wallet.objects.filter(pk=self.bob.pk).update(status=Wallet.Status.FROZEN)
+        with self.assertRaises(WalletFrozen):
+            post([Posting(self.alice.pk, self.bob.pk, Decimal("1.00"))])
+
+        self.alice.refresh_from_db()
+        self.assertEqual(self.alice.balance, Decimal("10.00"))
+        self.assertEqual(LedgerEntry.objects.count(), 2)
+
+    @override_settings(WALLET_CHECKPOINT_INTERVAL=3)
+    def test_checkpoints_let_balances_be_rebuilt(self) -> None:
+        for _ in range(4):
+            self._top_up(self.alice, "25.00")
+        post([Posting(self.alice.pk, self.bob.pk, Decimal("40.00"))] * 2)
+
+        checkpoints = list(
+            BalanceCheckpoint.objects.filter(wallet=self.alice).order_by("entry_id")
+        )
+        self.assertEqual(
+            [(c.entry_count, c.balance) for c in checkpoints],
+            [(3, Decimal("75.00")), (6, Decimal("20.00"))],
+        )
+        self.alice.refresh_from_db()
+        self.assertEqual(rebuild_balance(self.alice.pk), self.alice.balance)
+        self.assertEqual(rebuild_balance(self.bob.pk), Decimal("80.00"))
+        self.assertEqual(rebuild_balance(self.external.pk), Decimal("-100.00"))
+
+    def test_entries_are_append_only(self) -> None:
+        self._top_up(self.alice, "1.00")
+        entry = LedgerEntry.objects.first()
+
+        with self.assertRaises(ValueError):
+            entry.save()
+        with self.assertRaises(ValueError):
+            entry.delete()
+        if connection.vendor == "postgresql":
+            with self.assertRaises(DatabaseError), transaction.atomic():
+                LedgerEntry.objects.filter(pk=entry.pk).update(amount=Decimal("2.00"))
+
+
+class WalletApiTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.user = User.objects.create_user(
+            email="wallet@example.com", password="Passw0rd!"
+        )
+        self.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"
+        }
+
+    def test_wallet_is_created_on_first_read_then_served_by_one_query(self) -> None:
+        first = self.client.get("/api/wallet/", **self.headers)
+        self.assertEqual(first.status_code, 200)
+        wallet = Wallet.objects.get(user=self.user)
+        post(
+            [Posting(system_wallet(Wallet.EXTERNAL).pk, wallet.pk, Decimal("1250.00"))]
+        )
+
+        with self.assertNumQueries(1):
+            response = self.client.get("/api/wallet/", **self.headers)
+
+        data = response.json()
+        self.assertEqual(data["wallet_id"], wallet.pk)
+        self.assertEqual(data["balance"], "1250.00")
+        self.assertEqual((data["currency"], data["status"]), ("IRR", "active"))
+
+    def test_requires_authentication(self) -> None:
+        self.assertEqual(self.client.get("/api/wallet/").status_code, 401)
+
+
+class TransferApiTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.sender = User.objects.create_user(email="sender@example.com")
+        self.recipients = [
+            User.objects.create_user(email=f"recipient{i}@example.com")
+            for i in range(3)
+        ]
+        self.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.sender)}"
+        }
+        self.wallet = user_wallet(self.sender.pk)
+        post(
+            [
+                Posting(
+                    system_wallet(Wallet.EXTERNAL).pk, self.wallet.pk, Decimal("100.00")
+                )
+            ]
+        )
+
+    def _post(self, path: str, payload: dict) -> object:
+        return self.client.post(
+            path, payload, content_type="application/json", **self.headers
+        )
+
+    def _balance(self, user: User) -> Decimal:
+        return Wallet.objects.get(user=user).balance
+
+    def test_transfer_moves_funds_and_creates_the_recipient_wallet(self) -> None:
+        response = self._post(
+            "/api/wallet/transfer/",
+            {"recipient_id": self.recipients[0].pk, "amount": 20.5},
+        )
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data["status"], "success")
+        self.assertEqual(
+            LedgerEntry.objects.filter(transaction_id=data["transaction_id"]).count(), 2
+        )
+        self.assertEqual(self._balance(self.sender), Decimal("79.50"))
+        self.assertEqual(self._balance(self.recipients[0]), Decimal("20.50"))
+
+    def test_transfer_errors(self) -> None:
+        cases = [
+            ({"recipient_id": self.sender.pk, "amount": 1}, 400),
+            ({"recipient_id": 999_999, "amount": 1}, 404),
+            ({"recipient_id": self.recipients[0].pk, "amount": 100.01}, 409),
+            ({"recipient_id": self.recipients[0].pk, "amount": 0}, 422),
+        ]
+        for payload, status in cases:
+            with self.subTest(payload=payload):
+                self.assertEqual(
+                    self._post("/api/wallet/transfer/", payload).status_code, status
+                )
+        self.assertEqual(self._balance(self.sender), Decimal("100.00"))
+
+    def test_inactive_recipients_are_rejected_with_or_without_a_wallet(self) -> None:
+        with_wallet, without_wallet = self.recipients[:2]
+        user_wallet(with_wallet.pk)
+        User.objects.filter(pk__in=[with_wallet.pk, without_wallet.pk]).update(
+            is_active=False
+        )
+
+        for recipient in (with_wallet, without_wallet):
+            with self.subTest(recipient=recipient.email):
+                response = self._post(
+                    "/api/wallet/transfer/", {"recipient_id": recipient.pk, "amount": 1}
+                )
+                self.assertEqual(response.status_code, 404)
+        self.assertEqual(self._balance(self.sender), Decimal("100.00"))
+        self.assertEqual(self._balance(with_wallet), Decimal("0.00"))
+
+    def test_batch_settles_all_transfers_or_none(self) -> None:
+        transfers = [
+            {"recipient_id": user.pk, "amount": 30} for user in self.recipients
+        ]
+
+        failed = self._post(
+            "/api/wallet/transfer/batch", {"transfers": [*transfers, transfers[0]]}
+        )
+        self.assertEqual(failed.status_code, 409)
+        self.assertEqual(LedgerEntry.objects.count(), 2)
+
+        response = self._post("/api/wallet/transfer/batch", {"transfers": transfers})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(set(response.json()["transaction_ids"])), 3)
+        self.assertEqual(self._balance(self.sender), Decimal("10.00"))
+        self.assertEqual(
+            [self._balance(user) for user in self.recipients], [Decimal("30.00")] * 3
+        )
+
+
+class IdempotencyKeyTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.sender = User.objects.create_user(email="sender@example.com")
+        self.recipient = User.objects.create_user(email="recipient@example.com")
+        self.wallet = user_wallet(self.sender.pk)
+        post(
+            [
+                Posting(
+                    system_wallet(Wallet.EXTERNAL).pk, self.wallet.pk, Decimal("100.00")
+                )
+            ]
+        )
+
+    def _transfer(
+        self, amount: float, key: str | None = "key-1", user: User | None = None
+    ) -> object:
+        headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(user or self.sender)}"
+        }
+        if key is not None:
+            headers["HTTP_IDEMPOTENCY_KEY"] = key
+        payload = {"recipient_id": self.recipient.pk, "amount": amount}
+        return self.client.post(
+            "/api/wallet/transfer/", payload, content_type="application/json", **headers
+        )
+
+    def test_retry_replays_the_stored_response_without_posting_again(self) -> None:
+        first = self._transfer(10)
+        retry = self._transfer(10)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertNotIn("Idempotent-Replayed", first)
+        self.assertEqual(retry.status_code, 200)
+        self.assertEqual(retry["Idempotent-Replayed"], "true")
+        self.assertEqual(retry.content, first.content)
+        self.assertEqual(retry["Content-Type"], first["Content-Type"])
+        self.assertEqual(LedgerEntry.objects.filter(wallet=self.wallet).count(), 2)
+        self.assertEqual(
+            Wallet.objects.get(pk=self.wallet.pk).balance, Decimal("90.00")
+        )
+
+    def test_errors_are_replayed_but_a_different_request_is_rejected(self) -> None:
+        rejected = self._transfer(500)
+        self.assertEqual(rejected.status_code, 409)
+        self.assertEqual(self._transfer(500).json(), rejected.json())
+        self.assertEqual(self._transfer(10).status_code, 422)
+        self.assertEqual(self._transfer(10, key="x" * 256).status_code, 400)
+        self.assertEqual(
+            Wallet.objects.get(pk=self.wallet.pk).balance, Decimal("100.00")
+        )
+
+    def test_keys_are_optional_and_scoped_to_the_user(self) -> None:
+        self._transfer(10, key=None)
+        self._transfer(10, key=None)
+        other = User.objects.create_user(email="other@example.com")
+        post(
+            [
+                Posting(
+                    system_wallet(Wallet.EXTERNAL).pk,
+                    user_wallet(other.pk).pk,
+                    Decimal("10.00"),
+                )
+            ]
+        )
+        self._transfer(10)
+        self.assertNotIn("Idempotent-Replayed", self._transfer(10, user=other))
+
+        self.assertEqual(
+            Wallet.objects.get(pk=self.wallet.pk).balance, Decimal("70.00")
+        )
+        self.assertEqual(IdempotencyKey.objects.count(), 2)
+
+    def test_expired_keys_run_again_and_are_purged(self) -> None:
+        self._transfer(10)
+        IdempotencyKey.objects.update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertNotIn("Idempotent-Replayed", self._transfer(10))
+        self.assertEqual(
+            Wallet.objects.get(pk=self.wallet.pk).balance, Decimal("80.00")
+        )
+
+        self._transfer(10, key="key-2")
+        IdempotencyKey.objects.filter(key="key-2").update(
+            expires_at=timezone.now() - timedelta(seconds=1)
+        )
+        out = StringIO()
+        call_command("purge_idempotency_keys", batch_size=0, stdout=out)
+        self.assertIn("Purged 1 idempotency keys", out.getvalue())
+        self.assertEqual(
+            list(IdempotencyKey.objects.values_list("key", flat=True)), ["key-1"]
+        )
+
+    @skipUnless(connection.vendor == "postgresql", "lock_timeout is PostgreSQL-only")
+    @override_settings(IDEMPOTENCY_WAIT_TIMEOUT_MS=25)
+    def test_wait_timeout_does_not_outlive_the_claim(self) -> None:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute("SHOW lock_timeout")
+            before = cursor.fetchone()[0]
+            self.assertIsNone(_claim(self.sender.pk, "key-1", "fingerprint"))
+            cursor.execute("SHOW lock_timeout")
+            self.assertEqual(cursor.fetchone()[0], before)
+
+
+class TransactionHistoryApiTests(TestCase):
+    def setUp(self) -> None:
+        reset_principal_cache()
+        self.user = User.objects.create_user(email="history@example.com")
+        self.headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(self.user)}"
+        }
+        external = system_wallet(Wallet.EXTERNAL).pk
+        self.wallet = user_wallet(self.user.pk)
+        other = user_wallet(User.objects.create_user(email="other@example.com").pk)
+        # Each batch shares one created_at, so pages must break ties on id.
+        for day in range(4):
+            post(
+                [
+                    Posting(
+                        external,
+                        self.wallet.pk,
+                        Decimal(f"{day + 1}0.00"),
+                        description=f"Top-up {day}",
+                    )
+                ]
+                * 2
+            )
+        post(
+            [
+                Posting(
+                    self.wallet.pk,
+                    other.pk,
+                    Decimal("5.00"),
+                    description='=HYPERLINK("x")',
+                )
+            ]
+        )
+        post([Posting(external, other.pk, Decimal("1.00"))])
+
+    def _walk(self, **params) -> list[dict]:
+        items: list[dict] = []
+        cursor = None
+        while True:
+            query = {**params, **({"cursor": cursor} if cursor else {})}
+            response = self.client.get(
+                "/api/wallet/transactions", query, **self.headers
+            )
+            self.assertEqual(response.status_code, 200)
+            body = response.json()
+            items.extend(body["items"])
+            cursor = body["next_cursor"]
+            if cursor is None:
+                return items
+
+    def _expected(self, **filters) -> list[int]:
+        entries = LedgerEntry.objects.filter(wallet=self.wallet, **filters).order_by(
+            "-created_at", "-id"
+        )
+        return list(entries.values_list("id", flat=True))
+
+    def test_cursor_pages_cover_the_wallet_history_once_newest_first(self) -> None:
+        items = self._walk(limit=3)
+
+        self.assertEqual([item["id"] for item in items], self._expected())
+        self.assertEqual(
+            (items[0]["type"], items[0]["amount"], items[0]["balance_after"]),
+            ("debit", "5.00", "195.00"),
+        )
+
+    def test_type_and_time_filters(self) -> None:
+        self.assertEqual(
+            [item["id"] for item in self._walk(type="debit")],
+            self._expected(type="debit"),
+        )
+
+        middle = (
+            LedgerEntry.objects.filter(wallet=self.wallet)
+            .order_by("created_at", "id")[4]
+            .created_at
+        )
+        items = self._walk(limit=2, type="credit", since=middle.isoformat())
+        self.assertEqual(
+            [item["id"] for item in items],
+            self._expected(type="credit", created_at__gte=middle),
+        )
+        self.assertEqual(len(items), 4)
+        self.assertEqual(
+            self._walk(until=middle.isoformat()),
+            self._walk(limit=1, until=middle.isoformat()),
+        )
+
+    def test_page_query_uses_keyset_not_offset(self) -> None:
+        cursor = self.client.get(
+            "/api/wallet/transactions", {"limit": 2}, **self.headers
+        ).json()["next_cursor"]
+
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(
+                "/api/wallet/transactions",
+                {"limit": 2, "cursor": cursor},
+                **self.headers,
+            )
+
+        # The wallet lookup, then the page.
+        self.assertEqual(len(queries.captured_queries), 2)
+        page_sql = queries.captured_queries[-1]["sql"]
+        self.assertIn("LIMIT 3", page_sql)
+        self.assertNotIn("OFFSET", page_sql)
+
+    def test_users_without_a_wallet_have_no_history(self) -> None:
+        stranger = User.objects.create_user(email="stranger@example.com")
+        headers = {"HTTP_AUTHORIZATION": f"Bearer {create_access_token(stranger)}"}
+
+        response = self.client.get("/api/wallet/transactions", **headers)
+        self.assertEqual(response.json(), {"items": [], "next_cursor": None})
+        self.assertFalse(Wallet.objects.filter(user=stranger).exists())
+
+    def test_rejects_bad_cursor_and_anonymous_requests(self) -> None:
+        response = self.client.get(
+            "/api/wallet/transactions", {"cursor": "not-a-cursor"}, **self.headers
+        )
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.client.get("/api/wallet/transactions").status_code, 401)
+        self.assertEqual(
+            self.client.get("/api/wallet/transactions/export").status_code, 401
+        )
+
+    def test_export_streams_the_filtered_history_as_csv(self) -> None:
+        with patch("apps.wallet.api.EXPORT_CHUNK_SIZE", 3):
+            response = self.client.get(
+                "/api/wallet/transactions/export", **self.headers
+            )
+            self.assertTrue(response.streaming)
+            body = b"".join(response.streaming_content).decode()
+
+        self.assertEqual(response["Content-Type"], "text/csv")
+        rows = list(csv.DictReader(body.splitlines()))
+        self.assertEqual([int(row["id"]) for row in rows], self._expected())
+        self.assertEqual(rows[0]["description"], '\'=HYPERLINK("x")')
+        self.assertEqual((rows[-1]["amount"], rows[-1]["type"]), ("10.00", "credit"))
+
+        credits = self.client.get(
+            "/api/wallet/transactions/export", {"type": "credit"}, **self.headers
+        )
+        lines = b"".join(credits.streaming_content).decode().splitlines()
+        self.assertEqual(len(lines), 1 + len(self._expected(type="credit")))
+
+
+@skipUnless(connection.vendor == "postgresql", "row locks need PostgreSQL")
+class ConcurrentTransferTests(TransactionTestCase):
+    def setUp(self) -> None:
+        external = system_wallet(Wallet.EXTERNAL)
+        self.wallets = [
+            user_wallet(User.objects.create_user(email=f"c{i}@example.com").pk)
+            for i in range(2)
+        ]
+        post(
+            [
+                Posting(external.pk, wallet.pk, Decimal("1000.00"))
+                for wallet in self.wallets
+            ]
+        )
+
+    def _in_thread(self, func) -> threading.Thread:
+        def run() -> None:
+            try:
+                func()
+            finally:
+                connections.close_all()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread
+
+    def test_opposing_transfers_neither_deadlock_nor_drift(self) -> None:
+        first, second = self.wallets
+        errors: list[Exception] = []
+
+        def transfers(debit: Wallet, credit: Wallet) -> None:
+            for _ in range(25):
+                try:
+                    post(
+                        [
+                            Posting(debit.pk, credit.pk, Decimal("1.00")),
+                            Posting(credit.pk, debit.pk, Decimal("0.50")),
+                        ]
+                    )
+                except Exception as exc:  # noqa: BLE001 - collected for the assertion
+                    errors.append(exc)
+
+        threads = [
+            self._in_thread(lambda d=d, c=c: transfers(d, c))
+            for d, c in [(first, second), (second, first)] * 2
+        ]
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        for wallet in self.wallets:
+            wallet.refresh_from_db()
+            self.assertEqual(wallet.balance, Decimal("1000.00"))
+            self.assertEqual(rebuild_balance(wallet.pk), wallet.balance)
+            self.assertEqual(wallet.entry_count, 201)
+
+    @override_settings(WALLET_LOCK_TIMEOUT_MS=50)
+    def test_lock_wait_is_capped(self) -> None:
+        locked, release = threading.Event(), threading.Event()
+
+        def hold_lock() -> None:
+            with transaction.atomic():
+                Wallet.objects.select_for_update().get(pk=self.wallets[0].pk)
+                locked.set()
+                release.wait(5)
+
+        holder = self._in_thread(hold_lock)
+        locked.wait(5)
+        try:
+            with self.assertRaises(WalletBusy):
+                post([Posting(self.wallets[0].pk, self.wallets[1].pk, Decimal("1.00"))])
+        finally:
+            release.set()
+            holder.join()
+
+    @override_settings(WALLET_LOCK_TIMEOUT_MS=5000)
+    def test_duplicate_in_flight_waits_for_the_first_request(self) -> None:
+        reset_principal_cache()
+        sender, recipient = (wallet.user for wallet in self.wallets)
+        headers = {
+            "HTTP_AUTHORIZATION": f"Bearer {create_access_token(sender)}",
+            "HTTP_IDEMPOTENCY_KEY": "in-flight",
+        }
+        locked, release = threading.Event(), threading.Event()
+        responses: list[object] = []
+
+        def hold_lock() -> None:
+            with transaction.atomic():
+                Wallet.objects.select_for_update().get(pk=self.wallets[0].pk)
+                locked.set()
+                release.wait(10)
+
+        def transfer() -> None:
+            payload = {"recipient_id": recipient.pk, "amount": 5}
+            responses.append(
+                Client().post(
+                    "/api/wallet/transfer/",
+                    payload,
+                    content_type="application/json",
+                    **headers,
+                )
+            )
+
+        def wait_for_waiters(count: int) -> None:
+            for _ in range(500):
+                with connection.cursor() as cursor:
+                    cursor.execute(
+                        "SELECT count(*) FROM pg_stat_activity WHERE wait_event_type = 'Lock'"
+                    )
+                    if cursor.fetchone()[0] >= count:
+                        return
+                threading.Event().wait(0.01)
+            self.fail(f"expected {count} requests waiting on locks")
+
+        holder = self._in_thread(hold_lock)
+        locked.wait(5)
+        try:
+            # The first request claims the key and waits for the wallet;
+            # the duplicate waits for the first request's key.
+            first = self._in_thread(transfer)
+            wait_for_waiters(1)
+            duplicate = self._in_thread(transfer)
+            wait_for_waiters(2)
+        finally:
+            release.set()
+            holder.join()
+        first.join()
+        duplicate.join()
+
+        self.assertEqual([response.status_code for response in responses], [200, 200])
+        self.assertEqual(responses[0].content, responses[1].content)
+        self.assertEqual(
+            sorted("Idempotent-Replayed" in response for response in responses),
+            [False, True],
+        )
+        self.assertEqual(LedgerEntry.objects.filter(wallet=self.wallets[0]).count(), 2)
+
+
+@override_settings(WALLET_CHECKPOINT_INTERVAL=2, WALLET_VERIFY_SETTLE_SECONDS=0)
+class VerifyLedgerTests(TestCase):
+    def setUp(self) -> None:
+        external = system_wallet(Wallet.EXTERNAL)
+        self.wallets = [
+            user_wallet(User.objects.create_user(email=f"v{i}@example.com").pk)
+            for i in range(3)
+        ]
+        for wallet in self.wallets:
+            post([Posting(external.pk, wallet.pk, Decimal("50.00"))] * 3)
+        post([Posting(self.wallets[0].pk, self.wallets[1].pk, Decimal("12.34"))])
+
+    def _verify(self, *args: str) -> tuple[list[dict], LedgerVerification]:
+        with tempfile.TemporaryDirectory() as directory:
+            report = Path(directory) / "mismatches.jsonl"
+            try:
+                call_command(
+                    "verify_ledger",
+                    "--workers",
+                    "0",
+                    "--report",
+                    str(report),
+                    *args,
+                    stdout=StringIO(),
+                )
+            except CommandError:
+                pass
+            mismatches = [json.loads(line) for line in report.read_text().splitlines()]
+        return mismatches, LedgerVerification.objects.latest("pk")
+
+    def test_clean_ledger_passes(self) -> None:
+        stdout = StringIO()
+        call_command("verify_ledger", "--workers", "0", "--shards", "3", stdout=stdout)
+
+        self.assertIn("no mismatches", stdout.getvalue())
+        run = LedgerVerification.objects.get()
+        self.assertEqual((run.mode, run.wallets, run.transactions), ("full", 4, 10))
+        self.assertEqual(
+            (run.entries, run.verified_through),
+            (20, LedgerEntry.objects.latest("pk").pk),
+        )
+
+    def test_reports_drifted_balances_and_unbalanced_transactions(self) -> None:
+        first, second, _third = self.wallets
+        Wallet.objects.filter(pk=first.pk).update(balance=F("balance") + 1)
+        Wallet.objects.filter(pk=second.pk).update(entry_count=F("entry_count") - 1)
+        LedgerEntry.objects.create(
+            wallet_id=second.pk,
+            transaction_id=uuid.uuid4(),
+            type=LedgerEntry.Type.DEBIT,
+            amount=Decimal("5.00"),
+            balance_after=Decimal("157.34"),
+        )
+
+        with self.assertRaises(CommandError):
+            call_command(
+                "verify_ledger", "--workers", "0", stdout=StringIO(), stderr=StringIO()
+            )
+        mismatches, run = self._verify()
+
+        found = {(m["kind"], m["wallet_id"]) for m in mismatches}
+        self.assertIn(("balance", first.pk), found)
+        self.assertIn(("entry_count", second.pk), found)
+        self.assertIn(("balance", second.pk), found)
+        self.assertIn(("last_entry", second.pk), found)
+        self.assertEqual(sum(m["kind"] == "transaction" for m in mismatches), 1)
+        self.assertEqual(run.mismatches, len(mismatches))
+
+    def test_incremental_run_checks_wallets_posted_to_since_the_last_clean_run(
+        self,
+    ) -> None:
+        first, second, third = self.wallets
+        call_command("verify_ledger", "--workers", "0", stdout=StringIO())
+        post([Posting(second.pk, third.pk, Decimal("1.00"))])
+        Wallet.objects.filter(pk=first.pk).update(balance=F("balance") + 1)
+        Wallet.objects.filter(pk=third.pk).update(balance=F("balance") + 1)
+
+        mismatches, run = self._verify("--incremental")
+
+        self.assertEqual(
+            (run.mode, run.wallets, run.transactions), ("incremental", 2, 1)
+        )
+        # Replayed from each wallet's last checkpoint, not from its first entry.
+        self.assertLess(
+            run.entries, LedgerEntry.objects.filter(wallet__in=[second, third]).count()
+        )
+        self.assertEqual(
+            [(m["kind"], m["wallet_id"]) for m in mismatches], [("balance", third.pk)]
+        )
+
+        # The failed run is not a starting point: the next one checks the same wallets again.
+        Wallet.objects.filter(pk=third.pk).update(balance=F("balance") - 1)
+        mismatches, run = self._verify("--incremental")
+        self.assertEqual((mismatches, run.wallets), ([], 2))
+
+    def test_shards_cover_every_wallet_and_transaction_id(self) -> None:
+        shards = plan_shards(5, 14, 4)
+
+        self.assertEqual(
+            [(s.first_wallet_id, s.last_wallet_id) for s in shards],
+            [(5, 6), (7, 9), (10, 11), (12, 14)],
+        )
+        self.assertEqual(shards[0].first_transaction_id.int, 0)
+        self.assertEqual(shards[-1].last_transaction_id.int, (1 << 128) - 1)
+        for before, after in pairwise(shards):
+            self.assertEqual(
+                before.last_transaction_id.int + 1, after.first_transaction_id.int
+            )
+        self.assertEqual(len(plan_shards(1, 2, 8)), 2)
+
+
+class SyntheticWalletTests(TestCase):
+    config = SyntheticConfig(
+        users=30,
+        seed=5,
+        refresh_tokens_per_user=0,
+        audit_events_per_user=0,
+        transfers_per_user=8,
+    )
+
+    def _generate(self) -> tuple[dict[str, int], list[tuple], list[tuple]]:
+        with transaction.atomic():
+            report = generate_synthetic_data(self.config)
+            wallets = list(
+                Wallet.objects.order_by("pk").values_list(
+                    "pk", "user_id", "balance", "entry_count"
+                )
+            )
+            entries = list(
+                LedgerEntry.objects.order_by("pk").values_list(
+                    "wallet_id", "type", "amount", "created_at"
+                )
+            )
+            for wallet_id, _user_id, balance, _count in wallets:
+                self.assertEqual(rebuild_balance(wallet_id), balance)
+            unbalanced = (
+                LedgerEntry.objects.values("transaction_id")
+                .annotate(
+                    credits=Sum("amount", filter=Q(type=LedgerEntry.Type.CREDIT)),
+                    debits=Sum("amount", filter=Q(type=LedgerEntry.Type.DEBIT)),
+                )
+                .exclude(credits=F("debits"))
+            )
+            self.assertFalse(unbalanced.exists())
+            transaction.set_rollback(True)
+        return report.rows, wallets, entries
+
+    @override_settings(WALLET_CHECKPOINT_INTERVAL=10)
+    def test_seeded_ledger_is_consistent_and_deterministic(self) -> None:
+        rows, wallets, entries = self._generate()
+
+        self.assertEqual(rows["wallets"], 31)
+        self.assertEqual(rows["ledger_entries"], len(entries))
+        self.assertGreater(rows["balance_checkpoints"], 0)
+        self.assertTrue(
+            all(
+                balance >= 0
+                for _pk, user_id, balance, _count in wallets
+                if user_id is not None
+            )
+        )
+        self.assertEqual(self._generate()[1:], (wallets, entries))
@@ -1,13 +1,31 @@
+from django.conf import settings
 from ninja import NinjaAPI
 
 from apps.auth.api import router as auth_router
+from apps.auth.async_api import router as async_auth_router
+from apps.auth.errors import RetryableHttpError
 from apps.notifications.api import router as notifications_router
 from apps.payments.api import router as payments_router
 from apps.reports.api import router as reports_router
 from apps.tickets.api import router as tickets_router
 from apps.wallet.api import router as wallet_router
+from assets_backend.renderers import ORJSONParser, ORJSONRenderer
 
-api = NinjaAPI(title="Assets API", version="0.1.0")
+api = NinjaAPI(
+    title="Assets API",
+    version="0.1.0",
+    renderer=ORJSONRenderer(),
+    parser=ORJSONParser(),
+)
+
+
+@api.exception_handler(RetryableHttpError)
+def retryable_http_error(request, exc: RetryableHttpError):
+    response = api.create_response(
+        request, {"detail": str(exc)}, status=exc.status_code
+    )
+    response["Retry-After"] = str(exc.retry_after)
+    return response
 
 
 @api.get("/health", tags=["Health"], summary="Backend service heartbeat")
@@ -16,7 +34,9 @@ def health(request):
 
 
 def register_routers() -> None:
-    api.add_router("auth/", auth_router)
+    api.add_router(
+        "auth/", async_auth_router if settings.AUTH_ASYNC_ENDPOINTS else auth_router
+    )
     api.add_router("wallet/", wallet_router)
     api.add_router("tickets/", tickets_router)
     api.add_router("payments/", payments_router)
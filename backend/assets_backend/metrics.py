@@ -0,0 +1,184 @@
+"""Prometheus metrics for the API.
+
+``MetricsMiddleware`` records every request under its route template (the
+Django/Ninja path pattern, such as ``api/wallet/<int:wallet_id>``), never the
+raw path, so label cardinality stays bounded by the number of operations.
+Database queries are counted and timed through an execute wrapper installed
+on every connection.
+
+``metrics_view`` serves the registry at ``/metrics``. Under a pre-forking
+server such as gunicorn, set ``PROMETHEUS_MULTIPROC_DIR`` to an empty,
+writable directory before the workers start; each worker then writes its
+samples there and the view aggregates all of them (see ``gunicorn.conf.py``).
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest, HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+UNMATCHED_ROUTE = "<unmatched>"
+METHODS = frozenset({"GET", "HEAD", "POST", "PUT", "PATCH", "DELETE", "OPTIONS"})
+
+REQUESTS = Counter(
+    "assets_http_requests_total",
+    "Requests served, by route template, method and response status.",
+    ["route", "method", "status"],
+)
+REQUEST_LATENCY = Histogram(
+    "assets_http_request_duration_seconds",
+    "Time spent serving a request, middleware included.",
+    ["route", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+REQUEST_DB_QUERIES = Histogram(
+    "assets_http_request_db_queries",
+    "Database queries issued while serving a request.",
+    ["route", "method"],
+    buckets=(0, 1, 2, 3, 5, 8, 13, 21, 34, 55, 100),
+)
+REQUEST_DB_SECONDS = Histogram(
+    "assets_http_request_db_seconds",
+    "Time spent in database queries while serving a request.",
+    ["route", "method"],
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+JWT_VERIFY_SECONDS = Histogram(
+    "assets_auth_jwt_verify_seconds",
+    "Access token signature and claim verification time, by result; tokens served from the verified-token cache are not timed.",
+    ["result"],
+    buckets=(0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.01),
+)
+PASSWORD_HASH_SECONDS = Histogram(
+    "assets_auth_password_hash_seconds",
+    "Password hash and verify time, excluding the wait for a pool slot.",
+    ["operation"],
+    buckets=(0.01, 0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0, 5.0),
+)
+PASSWORD_HASH_WAIT_SECONDS = Histogram(
+    "assets_auth_password_hash_wait_seconds",
+    "Time spent waiting for a slot in the password hashing pool.",
+    ["operation"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5),
+)
+
+# ``[query count, seconds]`` for the request running in this context; copied
+# into threads by ``sync_to_async`` along with the rest of the context.
+_query_stats: ContextVar[list[float] | None] = ContextVar(
+    "assets_query_stats", default=None
+)
+
+
+def _record_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    stats = _query_stats.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats[0] += 1
+        stats[1] += time.perf_counter() - started
+
+
+def install_query_recorder(connection: Any) -> None:
+    if _record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _record_query)
+
+
+def _on_connection_created(sender: Any, connection: Any, **kwargs: Any) -> None:
+    install_query_recorder(connection)
+
+
+connection_created.connect(
+    _on_connection_created, dispatch_uid="assets_metrics_query_recorder"
+)
+
+
+def route_label(request: HttpRequest) -> str:
+    match = getattr(request, "resolver_match", None)
+    return match.route if match is not None and match.route else UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    """Record count, latency, status and database cost per route template."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        # Connections opened before this module was imported never saw the
+        # ``connection_created`` signal.
+        for connection in connections.all(initialized_only=True):
+            install_query_recorder(connection)
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        stats = [0, 0.0]
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self._observe(request, response, time.perf_counter() - started, stats)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> Any:
+        stats = [0, 0.0]
+        token = _query_stats.set(stats)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            _query_stats.reset(token)
+        self._observe(request, response, time.perf_counter() - started, stats)
+        return response
+
+    @staticmethod
+    def _observe(
+        request: HttpRequest, response: HttpResponse, elapsed: float, stats: list[float]
+    ) -> None:
+        route = route_label(request)
+        method = request.method if request.method in METHODS else "OTHER"
+        REQUESTS.labels(route, method, str(response.status_code)).inc()
+        REQUEST_LATENCY.labels(route, method).observe(elapsed)
+        REQUEST_DB_QUERIES.labels(route, method).observe(stats[0])
+        REQUEST_DB_SECONDS.labels(route, method).observe(stats[1])
+
+
+def metrics_view(request: HttpRequest) -> HttpResponse:
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+    else:
+        registry = REGISTRY
+    return HttpResponse(generate_latest(registry), content_type=CONTENT_TYPE_LATEST)
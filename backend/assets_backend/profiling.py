@@ -0,0 +1,293 @@
+"""Opt-in request profiling.
+
+With ``PROFILING_ENABLED`` on, ``ProfilingMiddleware`` profiles a random
+``PROFILING_SAMPLE_RATE`` share of requests, plus any request that carries
+``X-Profile: 1`` together with an admin access token. A profiled request gets
+a ``Server-Timing`` header splitting its time into ``auth``, ``db``,
+``serialize`` and the remaining ``view`` time. For sync requests a cProfile
+dump is also written to ``PROFILING_DIR``, keeping the newest
+``PROFILING_MAX_FILES``. Open a dump with ``python -m pstats`` or snakeviz.
+
+The phases are reported by the code doing the work through :func:`phase`,
+which costs one context variable lookup on requests that are not profiled.
+"""
+
+from __future__ import annotations
+
+import cProfile
+import random
+import re
+import time
+import uuid
+from collections import defaultdict
+from collections.abc import Callable
+from contextvars import ContextVar
+from pathlib import Path
+from typing import Any
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpRequest
+
+from assets_backend.metrics import route_label
+
+PROFILE_HEADER = "X-Profile"
+PROFILE_SUFFIX = ".prof"
+
+
+class RequestTimings:
+    """Exclusive time per phase: a phase nested in another is not counted twice."""
+
+    def __init__(self) -> None:
+        self.started = time.perf_counter()
+        self.totals: defaultdict[str, float] = defaultdict(float)
+        self.queries = 0
+        self._stack: list[list[Any]] = []
+
+    def start(self, name: str) -> None:
+        self._stack.append([name, time.perf_counter(), 0.0])
+
+    def stop(self) -> None:
+        name, started, nested = self._stack.pop()
+        elapsed = time.perf_counter() - started
+        self.totals[name] += elapsed - nested
+        if self._stack:
+            self._stack[-1][2] += elapsed
+
+    def server_timing(self) -> str:
+        total = time.perf_counter() - self.started
+        metrics = []
+        for name, seconds in self.totals.items():
+            description = ""
+            if name == "db":
+                noun = "query" if self.queries == 1 else "queries"
+                description = f';desc="{self.queries} {noun}"'
+            metrics.append(f"{name};dur={seconds * 1000:.2f}{description}")
+        metrics.append(f"view;dur={(total - sum(self.totals.values())) * 1000:.2f}")
+        metrics.append(f"total;dur={total * 1000:.2f}")
+        return ", ".join(metrics)
+
+
+class _Phase:
+    __slots__ = ("name", "timings")
+
+    def __init__(self, timings: RequestTimings, name: str) -> None:
+        self.timings = timings
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.timings.start(self.name)
+
+    def __exit__(self, *exc_info: object) -> None:
+        self.timings.stop()
+
+
+class _NoPhase:
+    __slots__ = ()
+
+    def __enter__(self) -> None:
+        return None
+
+    def __exit__(self, *exc_info: object) -> None:
+        return None
+
+
+_NO_PHASE = _NoPhase()
+_timings: ContextVar[RequestTimings | None] = ContextVar(
+    "assets_request_timings", default=None
+)
+
+
+def phase(name: str) -> _Phase | _NoPhase:
+    """Context manager attributing the enclosed time to *name* on profiled requests."""
+
+    timings = _timings.get()
+    return _NO_PHASE if timings is None else _Phase(timings, name)
+
+
+def _time_query(
+    execute: Callable[..., Any],
+    sql: str,
+    params: Any,
+    many: bool,
+    context: dict[str, Any],
+) -> Any:
+    timings = _timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+    timings.queries += 1
+    timings.start("db")
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.stop()
+
+
+def _install_query_timer(connection: Any) -> None:
+    if _time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, _time_query)
+
+
+def _on_connection_created(sender: Any, connection: Any, **kwargs: Any) -> None:
+    _install_query_timer(connection)
+
+
+def _profile_claims(request: HttpRequest) -> dict[str, Any] | None:
+    """Verified access-token claims of a request asking for a profile."""
+
+    if request.headers.get(PROFILE_HEADER) != "1":
+        return None
+    # Imported here: the auth app itself imports ``phase`` from this module.
+    import jwt
+
+    from apps.auth.dependencies import JWTAuth
+    from apps.auth.tokens import validate_access_token
+
+    token = JWTAuth()._extract_token(request)
+    if not token:
+        return None
+    try:
+        return validate_access_token(token)
+    except jwt.InvalidTokenError:
+        return None
+
+
+def _is_current_admin(payload: dict[str, Any], principal: Any) -> bool:
+    from apps.auth.models import User
+
+    return (
+        principal is not None
+        and principal.is_active
+        and principal.auth_epoch == payload.get("epoch", 0)
+        and principal.role == User.Role.ADMIN
+    )
+
+
+def _admin_requested(request: HttpRequest) -> bool:
+    """Whether an active admin asked for a profile, checked the way ``JWTAuth`` checks.
+
+    A demoted, deactivated or revoked admin is refused straight away. In
+    stateless mode role changes and deactivation move the epoch, so a current
+    epoch vouches for the claims.
+    """
+
+    payload = _profile_claims(request)
+    if payload is None:
+        return False
+    from apps.auth.cache import (
+        get_principal,
+        get_revocation_epoch,
+        principal_from_claims,
+    )
+
+    if not settings.AUTH_STATELESS_MODE:
+        return _is_current_admin(payload, get_principal(payload["sub"]))
+    current = get_revocation_epoch(payload["sub"]) == payload.get("epoch", 0)
+    return current and _is_current_admin(payload, principal_from_claims(payload))
+
+
+async def _aadmin_requested(request: HttpRequest) -> bool:
+    payload = _profile_claims(request)
+    if payload is None:
+        return False
+    from apps.auth.cache import (
+        aget_principal,
+        aget_revocation_epoch,
+        principal_from_claims,
+    )
+
+    if not settings.AUTH_STATELESS_MODE:
+        return _is_current_admin(payload, await aget_principal(payload["sub"]))
+    current = await aget_revocation_epoch(payload["sub"]) == payload.get("epoch", 0)
+    return current and _is_current_admin(payload, principal_from_claims(payload))
+
+
+def _slug(route: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "_", route).strip("_")[:80] or "root"
+
+
+class ProfilingMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.directory = Path(settings.PROFILING_DIR)
+        self.max_files = settings.PROFILING_MAX_FILES
+        connection_created.connect(
+            _on_connection_created, dispatch_uid="assets_profiling_query_timer"
+        )
+        for connection in connections.all(initialized_only=True):
+            _install_query_timer(connection)
+
+    def _sampled(self) -> bool:
+        return bool(self.sample_rate) and random.random() < self.sample_rate
+
+    def _should_profile(self, request: HttpRequest) -> bool:
+        return self._sampled() or (
+            PROFILE_HEADER in request.headers and _admin_requested(request)
+        )
+
+    async def _ashould_profile(self, request: HttpRequest) -> bool:
+        return self._sampled() or (
+            PROFILE_HEADER in request.headers and await _aadmin_requested(request)
+        )
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        if not self._should_profile(request):
+            return self.get_response(request)
+
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+            try:
+                response = self.get_response(request)
+            finally:
+                profiler.disable()
+        finally:
+            _timings.reset(token)
+        response["Server-Timing"] = timings.server_timing()
+        self._dump(profiler, request, timings)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> Any:
+        if not await self._ashould_profile(request):
+            return await self.get_response(request)
+
+        # cProfile only sees the event loop thread, so async requests get the
+        # Server-Timing breakdown alone.
+        timings = RequestTimings()
+        token = _timings.set(timings)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timings.reset(token)
+        response["Server-Timing"] = timings.server_timing()
+        return response
+
+    def _dump(
+        self, profiler: cProfile.Profile, request: HttpRequest, timings: RequestTimings
+    ) -> None:
+        elapsed_ms = (time.perf_counter() - timings.started) * 1000
+        name = (
+            f"{time.strftime('%Y%m%dT%H%M%S')}-{request.method}-{_slug(route_label(request))}"
+            f"-{elapsed_ms:.0f}ms-{uuid.uuid4().hex[:8]}{PROFILE_SUFFIX}"
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        profiler.dump_stats(self.directory / name)
+        dumps = sorted(
+            self.directory.glob(f"*{PROFILE_SUFFIX}"),
+            key=lambda path: path.stat().st_mtime,
+        )
+        for stale in dumps[: max(len(dumps) - self.max_files, 0)]:
+            stale.unlink(missing_ok=True)
@@ -0,0 +1,51 @@
+"""orjson-based JSON rendering and parsing for the Ninja API.
+
+Output matches Ninja's ``NinjaJSONEncoder`` byte for byte where it matters to
+clients: datetimes, decimals and models still go through that encoder, while
+everything orjson handles natively (str, numbers, dicts, lists, UUIDs) skips
+Python-level encoding entirely.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+import orjson
+from django.http import HttpRequest, HttpResponse
+from ninja.parser import Parser
+from ninja.renderers import BaseRenderer
+from ninja.responses import NinjaJSONEncoder
+
+from assets_backend.profiling import phase
+
+# Datetimes are passed through so they keep DjangoJSONEncoder's format
+# (millisecond precision, ``Z`` for UTC) instead of orjson's.
+_OPTIONS = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+_default = NinjaJSONEncoder().default
+
+
+def dumps(data: Any) -> bytes:
+    return orjson.dumps(data, default=_default, option=_OPTIONS)
+
+
+class ORJSONRenderer(BaseRenderer):
+    media_type = "application/json"
+
+    def render(self, request: HttpRequest, data: Any, *, response_status: int) -> bytes:
+        with phase("serialize"):
+            return dumps(data)
+
+
+class ORJSONParser(Parser):
+    def parse_body(self, request: HttpRequest) -> dict[str, Any]:
+        return orjson.loads(request.body)
+
+
+class ORJSONResponse(HttpResponse):
+    """``ninja.responses.Response`` rendered with orjson, for handlers that skip the response schema."""
+
+    def __init__(self, data: Any, **kwargs: Any) -> None:
+        kwargs.setdefault("content_type", "application/json")
+        with phase("serialize"):
+            content = dumps(data)
+        super().__init__(content, **kwargs)
@@ -0,0 +1,129 @@
+"""Primary/replica database routing.
+
+Reads go to a random alias in ``DATABASE_READ_REPLICAS`` only inside a
+request that ``ReplicaRoutingMiddleware`` has marked as safe. Everything else
+reads from the primary, including management commands, background threads,
+unsafe methods and reads inside a transaction. Once a request writes, it is
+pinned to the primary for the rest of the request. The client also gets a
+short-lived cookie that keeps its next requests on the primary until the
+replicas have caught up, so a client always reads its own writes.
+"""
+
+from __future__ import annotations
+
+import random
+import time
+from collections.abc import Callable
+from contextvars import ContextVar
+from typing import Any
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.http import HttpRequest, HttpResponse
+
+PIN_COOKIE = "db_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+
+class RoutingState:
+    __slots__ = ("pinned", "wrote")
+
+    def __init__(self, *, pinned: bool) -> None:
+        self.pinned = pinned
+        self.wrote = False
+
+
+# Shared by reference with ``sync_to_async`` threads, so a write made in one
+# pins the reads that follow in the same request.
+_state: ContextVar[RoutingState | None] = ContextVar("assets_db_routing", default=None)
+
+
+class PrimaryReplicaRouter:
+    def db_for_read(self, model: type, **hints: Any) -> str:
+        state = _state.get()
+        replicas = settings.DATABASE_READ_REPLICAS
+        if (
+            state is None
+            or state.pinned
+            or not replicas
+            or connections[DEFAULT_DB_ALIAS].in_atomic_block
+        ):
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model: type, **hints: Any) -> str:
+        state = _state.get()
+        if state is not None:
+            state.pinned = state.wrote = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1: Any, obj2: Any, **hints: Any) -> bool:
+        # Replicas hold the same rows as the primary.
+        return True
+
+    def allow_migrate(
+        self, db: str, app_label: str, model_name: str | None = None, **hints: Any
+    ) -> bool:
+        return db == DEFAULT_DB_ALIAS
+
+
+def _pinned_by_cookie(request: HttpRequest) -> bool:
+    try:
+        return float(request.COOKIES.get(PIN_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+class ReplicaRoutingMiddleware:
+    """Allow replica reads for safe requests and pin clients that just wrote."""
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response: Callable[[HttpRequest], Any]) -> None:
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def _state_for(self, request: HttpRequest) -> RoutingState:
+        return RoutingState(
+            pinned=request.method not in SAFE_METHODS or _pinned_by_cookie(request)
+        )
+
+    def __call__(self, request: HttpRequest) -> Any:
+        if self.async_mode:
+            return self.__acall__(request)
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        self._remember_write(state, response)
+        return response
+
+    async def __acall__(self, request: HttpRequest) -> Any:
+        state = self._state_for(request)
+        token = _state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _state.reset(token)
+        self._remember_write(state, response)
+        return response
+
+    @staticmethod
+    def _remember_write(state: RoutingState, response: HttpResponse) -> None:
+        if not state.wrote:
+            return
+        pin_seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+        response.set_cookie(
+            PIN_COOKIE,
+            str(int(time.time()) + pin_seconds),
+            max_age=pin_seconds,
+            httponly=True,
+            secure=settings.AUTH_COOKIE_SECURE,
+            samesite=settings.AUTH_COOKIE_SAMESITE,
+        )
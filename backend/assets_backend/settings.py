@@ -1,7 +1,7 @@
 """Django settings for the Assets backend shell."""
 
-from pathlib import Path
 import os
+from pathlib import Path
 
 from dj_database_url import parse as dj_database_url_parse
 
@@ -95,7 +95,26 @@ DATABASES = {
 }
 
 if database_url := os.getenv("DATABASE_URL"):
-    DATABASES["default"] = dj_database_url_parse(database_url, conn_max_age=600, ssl_require=False)
+    DATABASES["default"] = dj_database_url_parse(
+        database_url, conn_max_age=600, ssl_require=False
+    )
+
+REDIS_URL = os.getenv("REDIS_URL", "")
+if not REDIS_URL and (redis_host := os.getenv("REDIS_HOST")):
+    REDIS_URL = f"redis://{redis_host}:{os.getenv('REDIS_PORT', '6379')}/0"
+
+CACHES = {
+    "default": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+        "LOCATION": "assets-default",
+    }
+}
+
+if REDIS_URL:
+    CACHES["default"] = {
+        "BACKEND": "django.core.cache.backends.redis.RedisCache",
+        "LOCATION": REDIS_URL,
+    }
 
 AUTH_PASSWORD_VALIDATORS = [
     {
@@ -139,3 +158,162 @@ REFRESH_TOKEN_LIFETIME_DAYS = _env_int("REFRESH_TOKEN_LIFETIME_DAYS", 14)
 
 AUTH_COOKIE_SECURE = os.getenv("AUTH_COOKIE_SECURE", "1" if not DEBUG else "0") == "1"
 AUTH_COOKIE_SAMESITE = os.getenv("AUTH_COOKIE_SAMESITE", "Lax")
+
+AUTH_PRINCIPAL_CACHE_ENABLED = os.getenv("AUTH_PRINCIPAL_CACHE_ENABLED", "1") == "1"
+AUTH_PRINCIPAL_CACHE_ALIAS = os.getenv("AUTH_PRINCIPAL_CACHE_ALIAS", "default")
+AUTH_PRINCIPAL_CACHE_TTL_SECONDS = _env_int("AUTH_PRINCIPAL_CACHE_TTL_SECONDS", 300)
+AUTH_PRINCIPAL_CACHE_LOCAL_TTL_SECONDS = _env_int(
+    "AUTH_PRINCIPAL_CACHE_LOCAL_TTL_SECONDS", 5
+)
+AUTH_PRINCIPAL_CACHE_LOCAL_MAXSIZE = _env_int(
+    "AUTH_PRINCIPAL_CACHE_LOCAL_MAXSIZE", 10_000
+)
+
+# Build the request principal from verified token claims instead of loading the
+# user; revocation is enforced through the per-user ``auth_epoch`` claim.
+AUTH_STATELESS_MODE = os.getenv("AUTH_STATELESS_MODE", "0") == "1"
+
+# Audit events are queued and written in batches by a background thread.
+AUTH_AUDIT_BUFFERED = os.getenv("AUTH_AUDIT_BUFFERED", "0" if DEBUG else "1") == "1"
+AUTH_AUDIT_QUEUE_SIZE = _env_int("AUTH_AUDIT_QUEUE_SIZE", 10_000)
+AUTH_AUDIT_BATCH_SIZE = _env_int("AUTH_AUDIT_BATCH_SIZE", 500)
+AUTH_AUDIT_FLUSH_INTERVAL_MS = _env_int("AUTH_AUDIT_FLUSH_INTERVAL_MS", 1000)
+AUTH_AUDIT_ENQUEUE_TIMEOUT_MS = _env_int("AUTH_AUDIT_ENQUEUE_TIMEOUT_MS", 0)
+
+# Serve the auth endpoints from their native async implementations; enable
+# when running under an ASGI server such as uvicorn.
+AUTH_ASYNC_ENDPOINTS = os.getenv("AUTH_ASYNC_ENDPOINTS", "0") == "1"
+
+# Password hashing runs in a bounded pool; callers that cannot be admitted
+# within the queue timeout get a 503 with Retry-After. Zero workers hashes on
+# the calling thread (still under the concurrency cap).
+AUTH_HASH_POOL_WORKERS = _env_int(
+    "AUTH_HASH_POOL_WORKERS", 0 if DEBUG else max((os.cpu_count() or 2) // 2, 1)
+)
+AUTH_HASH_MAX_CONCURRENCY = _env_int("AUTH_HASH_MAX_CONCURRENCY", 8)
+AUTH_HASH_QUEUE_TIMEOUT_MS = _env_int("AUTH_HASH_QUEUE_TIMEOUT_MS", 500)
+AUTH_HASH_RETRY_AFTER_SECONDS = _env_int("AUTH_HASH_RETRY_AFTER_SECONDS", 1)
+
+# ``purge_refresh_tokens`` removes expired or revoked refresh tokens older than
+# the grace period in small, throttled chunks.
+AUTH_REFRESH_PURGE_GRACE_HOURS = _env_int("AUTH_REFRESH_PURGE_GRACE_HOURS", 24)
+AUTH_REFRESH_PURGE_BATCH_SIZE = _env_int("AUTH_REFRESH_PURGE_BATCH_SIZE", 1000)
+AUTH_REFRESH_PURGE_PAUSE_MS = _env_int("AUTH_REFRESH_PURGE_PAUSE_MS", 100)
+
+# ``audit_log_retention`` keeps this many whole months of audit events, plus
+# the current one, and archives older partitions before dropping them.
+AUTH_AUDIT_RETENTION_MONTHS = _env_int("AUTH_AUDIT_RETENTION_MONTHS", 12)
+AUTH_AUDIT_PARTITIONS_AHEAD = _env_int("AUTH_AUDIT_PARTITIONS_AHEAD", 3)
+AUTH_AUDIT_ARCHIVE_DIR = Path(
+    os.getenv("AUTH_AUDIT_ARCHIVE_DIR", BASE_DIR / "archives" / "audit")
+)
+
+# Login attempts are rate limited per client IP and per normalized email with
+# sliding-window counters in this cache, checked before any password hashing.
+AUTH_LOGIN_THROTTLE_ENABLED = (
+    os.getenv("AUTH_LOGIN_THROTTLE_ENABLED", "0" if DEBUG else "1") == "1"
+)
+AUTH_LOGIN_THROTTLE_CACHE_ALIAS = os.getenv(
+    "AUTH_LOGIN_THROTTLE_CACHE_ALIAS", "default"
+)
+AUTH_LOGIN_THROTTLE_IP_LIMIT = _env_int("AUTH_LOGIN_THROTTLE_IP_LIMIT", 30)
+AUTH_LOGIN_THROTTLE_IP_WINDOW = _env_int("AUTH_LOGIN_THROTTLE_IP_WINDOW", 60)
+AUTH_LOGIN_THROTTLE_EMAIL_LIMIT = _env_int("AUTH_LOGIN_THROTTLE_EMAIL_LIMIT", 10)
+AUTH_LOGIN_THROTTLE_EMAIL_WINDOW = _env_int("AUTH_LOGIN_THROTTLE_EMAIL_WINDOW", 900)
+# Client addresses come from REMOTE_ADDR unless this names a header the reverse
+# proxy overwrites on every request (deploy/nginx sets X-Real-IP). Only set it
+# when the backend is reachable through that proxy alone: otherwise clients
+# can pick their own address and sidestep the per-IP throttle.
+AUTH_CLIENT_IP_HEADER = os.getenv("AUTH_CLIENT_IP_HEADER", "")
+
+# With a key directory configured, access tokens are signed with the active
+# EdDSA/ES256 key in it and verifiable by anyone through /api/auth/jwks;
+# otherwise they are HS256 tokens signed with SECRET_KEY.
+JWT_KEYS_DIR = os.getenv("JWT_KEYS_DIR", "")
+JWT_ACTIVE_KID = os.getenv("JWT_ACTIVE_KID", "")
+JWT_KEYS_RELOAD_SECONDS = _env_int("JWT_KEYS_RELOAD_SECONDS", 60)
+JWT_JWKS_MAX_AGE = _env_int("JWT_JWKS_MAX_AGE", 300)
+# A new key is published this long before it may sign, so verifiers with a
+# cached JWKS fetch it before they meet its tokens.
+JWT_KEY_ACTIVATION_SECONDS = _env_int("JWT_KEY_ACTIVATION_SECONDS", JWT_JWKS_MAX_AGE)
+
+# Validated access tokens are kept per process until they expire so repeat
+# requests skip signature verification; the LRU is capped at about this many
+# bytes. Zero disables it.
+AUTH_TOKEN_CACHE_MAX_BYTES = _env_int("AUTH_TOKEN_CACHE_MAX_BYTES", 16 * 1024 * 1024)
+
+# Outgoing mail; local stacks point this at an SMTP sink such as Mailpit.
+EMAIL_BACKEND = os.getenv(
+    "EMAIL_BACKEND", "django.core.mail.backends.smtp.EmailBackend"
+)
+EMAIL_HOST = os.getenv("EMAIL_HOST", "localhost")
+EMAIL_PORT = _env_int("EMAIL_PORT", 25)
+
+# Prometheus metrics per route template, served on /metrics. The proxy only
+# forwards /api/, so the endpoint is reachable from inside the network only.
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "1") == "1"
+if METRICS_ENABLED:
+    MIDDLEWARE.insert(0, "assets_backend.metrics.MetricsMiddleware")
+
+# Opt-in request profiling: a sampled share of requests, plus admin requests
+# sent with ``X-Profile: 1``, get a Server-Timing breakdown and a cProfile
+# dump in PROFILING_DIR, of which the newest PROFILING_MAX_FILES are kept.
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "0") == "1"
+try:
+    PROFILING_SAMPLE_RATE = float(os.getenv("PROFILING_SAMPLE_RATE", "0"))
+except ValueError:
+    PROFILING_SAMPLE_RATE = 0.0
+PROFILING_DIR = Path(os.getenv("PROFILING_DIR", BASE_DIR / "profiles"))
+PROFILING_MAX_FILES = _env_int("PROFILING_MAX_FILES", 200)
+if PROFILING_ENABLED:
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware"),
+        "assets_backend.profiling.ProfilingMiddleware",
+    )
+
+# Read replicas: safe requests read from the databases in
+# DATABASE_REPLICA_URLS until they write; a client that wrote reads from the
+# primary for DATABASE_REPLICA_PIN_SECONDS afterwards. Persistent connections
+# are health-checked before reuse. Behind PgBouncer in transaction pooling
+# mode set DATABASE_PGBOUNCER=1, which drops the session state it cannot keep.
+DATABASE_PGBOUNCER = os.getenv("DATABASE_PGBOUNCER", "0") == "1"
+DATABASE_REPLICA_PIN_SECONDS = _env_int("DATABASE_REPLICA_PIN_SECONDS", 5)
+DATABASE_READ_REPLICAS: list[str] = []
+for _index, _replica_url in enumerate(_csv_env("DATABASE_REPLICA_URLS", []), start=1):
+    DATABASES[f"replica{_index}"] = {
+        **dj_database_url_parse(_replica_url, conn_max_age=600, ssl_require=False),
+        "TEST": {"MIRROR": "default"},
+    }
+    DATABASE_READ_REPLICAS.append(f"replica{_index}")
+for _database in DATABASES.values():
+    _database["CONN_HEALTH_CHECKS"] = True
+    if DATABASE_PGBOUNCER and "postgresql" in _database["ENGINE"]:
+        _database["DISABLE_SERVER_SIDE_CURSORS"] = True
+        _database.setdefault("OPTIONS", {})["prepare_threshold"] = None
+if DATABASE_READ_REPLICAS:
+    DATABASE_ROUTERS = ["assets_backend.routers.PrimaryReplicaRouter"]
+    MIDDLEWARE.insert(
+        MIDDLEWARE.index("django.middleware.security.SecurityMiddleware"),
+        "assets_backend.routers.ReplicaRoutingMiddleware",
+    )
+
+# Every this many ledger entries on a wallet a balance checkpoint is written,
+# so a balance can be rebuilt without replaying the wallet's whole history.
+WALLET_CHECKPOINT_INTERVAL = _env_int("WALLET_CHECKPOINT_INTERVAL", 1000)
+
+# PostgreSQL only: a posting that waits longer than this for a wallet lock
+# fails with a retryable 503. Zero waits indefinitely.
+WALLET_LOCK_TIMEOUT_MS = _env_int("WALLET_LOCK_TIMEOUT_MS", 2000)
+
+# verify_ledger advances its incremental watermark only to entries at least
+# this old, so postings that commit out of id order are never skipped.
+WALLET_VERIFY_SETTLE_SECONDS = _env_int("WALLET_VERIFY_SETTLE_SECONDS", 60)
+
+# Idempotency-Key responses on the wallet and payments routers are replayed
+# for this long; purge_idempotency_keys deletes expired ones in bulk. On
+# PostgreSQL a duplicate waits up to IDEMPOTENCY_WAIT_TIMEOUT_MS for the
+# request holding its key before getting a retryable 409.
+IDEMPOTENCY_KEY_TTL_HOURS = _env_int("IDEMPOTENCY_KEY_TTL_HOURS", 24)
+IDEMPOTENCY_WAIT_TIMEOUT_MS = _env_int("IDEMPOTENCY_WAIT_TIMEOUT_MS", 10_000)
+IDEMPOTENCY_PURGE_BATCH_SIZE = _env_int("IDEMPOTENCY_PURGE_BATCH_SIZE", 1000)
+IDEMPOTENCY_PURGE_PAUSE_MS = _env_int("IDEMPOTENCY_PURGE_PAUSE_MS", 0)
@@ -1,3 +1,4 @@
+from django.conf import settings
 from django.contrib import admin
 from django.urls import path
 
@@ -7,3 +8,8 @@ urlpatterns = [
     path("admin/", admin.site.urls),
     path("api/", api.urls),
 ]
+
+if settings.METRICS_ENABLED:
+    from assets_backend.metrics import metrics_view
+
+    urlpatterns.append(path("metrics", metrics_view, name="metrics"))
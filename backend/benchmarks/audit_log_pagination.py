@@ -0,0 +1,175 @@
+"""Compare keyset and OFFSET pagination of ``AuthAuditLog`` on a seeded table.
+
+Seeds the configured database (PostgreSQL recommended; rows are generated
+server-side with ``generate_series`` there) and then times fetching page 1,
+100, 1,000 and 10,000 both ways, unfiltered and with an action/success filter::
+
+    DATABASE_URL=postgres://... python -m benchmarks.audit_log_pagination --rows 5000000
+    python -m benchmarks.audit_log_pagination --skip-seed --output keyset.json
+    python -m benchmarks.audit_log_pagination --cleanup
+
+Seeded rows use ``@bench.invalid`` addresses so ``--cleanup`` can remove them.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import time
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "assets_backend.settings")
+django.setup()
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.auth.api import AUDIT_LOG_ORDERING
+from apps.auth.models import AuthAuditLog
+from assets_backend.pagination import encode_cursor, keyset_page
+
+BENCH_DOMAIN = "bench.invalid"
+ACTIONS = [choice for choice, _label in AuthAuditLog.Action.choices]
+
+
+def seed(rows: int, days: int, chunk: int = 500_000) -> None:
+    started = time.perf_counter()
+    end = timezone.now()
+    if connection.vendor == "postgresql":
+        table = connection.ops.quote_name(AuthAuditLog._meta.db_table)
+        actions = "ARRAY[" + ",".join(f"'{action}'" for action in ACTIONS) + "]"
+        with connection.cursor() as cursor:
+            for offset in range(0, rows, chunk):
+                count = min(chunk, rows - offset)
+                cursor.execute(
+                    f"INSERT INTO {table} (email, action, successful, ip_address, user_agent, metadata, created_at) "
+                    f"SELECT 'user' || mod(g, 5000) || '@{BENCH_DOMAIN}', "
+                    f"({actions})[1 + mod(g, {len(ACTIONS)})], mod(g, 7) <> 0, '10.0.0.1', 'bench', '{{}}', "
+                    "%s - make_interval(secs => g * %s) "
+                    "FROM generate_series(%s, %s) AS g",
+                    [end, days * 86400 / rows, offset + 1, offset + count],
+                )
+                print(f"seeded {offset + count}/{rows}", flush=True)  # noqa: T201
+            cursor.execute(f"ANALYZE {table}")
+    else:
+        step = timedelta(days=days) / rows
+        for offset in range(0, rows, 10_000):
+            AuthAuditLog.objects.bulk_create(
+                AuthAuditLog(
+                    email=f"user{index % 5000}@{BENCH_DOMAIN}",
+                    action=ACTIONS[index % len(ACTIONS)],
+                    successful=index % 7 != 0,
+                    ip_address="10.0.0.1",
+                    user_agent="bench",
+                    created_at=end - step * index,
+                )
+                for index in range(offset + 1, min(offset + 10_000, rows) + 1)
+            )
+    print(f"seeded {rows} rows in {time.perf_counter() - started:.1f}s", flush=True)  # noqa: T201
+
+
+def cleanup() -> None:
+    deleted, _ = AuthAuditLog.objects.filter(
+        email__endswith=f"@{BENCH_DOMAIN}"
+    ).delete()
+    print(f"deleted {deleted} rows")  # noqa: T201
+
+
+def _median_ms(func: Callable[[], Any], repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append(time.perf_counter() - started)
+    return round(statistics.median(samples) * 1000, 3)
+
+
+def measure(*, pages: list[int], limit: int, repeat: int) -> list[dict[str, Any]]:
+    scenarios = {
+        "all": AuthAuditLog.objects.all(),
+        "action+successful": AuthAuditLog.objects.filter(
+            action=AuthAuditLog.Action.LOGIN, successful=True
+        ),
+    }
+    results = []
+    for name, queryset in scenarios.items():
+        ordered = queryset.order_by(*AUDIT_LOG_ORDERING)
+        for page in pages:
+            offset = (page - 1) * limit
+            cursor = None
+            if offset:
+                # Position of the previous page's last row; not timed.
+                boundary = ordered.values_list("created_at", "id")[offset - 1 : offset]
+                if not boundary:
+                    continue
+                cursor = encode_cursor(boundary[0])
+            results.append(
+                {
+                    "scenario": name,
+                    "page": page,
+                    "keyset_ms": _median_ms(
+                        lambda: keyset_page(
+                            queryset,
+                            ordering=AUDIT_LOG_ORDERING,
+                            cursor=cursor,
+                            limit=limit,
+                        ),
+                        repeat,
+                    ),
+                    "offset_ms": _median_ms(
+                        lambda: list(ordered[offset : offset + limit]), repeat
+                    ),
+                }
+            )
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument(
+        "--days", type=int, default=90, help="Spread seeded rows over this many days"
+    )
+    parser.add_argument("--skip-seed", action="store_true")
+    parser.add_argument(
+        "--cleanup", action="store_true", help="Delete seeded rows and exit"
+    )
+    parser.add_argument("--pages", default="1,100,1000,10000")
+    parser.add_argument("--limit", type=int, default=50)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    if args.cleanup:
+        cleanup()
+        return
+    if not args.skip_seed:
+        seed(args.rows, args.days)
+
+    results = measure(
+        pages=[int(page) for page in args.pages.split(",")],
+        limit=args.limit,
+        repeat=args.repeat,
+    )
+    print(f"{'scenario':<20}{'page':>8}{'keyset ms':>12}{'offset ms':>12}")  # noqa: T201
+    for row in results:
+        print(  # noqa: T201
+            f"{row['scenario']:<20}{row['page']:>8}{row['keyset_ms']:>12}{row['offset_ms']:>12}"
+        )
+    if args.output:
+        args.output.write_text(
+            json.dumps({"vendor": connection.vendor, "results": results}, indent=2)
+        )
+
+
+if __name__ == "__main__":
+    main()
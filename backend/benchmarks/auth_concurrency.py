@@ -0,0 +1,201 @@
+"""Concurrency benchmark for the auth endpoints against a running server.
+
+Run the same scenario against the sync stack under gunicorn and the async
+stack under uvicorn on the same machine, then compare the two JSON reports::
+
+    gunicorn assets_backend.wsgi:application -w 4 --threads 8 -b 127.0.0.1:8000
+    python -m benchmarks.auth_concurrency --label sync-gunicorn --output sync.json
+
+    AUTH_ASYNC_ENDPOINTS=1 uvicorn assets_backend.asgi:application --workers 4 --port 8000
+    python -m benchmarks.auth_concurrency --label async-uvicorn --output async.json
+
+    python -m benchmarks.auth_concurrency --compare sync.json async.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import http.client
+import json
+import socket
+import statistics
+import threading
+import time
+from http.cookies import SimpleCookie
+from pathlib import Path
+from typing import Any
+from urllib.parse import urlsplit
+
+SCENARIOS = ("me", "login", "refresh")
+
+
+class Session:
+    """One keep-alive connection with its own cookie jar."""
+
+    def __init__(self, base_url: str) -> None:
+        parts = urlsplit(base_url)
+        self.prefix = parts.path.rstrip("/")
+        self.connection = http.client.HTTPConnection(
+            parts.hostname, parts.port or 80, timeout=30
+        )
+        self.connection.connect()
+        # Avoid Nagle/delayed-ACK stalls dominating the measured latency.
+        self.connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.cookies: dict[str, str] = {}
+
+    def request(
+        self, method: str, path: str, body: dict[str, Any] | None = None
+    ) -> int:
+        headers = {"Content-Type": "application/json"}
+        if self.cookies:
+            headers["Cookie"] = "; ".join(
+                f"{key}={value}" for key, value in self.cookies.items()
+            )
+        payload = json.dumps(body).encode() if body is not None else None
+        self.connection.request(
+            method, f"{self.prefix}{path}", body=payload, headers=headers
+        )
+        response = self.connection.getresponse()
+        response.read()
+        for header in response.headers.get_all("Set-Cookie") or []:
+            for key, morsel in SimpleCookie(header).items():
+                self.cookies[key] = morsel.value
+        return response.status
+
+
+def _worker(
+    base_url: str,
+    scenario: str,
+    credentials: dict[str, str],
+    deadline: float,
+    latencies: list[float],
+    errors: list[int],
+) -> None:
+    session = Session(base_url)
+    if scenario != "login":
+        session.request("POST", "/auth/login", credentials)
+    while time.perf_counter() < deadline:
+        started = time.perf_counter()
+        try:
+            if scenario == "me":
+                status = session.request("GET", "/auth/me")
+            elif scenario == "refresh":
+                status = session.request("POST", "/auth/refresh")
+            else:
+                status = session.request("POST", "/auth/login", credentials)
+        except (OSError, http.client.HTTPException):
+            errors.append(0)
+            session = Session(base_url)
+            continue
+        latencies.append(time.perf_counter() - started)
+        if status >= 400:
+            errors.append(status)
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    index = min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)
+    return ordered[index]
+
+
+def run(
+    *,
+    base_url: str,
+    scenario: str,
+    concurrency: int,
+    duration: float,
+    credentials: dict[str, str],
+    label: str,
+) -> dict[str, Any]:
+    latencies: list[float] = []
+    errors: list[int] = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(
+            target=_worker,
+            args=(base_url, scenario, credentials, deadline, latencies, errors),
+            daemon=True,
+        )
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    return {
+        "label": label,
+        "scenario": scenario,
+        "concurrency": concurrency,
+        "duration_s": round(elapsed, 3),
+        "requests": len(latencies),
+        "errors": len(errors),
+        "throughput_rps": round(len(latencies) / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies) * 1000, 3) if latencies else 0.0,
+            "p50": round(_percentile(latencies, 0.50) * 1000, 3),
+            "p95": round(_percentile(latencies, 0.95) * 1000, 3),
+            "p99": round(_percentile(latencies, 0.99) * 1000, 3),
+        },
+    }
+
+
+def compare(baseline: dict[str, Any], candidate: dict[str, Any]) -> str:
+    rows = [
+        ("throughput_rps", baseline["throughput_rps"], candidate["throughput_rps"]),
+        *(
+            (f"{name} ms", baseline["latency_ms"][name], candidate["latency_ms"][name])
+            for name in ("p50", "p95", "p99")
+        ),
+        ("errors", baseline["errors"], candidate["errors"]),
+    ]
+    lines = [
+        f"{'metric':<16}{baseline['label']:>18}{candidate['label']:>18}{'change':>10}"
+    ]
+    for name, before, after in rows:
+        change = f"{(after - before) / before * 100:+.1f}%" if before else "n/a"
+        lines.append(f"{name:<16}{before:>18}{after:>18}{change:>10}")
+    return "\n".join(lines)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000/api")
+    parser.add_argument("--scenario", choices=SCENARIOS, default="me")
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--duration", type=float, default=30.0, help="Seconds to run")
+    parser.add_argument("--email", default="user@example.com")
+    parser.add_argument("--password", default="UserPass123!")
+    parser.add_argument("--label", default="run")
+    parser.add_argument("--output", type=Path)
+    parser.add_argument(
+        "--compare", nargs=2, type=Path, metavar=("BASELINE", "CANDIDATE")
+    )
+    args = parser.parse_args()
+
+    if args.compare:
+        baseline, candidate = (json.loads(path.read_text()) for path in args.compare)
+        print(compare(baseline, candidate))  # noqa: T201
+        return
+
+    result = run(
+        base_url=args.base_url,
+        scenario=args.scenario,
+        concurrency=args.concurrency,
+        duration=args.duration,
+        credentials={"email": args.email, "password": args.password},
+        label=args.label,
+    )
+    report = json.dumps(result, indent=2)
+    if args.output:
+        args.output.write_text(report)
+    print(report)  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
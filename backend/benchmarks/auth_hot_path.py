@@ -0,0 +1,330 @@
+"""Micro-benchmarks for the auth hot path with a regression gate.
+
+Each case reports operations per second, the peak bytes allocated by one call
+(``tracemalloc``) and the database queries one call issues. Results are
+compared with a stored baseline; the run fails when a case got slower or
+allocates more than the tolerance allows, or issues more queries at all.
+Cases faster than ``--min-timed-us`` per call are gated on allocations and
+queries only: at a few microseconds per call, scheduler noise moves their
+throughput further than any tolerance that would still catch a regression::
+
+    python -m benchmarks.auth_hot_path                       # compare with the baseline
+    python -m benchmarks.auth_hot_path --update-baseline     # after an intended change
+    python -m benchmarks.auth_hot_path --cases login,me --output results.json
+
+Throughput is compared relative to a fixed pure-Python calibration loop timed
+in the same run, so a baseline recorded on one machine holds on another.
+Runs against a throwaway test database, like ``manage.py test``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+import tracemalloc
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "assets_backend.settings")
+django.setup()
+
+from django.db import connection
+from django.test import Client, RequestFactory
+from django.test.utils import (
+    CaptureQueriesContext,
+    setup_test_environment,
+    teardown_test_environment,
+)
+
+from apps.auth.api import _user_payload, jwt_auth
+from apps.auth.cache import reset_principal_cache
+from apps.auth.constants import is_auth_exempt_path
+from apps.auth.models import RefreshToken, User
+from apps.auth.tokens import (
+    create_access_token,
+    reset_token_cache,
+    validate_access_token,
+)
+
+DEFAULT_BASELINE = Path(__file__).with_name("baselines") / "auth_hot_path.json"
+PASSWORD = "Bench-Passw0rd!"
+
+
+def _calibration() -> None:
+    values = sorted(str(index * 7919 % 1000) for index in range(200))
+    {value: len(value) for value in values}
+
+
+def _build_cases() -> dict[str, Callable[[], Any]]:
+    user = User.objects.create_user(
+        email="bench@example.com", password=PASSWORD, first_name="Bench"
+    )
+    token = create_access_token(user)
+    request = RequestFactory().get("/api/auth/me", HTTP_AUTHORIZATION=f"Bearer {token}")
+    credentials = {"email": user.email, "password": PASSWORD}
+
+    session = Client()
+    session.post("/api/auth/login", credentials, content_type="application/json")
+
+    def validate_uncached() -> Any:
+        reset_token_cache()
+        return validate_access_token(token)
+
+    return {
+        "create_access_token": lambda: create_access_token(user),
+        "validate_access_token": lambda: validate_access_token(token),
+        "validate_access_token_uncached": validate_uncached,
+        "jwt_auth_call": lambda: jwt_auth(request),
+        "is_auth_exempt_path_hit": lambda: is_auth_exempt_path("/api/auth/refresh"),
+        "is_auth_exempt_path_miss": lambda: is_auth_exempt_path("/api/auth/me"),
+        "refresh_token_build": RefreshToken.build_token,
+        "user_payload": lambda: _user_payload(user),
+        "login": lambda: Client().post(
+            "/api/auth/login", credentials, content_type="application/json"
+        ),
+        "refresh": lambda: session.post("/api/auth/refresh"),
+        "me": lambda: session.get("/api/auth/me"),
+    }
+
+
+def measure(
+    func: Callable[[], Any], *, rounds: int, round_time: float
+) -> dict[str, Any]:
+    func()  # warm caches and lazy imports
+    started = time.perf_counter()
+    calls = 0
+    while calls == 0 or time.perf_counter() - started < round_time / 4:
+        func()
+        calls += 1
+    loops = max(int(round_time / ((time.perf_counter() - started) / calls)), 1)
+
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops)
+
+    with CaptureQueriesContext(connection) as captured:
+        func()
+    # Read now: the next request's ``request_started`` resets the query log.
+    queries = len(captured)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    # Best of the rounds: noise from the machine only ever adds time.
+    per_call = min(samples)
+    return {
+        "ops_per_sec": round(1 / per_call, 1),
+        "us_per_call": round(per_call * 1_000_000, 2),
+        "alloc_peak_bytes": peak - before,
+        "queries": queries,
+    }
+
+
+def compare(
+    results: dict[str, Any],
+    baseline: dict[str, Any],
+    *,
+    speed_tolerance: float,
+    memory_tolerance: float,
+    min_timed_us: float,
+) -> list[tuple[str, str]]:
+    """Return ``(case, message)`` for each regression of *results* against *baseline*."""
+
+    scale = results["calibration_ops_per_sec"] / baseline["calibration_ops_per_sec"]
+    failures = []
+    for name, current in results["cases"].items():
+        previous = baseline["cases"].get(name)
+        if previous is None:
+            continue
+        expected = previous["ops_per_sec"] * scale
+        timed = previous["us_per_call"] >= min_timed_us
+        if timed and current["ops_per_sec"] < expected * (1 - speed_tolerance):
+            failures.append(
+                (
+                    name,
+                    f"{current['ops_per_sec']} ops/s, expected at least ~{expected:.1f}",
+                )
+            )
+        # A little absolute slack so tiny allocations do not flap.
+        allowed = previous["alloc_peak_bytes"] * (1 + memory_tolerance) + 1024
+        if current["alloc_peak_bytes"] > allowed:
+            failures.append(
+                (
+                    name,
+                    f"{current['alloc_peak_bytes']} peak bytes, baseline {previous['alloc_peak_bytes']}",
+                )
+            )
+        if current["queries"] > previous["queries"]:
+            failures.append(
+                (
+                    name,
+                    f"{current['queries']} queries per call, baseline {previous['queries']}",
+                )
+            )
+    return failures
+
+
+@contextmanager
+def _test_database() -> Iterator[None]:
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        reset_principal_cache()
+        reset_token_cache()
+        yield
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def run(
+    cases: dict[str, Callable[[], Any]], *, rounds: int, round_time: float
+) -> dict[str, Any]:
+    calibration = measure(_calibration, rounds=rounds, round_time=round_time)[
+        "ops_per_sec"
+    ]
+    results: dict[str, Any] = {"cases": {}}
+    for name, func in cases.items():
+        results["cases"][name] = measure(func, rounds=rounds, round_time=round_time)
+        print(  # noqa: T201
+            f"{name:<34}{results['cases'][name]['ops_per_sec']:>14,.1f} ops/s",
+            flush=True,
+        )
+    # Timed on both sides of the cases; the slower reading keeps a briefly
+    # idle machine from tightening the gate.
+    after = measure(_calibration, rounds=rounds, round_time=round_time)["ops_per_sec"]
+    results["calibration_ops_per_sec"] = min(calibration, after)
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--cases", help="Comma-separated subset of cases")
+    parser.add_argument("--rounds", type=int, default=7)
+    parser.add_argument(
+        "--round-time", type=float, default=0.2, help="Target seconds per round"
+    )
+    parser.add_argument("--baseline", type=Path, default=DEFAULT_BASELINE)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument(
+        "--speed-tolerance",
+        type=float,
+        default=0.35,
+        help="Allowed relative throughput drop",
+    )
+    parser.add_argument(
+        "--memory-tolerance",
+        type=float,
+        default=0.25,
+        help="Allowed relative allocation growth",
+    )
+    parser.add_argument(
+        "--min-timed-us",
+        type=float,
+        default=10.0,
+        help="Baseline us/call below which throughput is not gated",
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    tolerances = {
+        "speed_tolerance": args.speed_tolerance,
+        "memory_tolerance": args.memory_tolerance,
+        "min_timed_us": args.min_timed_us,
+    }
+
+    with _test_database():
+        cases = _build_cases()
+        names = args.cases.split(",") if args.cases else list(cases)
+        unknown = set(names) - set(cases)
+        if unknown:
+            parser.error(f"unknown cases: {', '.join(sorted(unknown))}")
+        results = run(
+            {name: cases[name] for name in names},
+            rounds=args.rounds,
+            round_time=args.round_time,
+        )
+        baseline = (
+            json.loads(args.baseline.read_text()) if args.baseline.exists() else None
+        )
+        failures = []
+        if baseline is not None and not args.update_baseline:
+            failures = compare(results, baseline, **tolerances)
+        if failures:
+            # Timings on shared machines are noisy; a regression has to repeat.
+            suspects = sorted({name for name, _message in failures})
+            print(f"\nRe-measuring {', '.join(suspects)}", flush=True)  # noqa: T201
+            retry = run(
+                {name: cases[name] for name in suspects},
+                rounds=args.rounds,
+                round_time=args.round_time,
+            )
+            for name, row in retry["cases"].items():
+                if row["ops_per_sec"] > results["cases"][name]["ops_per_sec"]:
+                    results["cases"][name] = row
+            results["calibration_ops_per_sec"] = min(
+                results["calibration_ops_per_sec"], retry["calibration_ops_per_sec"]
+            )
+            failures = compare(results, baseline, **tolerances)
+
+    print(f"\n{'case':<34}{'ops/s':>14}{'us/call':>12}{'peak bytes':>12}{'queries':>9}")  # noqa: T201
+    for name, row in results["cases"].items():
+        print(  # noqa: T201
+            f"{name:<34}{row['ops_per_sec']:>14,.1f}{row['us_per_call']:>12}{row['alloc_peak_bytes']:>12}{row['queries']:>9}"
+        )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        if baseline is not None and args.cases:
+            # Keep the cases that were not re-run.
+            scale = (
+                results["calibration_ops_per_sec"] / baseline["calibration_ops_per_sec"]
+            )
+            for name, row in baseline["cases"].items():
+                if name not in results["cases"]:
+                    results["cases"][name] = {
+                        **row,
+                        "ops_per_sec": round(row["ops_per_sec"] * scale, 1),
+                        "us_per_call": round(row["us_per_call"] / scale, 2),
+                    }
+        args.baseline.parent.mkdir(parents=True, exist_ok=True)
+        args.baseline.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+        print(f"\nBaseline written to {args.baseline}")  # noqa: T201
+        return
+    if baseline is None:
+        print(  # noqa: T201
+            f"\nNo baseline at {args.baseline}; run with --update-baseline to record one."
+        )
+        return
+    if failures:
+        print(  # noqa: T201
+            "\nRegressions against the baseline:",
+            *(f"{name}: {message}" for name, message in failures),
+            sep="\n  ",
+        )
+        sys.exit(1)
+    print("\nNo regressions against the baseline.")  # noqa: T201
+
+
+if __name__ == "__main__":
+    main()
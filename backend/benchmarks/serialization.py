@@ -0,0 +1,175 @@
+"""Compare response serialization before and after the orjson fast paths.
+
+For each hot response, times the previous path (build the Pydantic schema,
+``.dict()`` it and encode with ``NinjaJSONEncoder``) against the current one
+(build the dict directly and encode with orjson). Both sides must produce the
+same bytes. Also reports the peak bytes one call allocates; no database is
+needed::
+
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --audit-rows 200 --output serialization.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import time
+import tracemalloc
+from collections.abc import Callable
+from datetime import timedelta
+from pathlib import Path
+from typing import Any
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "assets_backend.settings")
+django.setup()
+
+from django.utils import timezone
+from ninja.responses import NinjaJSONEncoder
+
+from apps.auth.api import _token_payload, _user_payload
+from apps.auth.models import User
+from apps.auth.schemas import AuditLogPage, LoginResponse, UserResponse
+from assets_backend.renderers import dumps
+
+
+def _json(data: Any) -> bytes:
+    return json.dumps(data, cls=NinjaJSONEncoder, separators=(",", ":")).encode()
+
+
+def _cases(
+    audit_rows: int,
+) -> dict[str, tuple[Callable[[], bytes], Callable[[], bytes]]]:
+    user = User(
+        pk=42,
+        email="bench@example.com",
+        first_name="Bench",
+        last_name="User",
+        role=User.Role.USER,
+    )
+    now = timezone.now()
+    tokens = {
+        "access_token": "a" * 220,
+        "refresh_token": "r" * 64,
+        "expires_at": now,
+        "role": user.role,
+    }
+    page = {
+        "items": [
+            {
+                "id": index,
+                "user_id": 42,
+                "email": user.email,
+                "action": "login",
+                "successful": True,
+                "ip_address": "203.0.113.7",
+                "user_agent": "Mozilla/5.0 (X11; Linux x86_64)",
+                "metadata": {"refresh_id": index},
+                "created_at": now - timedelta(seconds=index),
+            }
+            for index in range(audit_rows)
+        ],
+        "next_cursor": "eyJpZCI6IDF9",
+    }
+
+    def user_before() -> bytes:
+        schema = UserResponse(
+            id=str(user.pk), email=user.email, full_name=user.full_name, role=user.role
+        )
+        return _json(schema.dict(by_alias=True))
+
+    def me_before() -> bytes:
+        # What Ninja did with ``me``'s dict: validate against the schema, dump.
+        return _json(
+            UserResponse.model_validate(
+                _user_payload(user, by_alias=False)
+            ).model_dump()
+        )
+
+    return {
+        "user_payload": (user_before, lambda: dumps(_user_payload(user))),
+        "me": (me_before, lambda: dumps(_user_payload(user, by_alias=False))),
+        "login": (
+            lambda: _json(LoginResponse(**tokens).dict()),
+            lambda: dumps(_token_payload(**tokens)),
+        ),
+        f"audit_page_{audit_rows}": (
+            lambda: _json(AuditLogPage.model_validate(page).model_dump()),
+            lambda: dumps(AuditLogPage.model_validate(page).model_dump()),
+        ),
+    }
+
+
+def measure(
+    func: Callable[[], Any], *, round_time: float, rounds: int
+) -> dict[str, float]:
+    func()
+    started = time.perf_counter()
+    calls = 0
+    while calls == 0 or time.perf_counter() - started < round_time / 4:
+        func()
+        calls += 1
+    loops = max(int(round_time / ((time.perf_counter() - started) / calls)), 1)
+    samples = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(loops):
+            func()
+        samples.append((time.perf_counter() - started) / loops)
+
+    tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        func()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {
+        "us_per_call": round(min(samples) * 1_000_000, 2),
+        "alloc_peak_bytes": peak - before,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument(
+        "--audit-rows", type=int, default=50, help="Rows in the rendered audit log page"
+    )
+    parser.add_argument("--rounds", type=int, default=5)
+    parser.add_argument(
+        "--round-time", type=float, default=0.2, help="Target seconds per round"
+    )
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    results = {}
+    for name, (before, after) in _cases(args.audit_rows).items():
+        if before() != after():
+            raise SystemExit(f"{name}: the fast path renders different bytes")
+        results[name] = {
+            "before": measure(before, round_time=args.round_time, rounds=args.rounds),
+            "after": measure(after, round_time=args.round_time, rounds=args.rounds),
+        }
+
+    print(  # noqa: T201
+        f"{'response':<18}{'before us':>11}{'after us':>10}{'speedup':>9}{'before B':>10}{'after B':>9}"
+    )
+    for name, row in results.items():
+        before, after = row["before"], row["after"]
+        print(  # noqa: T201
+            f"{name:<18}{before['us_per_call']:>11}{after['us_per_call']:>10}"
+            f"{before['us_per_call'] / after['us_per_call']:>8.1f}x"
+            f"{before['alloc_peak_bytes']:>10}{after['alloc_peak_bytes']:>9}"
+        )
+    if args.output:
+        args.output.write_text(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""Time ``validate_access_token`` per request with and without the verified-token cache.
+
+Each algorithm is measured on a pool of distinct tokens, each presented
+``--reuse`` times, as a client does during the token's lifetime; no database
+is needed::
+
+    python -m benchmarks.token_verification
+    python -m benchmarks.token_verification --tokens 5000 --reuse 20 --output tokens.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "assets_backend.settings")
+django.setup()
+
+from django.test import override_settings
+
+from apps.auth import tokens
+from apps.auth.cache import VerifiedTokenCache
+from apps.auth.keys import PRIVATE_SUFFIX, generate_private_key
+from apps.auth.models import User
+
+
+def _per_request_us(
+    token_pool: list[str], reuse: int, cache: VerifiedTokenCache
+) -> float:
+    requests = [token for _ in range(reuse) for token in token_pool]
+    with patch.object(tokens, "_verified_tokens", cache):
+        started = time.perf_counter()
+        for token in requests:
+            tokens.validate_access_token(token)
+        elapsed = time.perf_counter() - started
+    return round(elapsed / len(requests) * 1_000_000, 2)
+
+
+def measure(
+    algorithm: str, *, count: int, reuse: int, max_bytes: int
+) -> dict[str, Any]:
+    users = [
+        User(pk=index, email=f"user{index}@bench.invalid", role=User.Role.USER)
+        for index in range(count)
+    ]
+    token_pool = [tokens.create_access_token(user) for user in users]
+    uncached = _per_request_us(token_pool, reuse, VerifiedTokenCache(max_bytes=0))
+    cache = VerifiedTokenCache(max_bytes=max_bytes)
+    cached = _per_request_us(token_pool, reuse, cache)
+    return {
+        "algorithm": algorithm,
+        "tokens": count,
+        "reuse": reuse,
+        "uncached_us": uncached,
+        "cached_us": cached,
+        "cache": cache.stats(),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--tokens", type=int, default=2_000)
+    parser.add_argument(
+        "--reuse", type=int, default=10, help="Times each token is presented"
+    )
+    parser.add_argument("--max-bytes", type=int, default=16 * 1024 * 1024)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+
+    options = {"count": args.tokens, "reuse": args.reuse, "max_bytes": args.max_bytes}
+    results = [measure("HS256", **options)]
+    for algorithm in ("EdDSA", "ES256"):
+        with tempfile.TemporaryDirectory() as keys_dir:
+            Path(keys_dir, f"bench{PRIVATE_SUFFIX}").write_bytes(
+                generate_private_key(algorithm)
+            )
+            with override_settings(JWT_KEYS_DIR=keys_dir):
+                results.append(measure(algorithm, **options))
+
+    print(f"{'algorithm':<10}{'uncached us':>14}{'cached us':>12}{'hit rate':>10}")  # noqa: T201
+    for row in results:
+        stats = row["cache"]
+        hit_rate = stats["hits"] / max(stats["hits"] + stats["misses"], 1)
+        print(  # noqa: T201
+            f"{row['algorithm']:<10}{row['uncached_us']:>14}{row['cached_us']:>12}{hit_rate:>10.1%}"
+        )
+    if args.output:
+        args.output.write_text(json.dumps({"results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,300 @@
+"""Concurrency benchmark for wallet postings on PostgreSQL.
+
+N threads, each with its own connection, post transfers between M funded
+wallets for a fixed time. ``--hot-share`` of the transfers credit one of the
+first ``--hot-wallets`` wallets, which models popular lenders receiving many
+concurrent credits. ``--batch-size`` postings are settled per transaction.
+The report gives throughput, transaction latency and the time spent waiting
+for wallet row locks. It ends with the drift check: every materialized
+balance and entry count must match the ledger, every transaction must net to
+zero and the wallets together must still hold exactly what they held before
+the run. The run fails if any check does not hold::
+
+    python -m benchmarks.wallet_transfers
+    python -m benchmarks.wallet_transfers --threads 32 --wallets 1000 --hot-wallets 3 --batch-size 20
+    python -m benchmarks.wallet_transfers --duration 30 --output transfers.json
+
+Runs against a throwaway test database, like ``manage.py test``.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import random
+import threading
+import time
+from collections.abc import Callable, Iterator
+from contextlib import contextmanager
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "assets_backend.settings")
+django.setup()
+
+from django.db import DatabaseError, connection, connections
+from django.db.models import Count, F, Q, Sum
+from django.test.utils import setup_test_environment, teardown_test_environment
+
+from apps.auth.models import User
+from apps.wallet.errors import InsufficientFunds, WalletBusy
+from apps.wallet.ledger import Posting, post, system_wallet
+from apps.wallet.models import LedgerEntry, Wallet
+
+OPENING_BALANCE = Decimal("1000000.00")
+
+
+@contextmanager
+def _test_database() -> Iterator[None]:
+    setup_test_environment(debug=False)
+    old_name = connection.creation.create_test_db(
+        verbosity=0, autoclobber=True, serialize=False
+    )
+    try:
+        yield
+    finally:
+        connections.close_all()
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+
+
+def _create_wallets(count: int) -> list[int]:
+    User.objects.bulk_create(
+        User(email=f"wallet-bench-{index}@bench.invalid") for index in range(count)
+    )
+    users = (
+        User.objects.filter(email__endswith="@bench.invalid")
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    Wallet.objects.bulk_create(Wallet(user_id=user_id) for user_id in users)
+    wallet_ids = list(
+        Wallet.objects.filter(user__isnull=False)
+        .order_by("pk")
+        .values_list("pk", flat=True)
+    )
+    external = system_wallet(Wallet.EXTERNAL).pk
+    post([Posting(external, wallet_id, OPENING_BALANCE) for wallet_id in wallet_ids])
+    return wallet_ids
+
+
+class _LockTimer:
+    """Execute wrapper adding up the time spent in ``SELECT ... FOR UPDATE``."""
+
+    def __init__(self) -> None:
+        self.seconds = 0.0
+
+    def __call__(
+        self,
+        execute: Callable[..., Any],
+        sql: str,
+        params: Any,
+        many: bool,
+        context: Any,
+    ) -> Any:
+        if "FOR UPDATE" not in sql:
+            return execute(sql, params, many, context)
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.seconds += time.perf_counter() - started
+
+
+class _Worker(threading.Thread):
+    def __init__(
+        self,
+        index: int,
+        args: argparse.Namespace,
+        wallet_ids: list[int],
+        deadline: float,
+    ) -> None:
+        super().__init__(daemon=True)
+        self.rng = random.Random(args.seed + index)
+        self.args = args
+        self.wallet_ids = wallet_ids
+        self.hot = wallet_ids[: args.hot_wallets]
+        self.deadline = deadline
+        self.latencies: list[float] = []
+        self.lock_waits: list[float] = []
+        self.postings = 0
+        self.outcomes = {
+            "rejected_insufficient_funds": 0,
+            "rejected_busy": 0,
+            "errors": 0,
+        }
+
+    def _posting(self) -> Posting:
+        debit = self.rng.choice(self.wallet_ids)
+        pool = self.hot if self.rng.random() < self.args.hot_share else self.wallet_ids
+        credit = self.rng.choice(pool)
+        while credit == debit:
+            credit = self.rng.choice(self.wallet_ids)
+        return Posting(debit, credit, Decimal(self.rng.randint(1, 50_000)).scaleb(-2))
+
+    def run(self) -> None:
+        timer = _LockTimer()
+        try:
+            with connection.execute_wrapper(timer):
+                while time.perf_counter() < self.deadline:
+                    batch = [self._posting() for _ in range(self.args.batch_size)]
+                    waited = timer.seconds
+                    started = time.perf_counter()
+                    try:
+                        post(batch)
+                    except InsufficientFunds:
+                        self.outcomes["rejected_insufficient_funds"] += 1
+                        continue
+                    except WalletBusy:
+                        self.outcomes["rejected_busy"] += 1
+                        continue
+                    except DatabaseError:
+                        # Deadlocks would land here; lock ordering should keep this at zero.
+                        self.outcomes["errors"] += 1
+                        continue
+                    self.latencies.append(time.perf_counter() - started)
+                    self.lock_waits.append(timer.seconds - waited)
+                    self.postings += len(batch)
+        finally:
+            connections.close_all()
+
+
+def _percentile(samples: list[float], fraction: float) -> float:
+    if not samples:
+        return 0.0
+    ordered = sorted(samples)
+    return ordered[min(int(round(fraction * (len(ordered) - 1))), len(ordered) - 1)]
+
+
+def _ms(seconds: float) -> float:
+    return round(seconds * 1000, 3)
+
+
+def check_drift(total_before: Decimal) -> dict[str, Any]:
+    """Compare every materialized balance and count with the ledger itself."""
+
+    sums = LedgerEntry.objects.values("wallet_id").annotate(
+        credits=Sum("amount", filter=Q(type=LedgerEntry.Type.CREDIT)),
+        debits=Sum("amount", filter=Q(type=LedgerEntry.Type.DEBIT)),
+        entries=Count("id"),
+    )
+    ledger = {row["wallet_id"]: row for row in sums}
+    drifted = []
+    for wallet_id, balance, entry_count in Wallet.objects.values_list(
+        "pk", "balance", "entry_count"
+    ):
+        row = ledger.get(wallet_id, {"credits": 0, "debits": 0, "entries": 0})
+        if (row["credits"] or 0) - (row["debits"] or 0) != balance or row[
+            "entries"
+        ] != entry_count:
+            drifted.append(wallet_id)
+    unbalanced = (
+        LedgerEntry.objects.values("transaction_id")
+        .annotate(
+            credits=Sum("amount", filter=Q(type=LedgerEntry.Type.CREDIT)),
+            debits=Sum("amount", filter=Q(type=LedgerEntry.Type.DEBIT)),
+        )
+        .exclude(credits=F("debits"))
+        .count()
+    )
+    total_after = Wallet.objects.aggregate(total=Sum("balance"))["total"]
+    return {
+        "drifted_wallets": drifted[:20],
+        "drifted_wallet_count": len(drifted),
+        "unbalanced_transactions": unbalanced,
+        "total_balance_before": str(total_before),
+        "total_balance_after": str(total_after),
+        "ok": not drifted and not unbalanced and total_after == total_before,
+    }
+
+
+def run(args: argparse.Namespace) -> dict[str, Any]:
+    wallet_ids = _create_wallets(args.wallets)
+    total_before = Wallet.objects.aggregate(total=Sum("balance"))["total"]
+    deadline = time.perf_counter() + args.duration
+    workers = [
+        _Worker(index, args, wallet_ids, deadline) for index in range(args.threads)
+    ]
+    started = time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    elapsed = time.perf_counter() - started
+
+    latencies = [sample for worker in workers for sample in worker.latencies]
+    lock_waits = [sample for worker in workers for sample in worker.lock_waits]
+    postings = sum(worker.postings for worker in workers)
+    outcomes = {
+        name: sum(worker.outcomes[name] for worker in workers)
+        for name in workers[0].outcomes
+    }
+    return {
+        "threads": args.threads,
+        "wallets": args.wallets,
+        "hot_wallets": args.hot_wallets,
+        "hot_share": args.hot_share,
+        "batch_size": args.batch_size,
+        "duration_s": round(elapsed, 3),
+        "transactions": len(latencies),
+        "postings": postings,
+        "postings_per_sec": round(postings / elapsed, 1) if elapsed else 0.0,
+        **outcomes,
+        "latency_ms": {
+            name: _ms(_percentile(latencies, q))
+            for name, q in (("p50", 0.5), ("p95", 0.95), ("p99", 0.99))
+        },
+        "lock_wait_ms": {
+            "total": _ms(sum(lock_waits)),
+            "mean": _ms(sum(lock_waits) / len(lock_waits)) if lock_waits else 0.0,
+            "p95": _ms(_percentile(lock_waits, 0.95)),
+            "p99": _ms(_percentile(lock_waits, 0.99)),
+            "share_of_latency": round(sum(lock_waits) / sum(latencies), 3)
+            if latencies
+            else 0.0,
+        },
+        "drift": check_drift(total_before),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--wallets", type=int, default=200)
+    parser.add_argument("--hot-wallets", type=int, default=5)
+    parser.add_argument(
+        "--hot-share",
+        type=float,
+        default=0.5,
+        help="Share of transfers crediting a hot wallet",
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=1, help="Postings settled per transaction"
+    )
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds to run")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path)
+    args = parser.parse_args()
+    if connection.vendor != "postgresql":
+        parser.error("row-lock contention needs PostgreSQL; set DATABASE_URL")
+    if not 0 < args.hot_wallets <= args.wallets:
+        parser.error("--hot-wallets must be between 1 and --wallets")
+
+    with _test_database():
+        result = run(args)
+    report = json.dumps(result, indent=2)
+    if args.output:
+        args.output.write_text(report)
+    print(report)  # noqa: T201
+    if not result["drift"]["ok"]:
+        raise SystemExit("balances drifted from the ledger")
+
+
+if __name__ == "__main__":
+    main()
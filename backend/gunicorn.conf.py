@@ -0,0 +1,24 @@
+"""Gunicorn settings shared by every deployment; gunicorn loads this file from the working directory.
+
+With ``PROMETHEUS_MULTIPROC_DIR`` set, each worker writes its metric samples
+to that directory and ``/metrics`` aggregates them. The directory is emptied
+when the arbiter starts, and a dead worker's live-gauge files are removed as
+soon as it exits.
+"""
+
+import os
+import shutil
+from pathlib import Path
+
+
+def on_starting(server):
+    if directory := os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        shutil.rmtree(directory, ignore_errors=True)
+        Path(directory).mkdir(parents=True)
+
+
+def child_exit(server, worker):
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
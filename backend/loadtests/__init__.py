@@ -0,0 +1 @@
+"""Locust load tests for the auth API; see ``locustfile.py``."""
@@ -0,0 +1,199 @@
+"""Auth load-test scenarios for Locust.
+
+Start the stack, seed it, then pick scenarios by user class::
+
+    docker compose -f compose.yml -f backend/loadtests/compose.yml up -d --build
+    docker compose -f compose.yml -f backend/loadtests/compose.yml exec backend python -m loadtests.seed_users
+    cd backend && locust -f loadtests/locustfile.py --host http://localhost:8000 --headless \\
+        -u 200 -r 20 -t 5m --report-file reports/auth-mix.json AuthFlowUser
+
+``AuthFlowUser`` is the everyday register/login/me/refresh/logout mix,
+``RefreshStormUser`` refreshes all at once on a fixed beat as when a wave of
+access tokens expires together, and ``CredentialStuffingUser`` fires bursts of
+bad logins from a handful of addresses. Without class names all three run,
+weighted 10:1:1. Every simulated client sends its own ``X-Real-IP``
+address, standing in for the proxy; the load-test stack sets
+``AUTH_CLIENT_IP_HEADER`` so per-IP throttling sees distinct clients.
+"""
+
+from __future__ import annotations
+
+import itertools
+import os
+import random
+import time
+import uuid
+from pathlib import Path
+from typing import Any
+
+from locust import HttpUser, between, events, task
+
+# Locust puts this file's directory on ``sys.path``.
+from report import write_report
+
+PASSWORD = os.getenv("LOADTEST_PASSWORD", "LoadTest-Passw0rd!")
+SEEDED_USERS = int(os.getenv("LOADTEST_SEEDED_USERS", "10000"))
+STORM_PERIOD = float(os.getenv("LOADTEST_STORM_PERIOD", "60"))
+ATTACKER_IPS = int(os.getenv("LOADTEST_ATTACKER_IPS", "5"))
+
+_client_numbers = itertools.count(1)
+
+
+def _seeded_email() -> str:
+    return f"load{random.randrange(SEEDED_USERS)}@loadtest.invalid"
+
+
+def _client_ip() -> str:
+    number = next(_client_numbers)
+    return f"10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}"
+
+
+@events.init_command_line_parser.add_listener
+def _add_arguments(parser: Any) -> None:
+    parser.add_argument(
+        "--report-file",
+        default="loadtest-report.json",
+        help="JSON report written at the end",
+    )
+
+
+@events.quitting.add_listener
+def _write_report(environment: Any, **kwargs: Any) -> None:
+    if environment.parsed_options is not None:
+        write_report(environment, Path(environment.parsed_options.report_file))
+
+
+class AuthSession(HttpUser):
+    """Holds one signed-in session; tokens are sent explicitly, not via cookies."""
+
+    abstract = True
+
+    def on_start(self) -> None:
+        self.ip_address = _client_ip()
+        self.access_token = ""
+        self.refresh_token = ""
+        self.login()
+
+    def _headers(self, **extra: str) -> dict[str, str]:
+        return {"X-Real-IP": self.ip_address, **extra}
+
+    def _store_tokens(self, response: Any) -> None:
+        body = response.json()
+        self.access_token = body["access_token"]
+        self.refresh_token = body["refresh_token"]
+        # The auth cookies are Secure; keep the jar from shadowing the headers.
+        self.client.cookies.clear()
+
+    def login(self) -> None:
+        with self.client.post(
+            "/api/auth/login",
+            json={"email": _seeded_email(), "password": PASSWORD},
+            headers=self._headers(),
+            catch_response=True,
+        ) as response:
+            if response.status_code == 200:
+                self._store_tokens(response)
+            else:
+                response.failure(f"login returned {response.status_code}")
+
+    def refresh(self, name: str = "/api/auth/refresh") -> None:
+        if not self.refresh_token:
+            self.login()
+            return
+        with self.client.post(
+            "/api/auth/refresh",
+            headers=self._headers(Cookie=f"refresh_token={self.refresh_token}"),
+            name=name,
+            catch_response=True,
+        ) as response:
+            if response.status_code == 200:
+                self._store_tokens(response)
+            else:
+                response.failure(f"refresh returned {response.status_code}")
+                self.refresh_token = ""
+
+
+class AuthFlowUser(AuthSession):
+    wait_time = between(1, 3)
+    weight = 10
+
+    @task(20)
+    def me(self) -> None:
+        with self.client.get(
+            "/api/auth/me",
+            headers=self._headers(Authorization=f"Bearer {self.access_token}"),
+            catch_response=True,
+        ) as response:
+            if response.status_code == 401:
+                # Expired between refreshes, as a browser would see it.
+                response.success()
+                self.refresh()
+
+    @task(3)
+    def rotate(self) -> None:
+        self.refresh()
+
+    @task(1)
+    def logout_and_login(self) -> None:
+        self.client.post(
+            "/api/auth/logout",
+            headers=self._headers(Cookie=f"refresh_token={self.refresh_token}"),
+        )
+        self.login()
+
+    @task(1)
+    def register(self) -> None:
+        self.client.post(
+            "/api/auth/register",
+            json={
+                "fullName": "Load Test",
+                "email": f"new-{uuid.uuid4().hex}@loadtest.invalid",
+                "password": PASSWORD,
+            },
+            headers=self._headers(),
+        )
+
+
+class RefreshStormUser(AuthSession):
+    """Refreshes in lockstep with every other storm user once per period."""
+
+    weight = 1
+
+    def wait_time(self) -> float:
+        # Sleep to the next shared boundary, plus the jitter real clients have.
+        return STORM_PERIOD - time.time() % STORM_PERIOD + random.uniform(0, 0.2)
+
+    @task
+    def storm(self) -> None:
+        self.refresh(name="/api/auth/refresh [storm]")
+
+
+class CredentialStuffingUser(HttpUser):
+    """Bursts of wrong-password logins; 401 and 429 are the expected outcomes."""
+
+    weight = 1
+    wait_time = between(5, 10)
+
+    def on_start(self) -> None:
+        self.ip_address = f"192.0.2.{random.randrange(ATTACKER_IPS) + 1}"
+
+    @task
+    def burst(self) -> None:
+        for _ in range(20):
+            # Half the addresses exist, as in a leaked-credential list.
+            email = (
+                _seeded_email()
+                if random.random() < 0.5
+                else f"{uuid.uuid4().hex}@leaked.invalid"
+            )
+            with self.client.post(
+                "/api/auth/login",
+                json={"email": email, "password": "guess-123456"},
+                headers={"X-Real-IP": self.ip_address},
+                name="/api/auth/login [stuffing]",
+                catch_response=True,
+            ) as response:
+                if response.status_code in {401, 429}:
+                    response.success()
+                else:
+                    response.failure(f"login returned {response.status_code}")
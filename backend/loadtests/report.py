@@ -0,0 +1,157 @@
+"""Machine-readable load-test reports and release-to-release comparison.
+
+``locustfile.py`` writes one JSON report per run with latency percentiles,
+throughput and error rate for every endpoint. Compare two of them with::
+
+    python -m loadtests.report before.json after.json
+    python -m loadtests.report before.json after.json --max-latency-regression 0.1
+
+The comparison exits non-zero when an endpoint's p95 grew past the allowed
+ratio or its error rate rose by more than the allowed number of points. This
+module does not import Locust or Django.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any
+
+PERCENTILES = {"p50_ms": 0.5, "p95_ms": 0.95, "p99_ms": 0.99}
+
+
+def _release() -> str:
+    if release := os.getenv("LOADTEST_RELEASE"):
+        return release
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            check=True,
+            text=True,
+            cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def _entry(stats: Any) -> dict[str, Any]:
+    requests = stats.num_requests
+    return {
+        "requests": requests,
+        "failures": stats.num_failures,
+        "error_rate": round(stats.num_failures / requests, 5) if requests else 0.0,
+        "rps": round(stats.total_rps, 2),
+        "mean_ms": round(stats.avg_response_time, 2),
+        **{
+            name: stats.get_response_time_percentile(value)
+            for name, value in PERCENTILES.items()
+        },
+    }
+
+
+def build_report(environment: Any) -> dict[str, Any]:
+    """Summarise a finished Locust run; endpoints are keyed ``"METHOD name"``."""
+
+    stats = environment.stats
+    options = environment.parsed_options
+    return {
+        "release": _release(),
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "host": environment.host,
+        "scenario": sorted(
+            user_class.__name__ for user_class in environment.user_classes
+        ),
+        "users": getattr(options, "num_users", None),
+        "duration_s": round(stats.last_request_timestamp - stats.start_time, 1)
+        if stats.last_request_timestamp
+        else 0,
+        "python": platform.python_version(),
+        "endpoints": {
+            f"{entry.method} {entry.name}": _entry(entry)
+            for entry in stats.entries.values()
+        },
+        "total": _entry(stats.total),
+    }
+
+
+def write_report(environment: Any, path: Path) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(
+        json.dumps(build_report(environment), indent=2, sort_keys=True) + "\n"
+    )
+
+
+def compare(
+    before: dict[str, Any],
+    after: dict[str, Any],
+    *,
+    max_latency_regression: float,
+    max_error_increase: float,
+) -> tuple[list[str], list[str]]:
+    """Return ``(table_lines, regressions)`` for endpoints present in both reports."""
+
+    lines = [
+        f"{'endpoint':<32}{'p95 before':>12}{'p95 after':>12}{'rps before':>12}{'rps after':>12}{'err after':>11}"
+    ]
+    regressions = []
+    for name, old in sorted(before["endpoints"].items()):
+        new = after["endpoints"].get(name)
+        if new is None:
+            continue
+        lines.append(
+            f"{name:<32}{old['p95_ms']:>12}{new['p95_ms']:>12}{old['rps']:>12}{new['rps']:>12}{new['error_rate']:>11.2%}"
+        )
+        if old["p95_ms"] and new["p95_ms"] > old["p95_ms"] * (
+            1 + max_latency_regression
+        ):
+            regressions.append(f"{name}: p95 {old['p95_ms']} ms -> {new['p95_ms']} ms")
+        if new["error_rate"] - old["error_rate"] > max_error_increase:
+            regressions.append(
+                f"{name}: error rate {old['error_rate']:.2%} -> {new['error_rate']:.2%}"
+            )
+    return lines, regressions
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("before", type=Path)
+    parser.add_argument("after", type=Path)
+    parser.add_argument(
+        "--max-latency-regression",
+        type=float,
+        default=0.2,
+        help="Allowed relative p95 growth",
+    )
+    parser.add_argument(
+        "--max-error-increase",
+        type=float,
+        default=0.01,
+        help="Allowed error-rate increase",
+    )
+    args = parser.parse_args()
+
+    before = json.loads(args.before.read_text())
+    after = json.loads(args.after.read_text())
+    lines, regressions = compare(
+        before,
+        after,
+        max_latency_regression=args.max_latency_regression,
+        max_error_increase=args.max_error_increase,
+    )
+    print(f"{before['release']} -> {after['release']}", *lines, sep="\n")  # noqa: T201
+    if regressions:
+        print("\nRegressions:", *regressions, sep="\n  ")  # noqa: T201
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,56 @@
+"""Seed the accounts the load-test scenarios sign in with.
+
+Writes ``--users`` accounts named ``load<N>@loadtest.invalid`` that share the
+password in ``LOADTEST_PASSWORD``, hashed once, and loads them with
+``import_users``. Run it inside the backend container of the load-test stack::
+
+    docker compose -f compose.yml -f backend/loadtests/compose.yml exec backend \\
+        python -m loadtests.seed_users --users 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import tempfile
+from pathlib import Path
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "assets_backend.settings")
+django.setup()
+
+from django.contrib.auth.hashers import make_password
+from django.core.management import call_command
+
+DOMAIN = "loadtest.invalid"
+DEFAULT_PASSWORD = "LoadTest-Passw0rd!"
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(
+        description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter
+    )
+    parser.add_argument("--users", type=int, default=10_000)
+    args = parser.parse_args()
+
+    # One hash for every account: seeding should not take longer than the test.
+    encoded = make_password(os.getenv("LOADTEST_PASSWORD", DEFAULT_PASSWORD))
+    with tempfile.TemporaryDirectory() as directory:
+        path = Path(directory) / "users.jsonl"
+        with path.open("w") as handle:
+            for index in range(args.users):
+                record = {
+                    "email": f"load{index}@{DOMAIN}",
+                    "first_name": "Load",
+                    "last_name": str(index),
+                }
+                handle.write(json.dumps({**record, "password_hash": encoded}) + "\n")
+        call_command(
+            "import_users", str(path), "--workers", "0", "--batch-size", "5000"
+        )
+
+
+if __name__ == "__main__":
+    main()
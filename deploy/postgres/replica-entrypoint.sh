@@ -0,0 +1,14 @@
+#!/bin/bash
+# Clone the primary on first start, then run as a hot standby.
+set -euo pipefail
+
+if [ ! -s "$PGDATA/PG_VERSION" ]; then
+    until pg_basebackup --host=db --username=replicator --pgdata="$PGDATA" \
+        --write-recovery-conf --wal-method=stream --checkpoint=fast; do
+        echo "Waiting for the primary to accept replication connections..."
+        rm -rf "${PGDATA:?}"/*
+        sleep 2
+    done
+fi
+
+exec docker-entrypoint.sh postgres -c hot_standby=on